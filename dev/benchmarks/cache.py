@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmarks reinstalling the packages of a MagicMirror from scratch (ie. after replacing a failed SD card) with
+the InstallationPipeline, with and without the build cache (MMPM_BUILD_CACHE_SIZE).
+
+The packages are local Git repositories with a package.json and package-lock.json, so the benchmark never touches
+the network. 'git' is replaced on the PATH by a stand-in which sleeps for --latency seconds before each network
+operation ('clone', and the 'ls-remote' used to look up the latest commit), and 'npm ci' by a stand-in which
+sleeps for --install seconds and creates a node_modules of --files files.
+
+Usage:
+    python dev/benchmarks/cache.py [--modules 15] [--latency 1.0] [--install 5.0] [--files 200]
+"""
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from helpers import create_repositories
+
+from mmpm.constants import paths
+from mmpm.magicmirror.cache import BuildCache
+from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.pipeline import InstallationPipeline
+from mmpm.utils import human_readable_size
+
+GIT_STAND_IN = """#!/bin/sh
+if [ "$1" = "clone" ] || [ "$1" = "ls-remote" ]; then sleep {latency}; fi
+exec {git} "$@"
+"""
+
+NPM_STAND_IN = """#!/bin/sh
+if [ "$1" = "--version" ]; then echo 10.0.0; exit 0; fi
+sleep {install}
+mkdir -p node_modules/dependency
+for file in $(seq {files}); do head -c 4096 /dev/urandom > node_modules/dependency/$file.js; done
+"""
+
+NODE_STAND_IN = """#!/bin/sh
+echo v20.0.0
+"""
+
+
+def write_manifests(repository: Path) -> None:
+    """
+    Writes a package.json and package-lock.json.
+    """
+    (repository / "package.json").write_text('{"dependencies": {"left-pad": "1.3.0"}}', encoding="utf-8")
+    (repository / "package-lock.json").write_text('{"lockfileVersion": 3}', encoding="utf-8")
+
+
+def reinstall(repositories: List[str], env: MagicMock) -> float:
+    """
+    Removes every package, and installs them all again.
+    """
+    modules_dir = env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+    shutil.rmtree(modules_dir, ignore_errors=True)
+    modules_dir.mkdir(parents=True)
+
+    packages = []
+
+    for repository in repositories:
+        package = MagicMirrorPackage(title=Path(repository).name, repository=repository, directory=Path(repository).name)
+        package.env = env
+        packages.append(package)
+
+    start = time.monotonic()
+    assert all([success for _, success in InstallationPipeline(packages).run()]), "every package must be installed"
+    return time.monotonic() - start
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark reinstalling packages from the build cache")
+    cli.add_argument("--modules", type=int, default=15, help="number of packages to reinstall")
+    cli.add_argument("--latency", type=float, default=1.0, help="seconds each network operation waits before starting")
+    cli.add_argument("--install", type=float, default=5.0, help="seconds each 'npm ci' takes")
+    cli.add_argument("--files", type=int, default=200, help="number of 4 KiB files 'npm ci' creates within node_modules")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repositories = [str(remote) for remote in create_repositories(Path(tmp_dir) / "remotes", args.modules, write_manifests)]
+
+        bin_dir = Path(tmp_dir) / "bin"
+        bin_dir.mkdir()
+
+        for name, script in (
+            ("git", GIT_STAND_IN.format(latency=args.latency, git=shutil.which("git"))),
+            ("npm", NPM_STAND_IN.format(install=args.install, files=args.files)),
+            ("node", NODE_STAND_IN),
+        ):
+            (bin_dir / name).write_text(script, encoding="utf-8")
+            (bin_dir / name).chmod(0o755)
+
+        env = MagicMock()
+        env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(tmp_dir) / "MagicMirror"
+        env.MMPM_MAX_WORKERS.get.return_value = 8
+        env.MMPM_MAX_BUILD_WORKERS.get.return_value = 2
+        env.MMPM_CLONE_STRATEGY.get.return_value = "full"
+        env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+        cache_dir = Path(tmp_dir) / "cache"
+
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}), patch("mmpm.magicmirror.pipeline.MMPMEnv", return_value=env):
+            with patch.object(paths, "MMPM_BUILD_CACHE_DIR", cache_dir):
+                env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+                uncached = reinstall(repositories, env)
+
+                env.MMPM_BUILD_CACHE_SIZE.get.return_value = 1024
+                saving = reinstall(repositories, env)  # the first install with the cache enabled saves every package
+                cached = reinstall(repositories, env)
+
+        size = BuildCache(cache_dir).size()
+
+    print(f"Modules: {args.modules} (network latency {args.latency}s, 'npm ci' takes {args.install}s and creates {args.files} files)")
+    print(f"{'uncached':<12} {uncached:.2f}s  (1.00x)")
+    print(f"{'saving':<12} {saving:.2f}s  ({uncached / saving:.2f}x, {human_readable_size(size)} saved to the cache)")
+    print(f"{'cached':<12} {cached:.2f}s  ({uncached / cached:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
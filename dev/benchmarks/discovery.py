@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmarks discovering the installed packages within a MagicMirror modules directory.
+
+A temporary modules directory is filled with fake packages (Git repositories with an 'origin' remote). The
+'subprocess' result reproduces the original approach, which ran 'git config --get remote.origin.url' and
+'basename' within each package directory, while the 'python' result is the current implementation, which
+reads the Git config of each package directly.
+
+Usage:
+    python dev/benchmarks/discovery.py [--modules 100] [--rounds 5]
+"""
+import os
+import subprocess
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from mmpm.magicmirror.database import MagicMirrorDatabase
+from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.utils import run_cmd
+
+
+def create_modules(modules_dir: Path, count: int) -> None:
+    """
+    Creates the given number of fake packages within the modules directory.
+    """
+    for index in range(count):
+        package_dir = modules_dir / f"MMM-Module-{index}"
+        subprocess.run(["git", "init", "-q", str(package_dir)], check=True)
+        subprocess.run(["git", "-C", str(package_dir), "remote", "add", "origin", f"https://github.com/test/MMM-Module-{index}.git"], check=True)
+
+
+def discover_with_subprocesses(modules_dir: Path) -> list:
+    """
+    The original implementation of MagicMirrorDatabase.__discover_installed_packages__.
+    """
+    cwd = os.getcwd()
+    packages = []
+
+    for package_dir in [directory for directory in modules_dir.iterdir() if directory.is_dir() and (directory / ".git").exists()]:
+        os.chdir(package_dir)
+        error_code, remote_origin_url, _ = run_cmd(["git", "config", "--get", "remote.origin.url"], progress=False)
+
+        if error_code:
+            continue
+
+        error_code, _, _ = run_cmd(["basename", remote_origin_url.strip(), ".git"], progress=False)
+
+        if not error_code:
+            packages.append(MagicMirrorPackage(repository=remote_origin_url.strip(), directory=package_dir.name))
+
+    os.chdir(cwd)
+    return packages
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark discovery of installed packages")
+    cli.add_argument("--modules", type=int, default=100, help="number of fake packages in the modules directory")
+    cli.add_argument("--rounds", type=int, default=5, help="number of times each approach is timed")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        magicmirror_root = Path(tmp_dir) / "MagicMirror"
+        modules_dir = magicmirror_root / "modules"
+        create_modules(modules_dir, args.modules)
+
+        env = MagicMock()
+        env.MMPM_MAGICMIRROR_ROOT.get.return_value = magicmirror_root
+        database = MagicMirrorDatabase()
+
+        with patch.object(database, "env", env):
+            expected = set(discover_with_subprocesses(modules_dir))
+            assert set(database.__discover_installed_packages__()) == expected, "both approaches must discover the same packages"
+
+            baseline = min(timeit.repeat(lambda: discover_with_subprocesses(modules_dir), number=1, repeat=args.rounds))
+            current = min(timeit.repeat(database.__discover_installed_packages__, number=1, repeat=args.rounds))
+
+    print(f"Modules: {args.modules}")
+    print(f"{'subprocess':<12} {baseline:.4f}s  (1.00x)")
+    print(f"{'python':<12} {current:.4f}s  ({baseline / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the benchmarks, which are run as scripts, so this module is importable from the directory
+of each benchmark.
+"""
+import subprocess
+from pathlib import Path
+from typing import Callable, List
+
+
+def create_repositories(remotes_dir: Path, count: int, write: Callable[[Path], None], commits: int = 1) -> List[Path]:
+    """
+    Creates the given number of fake packages (MMM-Module-0, MMM-Module-1, ...), each a local Git repository with
+    a history of `commits` commits. The files of each commit are written by calling `write` with the repository.
+    """
+    repositories = []
+
+    for index in range(count):
+        repository = remotes_dir / f"MMM-Module-{index}"
+        repository.mkdir(parents=True)
+
+        git = ["git", "-C", str(repository), "-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost"]
+        subprocess.run(["git", "init", "-q", str(repository)], check=True)
+
+        for commit in range(commits):
+            write(repository)
+            subprocess.run(git + ["add", "-A"], check=True)
+            subprocess.run(git + ["commit", "-q", "-m", "initial" if commit == 0 else str(commit)], check=True)
+
+        repositories.append(repository)
+
+    return repositories
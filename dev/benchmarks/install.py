@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmarks installing the packages of a new MagicMirror, one at a time (the original approach) and with the
+InstallationPipeline, which clones concurrently and builds with a separate, smaller pool of workers.
+
+The packages are local Git repositories with a Makefile, so the benchmark never touches the network. To keep
+the comparison representative of cloning from GitHub, 'git' is replaced on the PATH by a stand-in which sleeps
+for --latency seconds before cloning, and each Makefile sleeps for --build seconds.
+
+Usage:
+    python dev/benchmarks/install.py [--modules 15] [--latency 1.0] [--build 0.5] [--workers 8] [--build-workers 2]
+"""
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from helpers import create_repositories
+
+from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage
+from mmpm.magicmirror.pipeline import InstallationPipeline
+
+GIT_STAND_IN = """#!/bin/sh
+if [ "$1" = "clone" ]; then sleep {latency}; fi
+exec {git} "$@"
+"""
+
+
+def write_makefile(repository: Path, build: float) -> None:
+    """
+    Writes a Makefile which takes `build` seconds.
+    """
+    (repository / "Makefile").write_text(f"all:\n\tsleep {build}\n", encoding="utf-8")
+
+
+def install_sequentially(packages: List[MagicMirrorPackage]) -> bool:
+    """
+    The original implementation of the 'install' subcommand, which installed one package at a time.
+    """
+    return all([InstallationHandler(package, progress=False).install() for package in packages])
+
+
+def install_concurrently(packages: List[MagicMirrorPackage]) -> bool:
+    return all([success for _, success in InstallationPipeline(packages).run()])
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark installing packages")
+    cli.add_argument("--modules", type=int, default=15, help="number of packages to install")
+    cli.add_argument("--latency", type=float, default=1.0, help="seconds each clone waits before starting, in place of network latency")
+    cli.add_argument("--build", type=float, default=0.5, help="seconds each package takes to build")
+    cli.add_argument("--workers", type=int, default=8, help="value of MMPM_MAX_WORKERS")
+    cli.add_argument("--build-workers", type=int, default=2, help="value of MMPM_MAX_BUILD_WORKERS")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        remotes = create_repositories(Path(tmp_dir) / "remotes", args.modules, lambda remote: write_makefile(remote, args.build))
+        repositories = [str(remote) for remote in remotes]
+
+        bin_dir = Path(tmp_dir) / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "git").write_text(GIT_STAND_IN.format(latency=args.latency, git=shutil.which("git")), encoding="utf-8")
+        (bin_dir / "git").chmod(0o755)
+
+        env = MagicMock()
+        env.MMPM_MAX_WORKERS.get.return_value = args.workers
+        env.MMPM_MAX_BUILD_WORKERS.get.return_value = args.build_workers
+        env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+        timings = {}
+
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}), patch("mmpm.magicmirror.pipeline.MMPMEnv", return_value=env):
+            for name, install in (("sequential", install_sequentially), ("pipeline", install_concurrently)):
+                root = Path(tmp_dir) / name / "MagicMirror"
+                (root / "modules").mkdir(parents=True)
+                env.MMPM_MAGICMIRROR_ROOT.get.return_value = root
+
+                packages = []
+
+                for repository in repositories:
+                    package = MagicMirrorPackage(title=Path(repository).name, repository=repository, directory=Path(repository).name)
+                    package.env = env
+                    packages.append(package)
+
+                start = time.monotonic()
+                assert install(packages), f"every package must be installed by the {name} approach"
+                timings[name] = time.monotonic() - start
+
+    print(f"Modules: {args.modules} (clone latency {args.latency}s, build {args.build}s)")
+    print(f"Workers: {args.workers} clone, {args.build_workers} build")
+    print(f"{'sequential':<12} {timings['sequential']:.2f}s  (1.00x)")
+    print(f"{'pipeline':<12} {timings['pipeline']:.2f}s  ({timings['sequential'] / timings['pipeline']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
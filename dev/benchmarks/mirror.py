@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmarks removing the packages of a MagicMirror and installing them again with the InstallationPipeline, with
+and without repository mirrors (MMPM_REPOSITORY_MIRRORS).
+
+The packages are local Git repositories with some history, so the benchmark never touches the network. 'git' is
+replaced on the PATH by a stand-in which counts every command that reaches a remote, and sleeps for --latency
+seconds before it. Commands redirected to a mirror (see RepositoryMirror.redirect) never reach the remote.
+
+Usage:
+    python dev/benchmarks/mirror.py [--modules 15] [--latency 1.0] [--commits 20]
+"""
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List, Tuple
+from unittest.mock import MagicMock, patch
+
+from helpers import create_repositories
+
+from mmpm.constants import paths
+from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.pipeline import InstallationPipeline
+
+GIT_STAND_IN = """#!/bin/sh
+case "$*" in
+    *insteadOf*) ;;
+    *{remotes}*) echo "$*" >> {log}; sleep {latency} ;;
+esac
+exec {git} "$@"
+"""
+
+
+def write_source(repository: Path) -> None:
+    """
+    Writes 16 KiB of new source, so each commit adds to the history fetched from the remote.
+    """
+    (repository / f"{repository.name}.js").write_bytes(os.urandom(16 * 1024))
+
+
+def reinstall(repositories: List[str], env: MagicMock, log: Path) -> Tuple[float, int]:
+    """
+    Installs every package, removes them all, and installs them again, reporting how long the second install
+    took and how many of its git commands reached a remote.
+    """
+    modules_dir = env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+    modules_dir.mkdir(parents=True)
+
+    packages = []
+
+    for repository in repositories:
+        package = MagicMirrorPackage(title=Path(repository).name, repository=repository, directory=Path(repository).name)
+        package.env = env
+        packages.append(package)
+
+    assert all([success for _, success in InstallationPipeline(packages).run()]), "every package must be installed"
+    assert all([package.remove() for package in packages]), "every package must be removed"
+
+    log.write_text("", encoding="utf-8")
+    start = time.monotonic()
+    assert all([success for _, success in InstallationPipeline(packages).run()]), "every package must be installed again"
+    return time.monotonic() - start, len(log.read_text(encoding="utf-8").splitlines())
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark reinstalling packages through repository mirrors")
+    cli.add_argument("--modules", type=int, default=15, help="number of packages to reinstall")
+    cli.add_argument("--latency", type=float, default=1.0, help="seconds each command reaching a remote waits before starting")
+    cli.add_argument("--commits", type=int, default=20, help="number of commits in the history of each package")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        remotes_dir = Path(tmp_dir) / "remotes"
+        repositories = [remote.as_uri() for remote in create_repositories(remotes_dir, args.modules, write_source, args.commits)]
+
+        bin_dir = Path(tmp_dir) / "bin"
+        bin_dir.mkdir()
+        log = Path(tmp_dir) / "network.log"
+        (bin_dir / "git").write_text(GIT_STAND_IN.format(remotes=remotes_dir, log=log, latency=args.latency, git=shutil.which("git")), encoding="utf-8")
+        (bin_dir / "git").chmod(0o755)
+
+        env = MagicMock()
+        env.MMPM_MAX_WORKERS.get.return_value = 8
+        env.MMPM_MAX_BUILD_WORKERS.get.return_value = 2
+        env.MMPM_CLONE_STRATEGY.get.return_value = "full"
+        env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+
+        results = {}
+
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}), patch("mmpm.magicmirror.pipeline.MMPMEnv", return_value=env):
+            with patch.object(paths, "MMPM_MIRRORS_DIR", Path(tmp_dir) / "mirrors"):
+                for name, mirrors in (("remote", False), ("mirrors", True)):
+                    env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(tmp_dir) / name / "MagicMirror"
+                    env.MMPM_REPOSITORY_MIRRORS.get.return_value = mirrors
+                    results[name] = reinstall(repositories, env, log)
+
+    print(f"Modules: {args.modules} ({args.commits} commits each, network latency {args.latency}s)")
+
+    for name, (seconds, operations) in results.items():
+        print(f"{name:<12} {seconds:.2f}s  ({results['remote'][0] / seconds:.2f}x, {operations} network operations)")
+
+
+if __name__ == "__main__":
+    main()
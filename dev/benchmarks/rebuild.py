@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmarks installing the dependencies of packages after an upgrade which only changed their source, with
+and without build stamps.
+
+Each package is a Git repository with a package.json and package-lock.json. 'node' and 'npm' are replaced on
+the PATH by stand-ins, where 'npm ci' sleeps for --install seconds and creates node_modules, so the benchmark
+never touches the network. The 'unstamped' result removes the build stamps before building, which reproduces
+the original behaviour of installing the dependencies every time.
+
+Usage:
+    python dev/benchmarks/rebuild.py [--modules 30] [--install 1.0]
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from mmpm.magicmirror.package import BUILD_STAMP_FILE, InstallationHandler, MagicMirrorPackage
+
+NPM_STAND_IN = """#!/bin/sh
+if [ "$1" = "--version" ]; then echo 10.0.0; exit 0; fi
+sleep {install}
+mkdir -p node_modules
+"""
+
+NODE_STAND_IN = """#!/bin/sh
+echo v20.0.0
+"""
+
+
+def create_packages(modules_dir: Path, count: int) -> List[MagicMirrorPackage]:
+    """
+    Creates the given number of fake packages, each with a package.json and package-lock.json.
+    """
+    packages = []
+
+    for index in range(count):
+        directory = modules_dir / f"MMM-Module-{index}"
+        (directory / ".git").mkdir(parents=True)
+        (directory / "package.json").write_text('{"dependencies": {"left-pad": "1.3.0"}}', encoding="utf-8")
+        (directory / "package-lock.json").write_text('{"lockfileVersion": 3}', encoding="utf-8")
+
+        package = MagicMirrorPackage(title=directory.name, repository=f"https://github.com/test/{directory.name}", directory=directory.name)
+        package.env = MagicMock()
+        package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = modules_dir.parent
+        package.env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        package.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        packages.append(package)
+
+    return packages
+
+
+def build(packages: List[MagicMirrorPackage], stamped: bool) -> float:
+    """
+    Simulates an upgrade which changed the source of every package, and installs their dependencies.
+    """
+    start = time.monotonic()
+
+    for package in packages:
+        handler = InstallationHandler(package, progress=False)
+        handler.clone()  # resolves the directory of the package, which already exists
+        (package.directory / f"{package.title}.js").write_text(f"// {time.monotonic()}", encoding="utf-8")
+
+        if not stamped:
+            (package.directory / ".git" / BUILD_STAMP_FILE).unlink(missing_ok=True)
+
+        assert handler.build(), f"the dependencies of {package.title} must be installed"
+
+    return time.monotonic() - start
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark installing dependencies after an upgrade")
+    cli.add_argument("--modules", type=int, default=30, help="number of packages to upgrade")
+    cli.add_argument("--install", type=float, default=1.0, help="seconds each 'npm ci' takes")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bin_dir = Path(tmp_dir) / "bin"
+        bin_dir.mkdir()
+
+        for name, script in (("npm", NPM_STAND_IN.format(install=args.install)), ("node", NODE_STAND_IN)):
+            (bin_dir / name).write_text(script, encoding="utf-8")
+            (bin_dir / name).chmod(0o755)
+
+        packages = create_packages(Path(tmp_dir) / "MagicMirror" / "modules", args.modules)
+
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}):
+            build(packages, stamped=True)  # the initial install, which writes the build stamps
+            unstamped = build(packages, stamped=False)
+            stamped = build(packages, stamped=True)
+
+    print(f"Modules: {args.modules} ('npm ci' takes {args.install}s)")
+    print(f"{'unstamped':<12} {unstamped:.2f}s  (1.00x)")
+    print(f"{'stamped':<12} {stamped:.2f}s  ({unstamped / stamped:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the cold start of each MMPM subcommand, and of creating the API's WSGI app, so startup regressions
+are caught before a release.
+
+Every case runs in a fresh interpreter with 'python -X importtime', against a temporary HOME holding local
+stand-ins: a database parsed from the saved wiki page in test/fixtures, and a MagicMirror modules directory
+with a few installed packages. The benchmark runs offline. An audit hook blocks every connection that doesn't
+go to localhost, and records it alongside any processes spawned. Each case is run once to warm the stand-ins
+(ie. to build the catalog), then timed for the given number of rounds.
+
+For each case, the results include:
+    - the wall time of the whole process, and the time spent within it from the first MMPM import to exit
+    - the total import time, the top level imports, and the packages (ie. 'git', 'bs4') that dominate it
+    - the blocked connections and spawned processes
+
+The results can be saved as JSON, and compared against previously saved results, in which case the script
+exits with a non-zero status when a case became slower than the tolerance allows, or exceeded its budget.
+
+Usage:
+    python dev/benchmarks/startup.py [--rounds 5] [--cases version list-all] [--output results.json]
+                                     [--compare baseline.json] [--tolerance 0.25]
+"""
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mmpm.__version__ import version
+from mmpm.magicmirror.database import MagicMirrorDatabase
+
+FIXTURE = Path(__file__).resolve().parents[2] / "test" / "fixtures" / "3rd-party-modules.html"
+
+# the number of packages from the fixture made to look installed
+INSTALLED = 5
+
+# the arguments given to 'mmpm' for each case, or None for the cases with their own code (see CODE)
+CASES: Dict[str, Optional[List[str]]] = {
+    "import": None,
+    "help": ["--help"],
+    "version": ["version"],
+    "env": ["env"],
+    "list-all": ["list", "--all"],
+    "list-installed": ["list", "--installed"],
+    "list-titles": ["list", "--all", "--title-only"],
+    "search": ["search", "clock"],
+    "show": ["show", "{title}"],
+    "db-info": ["db", "--info"],
+    "completion": ["completion", "--shell", "bash"],
+    "ui-url": ["ui", "--url"],
+    "wsgi": None,
+}
+
+# the code run by the cases that don't run a subcommand
+CODE: Dict[str, str] = {
+    "import": "import mmpm.entrypoint",
+    "wsgi": "from mmpm.wsgi import app",
+}
+
+# the maximum number of seconds a case may spend from its first MMPM import to exit
+BUDGETS: Dict[str, float] = {
+    "import": 0.15,
+    "help": 0.15,
+    "version": 0.35,
+}
+
+# runs within the fresh interpreter. The results are printed to stderr after a marker, since the case itself may
+# print anything to stdout, and -X importtime writes to stderr as well
+PROBE = """
+import json, os, sys, time
+
+blocked, processes = [], []
+
+def audit(event, args):
+    if event == "socket.connect" and isinstance(args[1], tuple) and args[1][0] not in ("127.0.0.1", "::1", "localhost"):
+        blocked.append(repr(args[1]))
+        raise ConnectionRefusedError(f"blocked by the startup benchmark: {args[1]}")
+    if event == "subprocess.Popen":
+        processes.append(" ".join(str(arg) for arg in args[1]))
+
+sys.addaudithook(audit)
+start = time.perf_counter()
+
+try:
+    CASE
+finally:
+    results = {"seconds": time.perf_counter() - start, "blocked": blocked, "processes": processes}
+    sys.stderr.write("\\nMMPM-BENCHMARK " + json.dumps(results) + "\\n")
+    sys.stderr.flush()
+"""
+
+RUN_MAIN = "sys.argv = ['mmpm', *ARGV]; from mmpm.entrypoint import main; main()"
+
+# a line of '-X importtime' output, ie. 'import time:       618 |      38567 |       bs4.builder._lxml'
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def create_stand_ins(home: Path) -> str:
+    """
+    Fills the temporary HOME with the database, and a MagicMirror installation with a few packages installed.
+
+    Parameters:
+        home (Path): The temporary HOME directory.
+
+    Returns:
+        str: The title of an installed package, used by the cases that need one.
+    """
+
+    config_dir = home / ".config" / "mmpm"
+    modules_dir = home / "MagicMirror" / "modules"
+    config_dir.mkdir(parents=True)
+    modules_dir.mkdir(parents=True)
+
+    packages = MagicMirrorDatabase().__parse_packages__(FIXTURE.read_text(encoding="utf-8"), parser="html.parser")
+
+    (config_dir / "MagicMirror-3rd-party-packages-db.json").write_text(json.dumps([package.serialize() for package in packages]), encoding="utf-8")
+
+    # a recent update, so the database isn't refreshed
+    last_update = {"last_update": str(datetime.datetime.now().replace(microsecond=0)), "etag": "", "last_modified": ""}
+    (config_dir / "MagicMirror-3rd-party-packages-db-last-update.json").write_text(json.dumps(last_update), encoding="utf-8")
+
+    env = {"MMPM_MAGICMIRROR_ROOT": str(home / "MagicMirror"), "MMPM_MAGICMIRROR_URI": "http://localhost:8080"}
+    (config_dir / "mmpm-env.json").write_text(json.dumps(env), encoding="utf-8")
+
+    for package in packages[:INSTALLED]:
+        package_dir = modules_dir / package.directory.name
+        subprocess.run(["git", "init", "-q", str(package_dir)], check=True)
+        subprocess.run(["git", "-C", str(package_dir), "remote", "add", "origin", package.repository], check=True)
+
+    return packages[0].title
+
+
+def parse_import_times(stderr: str, top: int = 10) -> Dict[str, Any]:
+    """
+    Summarizes the '-X importtime' output of a run.
+
+    Parameters:
+        stderr (str): The stderr of the run.
+        top (int): The number of entries kept for each summary.
+
+    Returns:
+        Dict[str, Any]: The total import time and number of modules imported, the slowest top level imports,
+        and the packages (by the first component of the module name) that the time was spent within.
+    """
+
+    top_level: List[Dict[str, Any]] = []
+    packages: Dict[str, int] = defaultdict(int)
+    total = modules = 0
+
+    for line in stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+
+        if not match:
+            continue
+
+        self_us, cumulative_us, indent, module = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        modules += 1
+        packages[module.split(".")[0]] += self_us
+
+        if len(indent) == 1:
+            total += cumulative_us
+            top_level.append({"module": module, "seconds": cumulative_us / 1e6})
+
+    return {
+        "import_seconds": total / 1e6,
+        "modules": modules,
+        "top_level_imports": sorted(top_level, key=lambda entry: -entry["seconds"])[:top],
+        "packages": [{"package": package, "seconds": seconds / 1e6} for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]],
+    }
+
+
+def run_case(name: str, argv: Optional[List[str]], home: Path, title: str) -> Dict[str, Any]:
+    """
+    Runs a case once in a fresh interpreter.
+
+    Parameters:
+        name (str): The name of the case.
+        argv (Optional[List[str]]): The arguments given to 'mmpm', or None if the case has its own code.
+        home (Path): The temporary HOME holding the stand-ins.
+        title (str): The title of an installed package.
+
+    Returns:
+        Dict[str, Any]: The measurements of the run.
+    """
+
+    if argv is None:
+        case = CODE[name]
+    else:
+        case = RUN_MAIN.replace("ARGV", repr([arg.format(title=title) for arg in argv]))
+
+    code = PROBE.replace("CASE", case)
+    env = {**os.environ, "HOME": str(home)}
+
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=False)
+    wall = time.perf_counter() - start
+
+    marker = next((line for line in reversed(output.stderr.splitlines()) if line.startswith("MMPM-BENCHMARK ")), None)
+
+    if marker is None:
+        raise RuntimeError(f"'{name}' failed with exit code {output.returncode}:\n{output.stderr[-2000:]}")
+
+    return {"wall": wall, **json.loads(marker[len("MMPM-BENCHMARK ") :]), **parse_import_times(output.stderr)}
+
+
+def benchmark(name: str, argv: Optional[List[str]], home: Path, title: str, rounds: int) -> Dict[str, Any]:
+    """
+    Warms up, and then times, a case.
+
+    Parameters:
+        name (str): The name of the case.
+        argv (Optional[List[str]]): The arguments given to 'mmpm', or None if the case has its own code.
+        home (Path): The temporary HOME holding the stand-ins.
+        title (str): The title of an installed package.
+        rounds (int): The number of timed runs.
+
+    Returns:
+        Dict[str, Any]: The results of the case.
+    """
+
+    run_case(name, argv, home, title)
+    runs = [run_case(name, argv, home, title) for _ in range(rounds)]
+    fastest = min(runs, key=lambda run: run["seconds"])
+
+    return {
+        "argv": argv,
+        "wall_seconds": min(run["wall"] for run in runs),
+        "wall_seconds_median": statistics.median(run["wall"] for run in runs),
+        "seconds": fastest["seconds"],
+        "seconds_median": statistics.median(run["seconds"] for run in runs),
+        "budget_seconds": BUDGETS.get(name),
+        "import_seconds": fastest["import_seconds"],
+        "modules": fastest["modules"],
+        "top_level_imports": fastest["top_level_imports"],
+        "packages": fastest["packages"],
+        "blocked_connections": sorted({connection for run in runs for connection in run["blocked"]}),
+        "processes": sorted({process for run in runs for process in run["processes"]}),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Finds the cases that became slower than the baseline allows. Small absolute differences are ignored,
+    since they're within the noise of starting a process.
+
+    Parameters:
+        results (Dict[str, Any]): The current results.
+        baseline (Dict[str, Any]): The saved results compared against.
+        tolerance (float): The fraction a case may slow down by, ie. 0.25 for 25%.
+
+    Returns:
+        List[str]: A description of each regression.
+    """
+
+    regressions: List[str] = []
+
+    for name, case in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+
+        if previous is None:
+            continue
+
+        allowed = previous["seconds"] * (1 + tolerance) + 0.01
+
+        if case["seconds"] > allowed:
+            regressions.append(f"{name}: {previous['seconds']:.4f}s -> {case['seconds']:.4f}s (allowed {allowed:.4f}s)")
+
+    return regressions
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark the cold start of the MMPM subcommands and API")
+    cli.add_argument("--rounds", type=int, default=5, help="number of timed runs of each case")
+    cli.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="the cases to run (default: all)")
+    cli.add_argument("--output", type=Path, help="save the results as JSON to this file")
+    cli.add_argument("--compare", type=Path, help="compare the results against previously saved results")
+    cli.add_argument("--tolerance", type=float, default=0.25, help="fraction a case may slow down by when comparing (default: 0.25)")
+    args = cli.parse_args()
+
+    results: Dict[str, Any] = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": args.rounds,
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        home = Path(tmp_dir)
+        title = create_stand_ins(home)
+
+        for name in args.cases:
+            case = results["cases"][name] = benchmark(name, CASES[name], home, title, args.rounds)
+            heaviest = ", ".join(f"{entry['package']} {entry['seconds'] * 1000:.0f}ms" for entry in case["packages"][:4])
+
+            print(f"{name:<16} {case['seconds']:.4f}s  (wall {case['wall_seconds']:.4f}s, imports {case['import_seconds']:.4f}s: {heaviest})")
+
+            for connection in case["blocked_connections"]:
+                print(f"{'':<16} blocked connection to {connection}")
+
+    failures: List[str] = []
+
+    for name, case in results["cases"].items():
+        if case["budget_seconds"] is not None and case["seconds"] > case["budget_seconds"]:
+            failures.append(f"{name}: {case['seconds']:.4f}s exceeds its budget of {case['budget_seconds']:.2f}s")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        failures.extend(compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance))
+
+    if failures:
+        sys.exit("\n".join(["", "Startup regressions:", *failures]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the disk usage of the Node dependencies of packages, with each package keeping its own copy of
+node_modules (the default) and with the files linked to the shared dependency store (MMPM_DEPENDENCY_STORE).
+
+Each package is given a node_modules made of a random selection of fake dependencies, which are shared by
+several packages, like axios, moment, and node-fetch are in practice. Running 'npm' itself would need the
+network, so only the time taken to link each package to the store is measured.
+
+Usage:
+    python dev/benchmarks/store.py [--modules 30] [--dependencies 12] [--per-module 6] [--files 200]
+"""
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+
+from mmpm.magicmirror.store import DependencyStore
+from mmpm.utils import human_readable_size
+
+
+def disk_usage(directories: List[Path]) -> int:
+    """
+    The number of bytes used by the files within the directories, where hard linked files are counted once.
+    """
+    inodes = {}
+
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                info = os.lstat(Path(root) / name)
+                inodes[(info.st_dev, info.st_ino)] = info.st_blocks * 512
+
+    return sum(inodes.values())
+
+
+def create_dependency(dependencies_dir: Path, index: int, files: int) -> Path:
+    dependency = dependencies_dir / f"dependency-{index}"
+    (dependency / "lib").mkdir(parents=True)
+
+    for number in range(files):
+        (dependency / "lib" / f"{number}.js").write_bytes(os.urandom(random.randint(512, 8192)))
+
+    return dependency
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark the shared dependency store")
+    cli.add_argument("--modules", type=int, default=30, help="number of packages")
+    cli.add_argument("--dependencies", type=int, default=12, help="number of distinct dependencies")
+    cli.add_argument("--per-module", type=int, default=6, help="number of dependencies used by each package")
+    cli.add_argument("--files", type=int, default=200, help="number of files within each dependency")
+    args = cli.parse_args()
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        dependencies = [create_dependency(root / "dependencies", index, args.files) for index in range(args.dependencies)]
+        node_modules: List[Path] = []
+
+        for index in range(args.modules):
+            directory = root / "modules" / f"MMM-Module-{index}" / "node_modules"
+
+            for dependency in random.sample(dependencies, args.per_module):
+                for file in (dependency / "lib").iterdir():
+                    target = directory / dependency.name / "lib" / file.name
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_bytes(file.read_bytes())
+
+            node_modules.append(directory)
+
+        before = disk_usage(node_modules)
+        store = DependencyStore(root / "store")
+        timings = []
+
+        for directory in node_modules:
+            start = time.monotonic()
+            store.link(directory)
+            timings.append(time.monotonic() - start)
+
+        after = disk_usage(node_modules)
+
+    print(f"Modules: {args.modules}, each using {args.per_module} of {args.dependencies} dependencies ({args.files} files each)")
+    print(f"{'copies':<8} {human_readable_size(before):>10}  ({human_readable_size(before / args.modules)} per module)")
+    print(f"{'store':<8} {human_readable_size(after):>10}  ({human_readable_size(after / args.modules)} per module, {before / after:.2f}x smaller)")
+    print(f"Linking took {sum(timings):.2f}s ({sum(timings) / len(timings):.3f}s per module)")
+
+
+if __name__ == "__main__":
+    main()
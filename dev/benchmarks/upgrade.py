@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmarks upgrading the packages of a MagicMirror, one at a time (the original approach) and with the
+UpgradePipeline, which fetches concurrently, then fast-forwards in order while building with a separate,
+smaller pool of workers.
+
+The packages are local Git repositories with a Makefile, so the benchmark never touches the network. To keep
+the comparison representative of fetching from GitHub, 'git' is replaced on the PATH by a stand-in which sleeps
+for --latency seconds before fetching, and each Makefile sleeps for --build seconds.
+
+Usage:
+    python dev/benchmarks/upgrade.py [--modules 15] [--latency 1.0] [--build 0.5] [--workers 8] [--build-workers 2]
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.pipeline import FAILED, UpgradePipeline
+
+GIT_STAND_IN = """#!/bin/sh
+if [ "$1" = "fetch" ] || [ "$1" = "pull" ]; then sleep {latency}; fi
+exec {git} "$@"
+"""
+
+
+def git(repository: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repository), "-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost", *args], check=True)
+
+
+def create_packages(tmp_dir: Path, name: str, count: int, build: float) -> List[MagicMirrorPackage]:
+    """
+    Creates the given number of fake packages, installed within their own MagicMirror, each with a new commit
+    in its remote repository.
+    """
+    packages = []
+    env = MagicMock()
+    env.MMPM_MAGICMIRROR_ROOT.get.return_value = tmp_dir / name / "MagicMirror"
+    env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+    env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+    for index in range(count):
+        remote = tmp_dir / name / "remotes" / f"MMM-Module-{index}"
+        remote.mkdir(parents=True)
+        (remote / "Makefile").write_text(f"all:\n\tsleep {build}\n", encoding="utf-8")
+        subprocess.run(["git", "init", "-q", str(remote)], check=True)
+        git(remote, "add", "-A")
+        git(remote, "commit", "-q", "-m", "initial")
+
+        subprocess.run(["git", "clone", "-q", str(remote), str(tmp_dir / name / "MagicMirror" / "modules" / remote.name)], check=True)
+
+        (remote / "MMM-Module.js").write_text(str(index), encoding="utf-8")
+        git(remote, "add", "-A")
+        git(remote, "commit", "-q", "-m", "feature")
+
+        package = MagicMirrorPackage(title=remote.name, repository=str(remote), directory=remote.name)
+        package.env = env
+        packages.append(package)
+
+    return packages
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark upgrading packages")
+    cli.add_argument("--modules", type=int, default=15, help="number of packages to upgrade")
+    cli.add_argument("--latency", type=float, default=1.0, help="seconds each fetch waits before starting, in place of network latency")
+    cli.add_argument("--build", type=float, default=0.5, help="seconds each package takes to build")
+    cli.add_argument("--workers", type=int, default=8, help="value of MMPM_MAX_WORKERS")
+    cli.add_argument("--build-workers", type=int, default=2, help="value of MMPM_MAX_BUILD_WORKERS")
+    args = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sequential_packages = create_packages(Path(tmp_dir), "sequential", args.modules, args.build)
+        pipeline_packages = create_packages(Path(tmp_dir), "pipeline", args.modules, args.build)
+
+        bin_dir = Path(tmp_dir) / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "git").write_text(GIT_STAND_IN.format(latency=args.latency, git=shutil.which("git")), encoding="utf-8")
+        (bin_dir / "git").chmod(0o755)
+
+        env = MagicMock()
+        env.MMPM_MAX_WORKERS.get.return_value = args.workers
+        env.MMPM_MAX_BUILD_WORKERS.get.return_value = args.build_workers
+
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}), patch("mmpm.magicmirror.pipeline.MMPMEnv", return_value=env):
+            start = time.monotonic()
+            assert all([package.upgrade() for package in sequential_packages]), "every package must be upgraded sequentially"
+            sequential = time.monotonic() - start
+
+            start = time.monotonic()
+            assert all(outcome != FAILED for _, outcome in UpgradePipeline(pipeline_packages).run()), "every package must be upgraded by the pipeline"
+            pipeline = time.monotonic() - start
+
+    print(f"Modules: {args.modules} (fetch latency {args.latency}s, build {args.build}s)")
+    print(f"Workers: {args.workers} fetch, {args.build_workers} build")
+    print(f"{'sequential':<12} {sequential:.2f}s  (1.00x)")
+    print(f"{'pipeline':<12} {pipeline:.2f}s  ({sequential / pipeline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
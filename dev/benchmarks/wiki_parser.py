@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmarks parsing the MagicMirror 3rd Party Wiki with each of the available parser backends.
+
+The saved wiki page in test/fixtures is scaled up to a realistic number of packages by repeating its table
+rows, so the benchmark runs offline. The 'full page' result builds a BeautifulSoup tree of the entire page
+(the original approach), the 'markdown-body only' result only builds a tree of the 'markdown-body' element,
+and the 'lxml' result (when lxml is installed) extracts the packages without BeautifulSoup at all.
+
+Usage:
+    python dev/benchmarks/wiki_parser.py [--packages 1500] [--rounds 5]
+"""
+import re
+import timeit
+from argparse import ArgumentParser
+from importlib.util import find_spec
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.magicmirror.database import MagicMirrorDatabase
+
+FIXTURE = Path(__file__).resolve().parents[2] / "test" / "fixtures" / "3rd-party-modules.html"
+
+
+def scale(html: str, packages: int) -> str:
+    """
+    Repeats the rows of each table in the fixture until the page contains roughly the requested number of packages.
+    """
+    rows = re.findall(r"\s*<tr><td>.*?</tr>", html)
+    tables = html.count("<tbody>")
+    repeat = max(1, packages // max(1, len(rows)))
+
+    return re.sub(r"(<tbody>)(.*?)(\s*</tbody>)", lambda match: match.group(1) + match.group(2) * repeat + match.group(3), html, count=tables, flags=re.S)
+
+
+def time_parse(database: MagicMirrorDatabase, html: str, parser: str, rounds: int, full_page: bool = False) -> float:
+    """
+    Returns the best time of parsing the page and extracting the packages with the given parser backend.
+    """
+    if not full_page:
+        return min(timeit.repeat(lambda: database.__parse_packages__(html, parser=parser), number=1, repeat=rounds))
+
+    # without a strainer, BeautifulSoup builds a tree of the entire page
+    with patch("mmpm.magicmirror.database.SoupStrainer", lambda *args, **kwargs: None):
+        return min(timeit.repeat(lambda: database.__parse_packages__(html, parser=parser), number=1, repeat=rounds))
+
+
+def main():
+    cli = ArgumentParser(description="Benchmark parsing of the MagicMirror 3rd Party Wiki")
+    cli.add_argument("--packages", type=int, default=1500, help="approximate number of packages in the scaled page")
+    cli.add_argument("--rounds", type=int, default=5, help="number of times each parser is timed")
+    args = cli.parse_args()
+
+    html = scale(FIXTURE.read_text(encoding="utf-8"), args.packages)
+    database = MagicMirrorDatabase()
+    cases = [("html.parser (full page)", "html.parser", True), ("html.parser (markdown-body only)", "html.parser", False)]
+
+    if find_spec("lxml"):
+        cases.append(("lxml", "lxml", False))
+
+    print(f"Page size: {len(html) / 1024:.0f} KiB, packages: {len(database.__parse_packages__(html))}")
+
+    baseline = None
+
+    for label, parser, full_page in cases:
+        elapsed = time_parse(database, html, parser, args.rounds, full_page)
+        baseline = baseline or elapsed
+        print(f"{label:<34} {elapsed:.3f}s  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
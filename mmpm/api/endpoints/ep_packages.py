@@ -1,15 +1,70 @@
 #!/usr/bin/env python3
+from typing import Any, Dict, cast
+
 from flask import Blueprint, Response, request
 
 from mmpm.api.constants import http
 from mmpm.api.endpoints.endpoint import Endpoint
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.catalog import FIELDS as PACKAGE_FIELDS
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
 from mmpm.magicmirror.package import MagicMirrorPackage, RemotePackage
+from mmpm.magicmirror.pipeline import FAILED, InstallationPipeline, UpgradePipeline
 
 logger = MMPMLogFactory.get_logger(__name__)
 
+BOOLEANS: Dict[str, bool] = {"true": True, "1": True, "false": False, "0": False}
+
+
+def parse_filters(args: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Parses the query parameters used to page through, filter, and project the packages retrieved
+    from GET /api/packages, ie. /api/packages?category=Weather&installed=true&fields=title,repository&limit=20
+
+    Parameters:
+        args (Dict[str, str]): The query parameters of the request.
+
+    Returns:
+        Dict[str, Any]: The keyword arguments for MagicMirrorDatabase.serialized.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+
+    filters: Dict[str, Any] = {}
+
+    for name in ("offset", "limit"):
+        if name in args:
+            if not args[name].isdigit():
+                raise ValueError(f"'{name}' must be a non-negative integer")
+
+            filters[name] = int(args[name])
+
+    for name in ("installed", "upgradable"):
+        if name in args:
+            if args[name].lower() not in BOOLEANS:
+                raise ValueError(f"'{name}' must be one of {', '.join(BOOLEANS)}")
+
+            filters[name] = BOOLEANS[args[name].lower()]
+
+    if "category" in args:
+        filters["category"] = args["category"]
+
+    if args.get("q"):
+        filters["query"] = args["q"]
+
+    if args.get("fields"):
+        fields = [field.strip() for field in args["fields"].split(",") if field.strip()]
+        unknown = [field for field in fields if field not in PACKAGE_FIELDS]
+
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Fields must be one of {', '.join(PACKAGE_FIELDS)}")
+
+        filters["fields"] = fields
+
+    return filters
+
 
 class Packages(Endpoint):
     """
@@ -25,41 +80,53 @@ class Packages(Endpoint):
         @self.blueprint.route("/", methods=[http.GET])
         def retrieve() -> Response:
             """
-            A Flask route method for retrieving a list of all MagicMirror packages.
+            A Flask route method for retrieving a list of the MagicMirror packages. The packages may be paged
+            through (offset, limit), filtered (category, installed, upgradable, q), and projected (fields) using
+            query parameters (see `parse_filters`). The total number of matching packages is returned in the
+            X-Total-Count header, and a 304 is returned if the packages match the If-None-Match header.
 
             Parameters:
                 None
 
             Returns:
-                Response: A Flask Response object containing a list of all packages or an error message.
+                Response: A Flask Response object containing a list of the packages or an error message.
             """
 
+            try:
+                filters = parse_filters(request.args)
+            except ValueError as error:
+                return self.failure(str(error), code=400)
+
             logger.info("Loading database")
-            self.db.load()
 
-            if not self.db.packages:
+            # a single query of the package catalog, which includes the install and upgrade state of each package
+            result = self.db.serialized(**filters)
+
+            if result is None:
                 message = "Failed to load database"
                 logger.error(message)
                 return self.failure(message)
 
+            total, packages = result
+
             logger.info("Sending back current packages")
 
-            # this section here is very inefficient, but honestly, there's not much of a way around
-            # it if we want the user to have information about the status of the packages on the web app
-            # also, the data isn't THAT large, so it's fine, but it's definitely kinda gross
-            upgradable = [MagicMirrorPackage(**pkg) for pkg in self.db.upgradable()["packages"]]
-            pkgs = self.db.packages
+            response = self.success(packages)
+            response.headers["X-Total-Count"] = str(total)
 
-            for pkg in pkgs:
-                if pkg in upgradable:
-                    pkg.is_upgradable = True
+            # the ETag is a hash of the response, so unchanged packages aren't sent again, and the browser
+            # is told to always check if its cached copy is still current
+            response.cache_control.no_cache = True
+            response.add_etag()
 
-            return self.success([package.serialize(full=True) for package in pkgs])
+            # make_conditional returns the response itself, but is typed as returning a werkzeug Response
+            return cast(Response, response.make_conditional(request))
 
         @self.blueprint.route("/install", methods=[http.POST])
         def install() -> Response:
             """
-            A Flask route method for installing selected MagicMirror packages.
+            A Flask route method for installing selected MagicMirror packages. The packages are cloned
+            and built concurrently (see `InstallationPipeline`).
 
             Parameters:
                 None
@@ -72,10 +139,10 @@ class Packages(Endpoint):
             success = []
             failure = []
 
-            for package in packages:
-                pkg = MagicMirrorPackage(**package)
+            pipeline = InstallationPipeline([MagicMirrorPackage(**package) for package in packages])
 
-                if pkg.install():
+            for package, (pkg, installed) in zip(packages, pipeline.run()):
+                if installed:
                     logger.debug(f"Installed {pkg.title}")
                     success.append(package)
                 else:
@@ -116,7 +183,8 @@ class Packages(Endpoint):
         @self.blueprint.route("/upgrade", methods=[http.POST])
         def upgrade() -> Response:
             """
-            A Flask route method for upgrading selected MagicMirror packages.
+            A Flask route method for upgrading selected MagicMirror packages. The changes of the packages
+            are fetched concurrently, before each package is fast-forwarded and built (see `UpgradePipeline`).
 
             Parameters:
                 None
@@ -129,10 +197,10 @@ class Packages(Endpoint):
             success = []
             failure = []
 
-            for package in packages:
-                pkg = MagicMirrorPackage(**package)
+            pipeline = UpgradePipeline([MagicMirrorPackage(**package) for package in packages])
 
-                if pkg.upgrade():
+            for package, (pkg, outcome) in zip(packages, pipeline.run()):
+                if outcome != FAILED:
                     logger.debug(f"Upgraded {pkg.title}")
                     success.append(package)
                 else:
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+A fast path for shell completion. Tab completion runs the CLI once per key press, so rather than importing and
+registering every subcommand (see mmpm.entrypoint), completions are answered from a cached table of the
+subcommands, their options, and the package titles, which only needs argparse and argcomplete.
+
+The table is rebuilt from the real parsers whenever the version of MMPM changes, and the package titles
+whenever the database, catalog, or MagicMirror modules directory change.
+"""
+import json
+import os
+import sys
+from argparse import ArgumentParser, _SubParsersAction
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+from mmpm.__version__ import version
+from mmpm.constants import paths
+from mmpm.env import MMPMEnv
+
+# the subcommands which accept package titles, and which packages are offered for each
+PACKAGE_COMPLETIONS: Dict[str, str] = {"install": "available", "remove": "installed", "show": "all"}
+
+
+def describe(parser: ArgumentParser) -> Dict[str, Any]:
+    """
+    Describes the options, positional arguments, and subcommands of a parser, so it can be cached as JSON.
+
+    Parameters:
+        parser (ArgumentParser): The parser to describe.
+
+    Returns:
+        Dict[str, Any]: The description of the parser.
+    """
+
+    description: Dict[str, Any] = {"options": [], "positionals": [], "subcommands": {}}
+
+    for action in parser._actions:  # pylint: disable=protected-access
+        if isinstance(action, _SubParsersAction):
+            helps = {choice.dest: choice.help for choice in action._choices_actions}  # pylint: disable=protected-access
+
+            for name, subparser in action.choices.items():
+                description["subcommands"][name] = {"help": helps.get(name), **describe(subparser)}
+
+            continue
+
+        argument = {
+            "dest": action.dest,
+            "flags": list(action.option_strings),
+            "nargs": action.nargs,
+            "choices": list(action.choices) if action.choices is not None else None,
+            "help": action.help,
+        }
+
+        description["options" if action.option_strings else "positionals"].append(argument)
+
+    return description
+
+
+def build(parser: ArgumentParser, description: Dict[str, Any], titles: Dict[str, List[str]], name: str = "") -> ArgumentParser:
+    """
+    Rebuilds a parser, suitable for completion only, from its cached description. Package titles are offered
+    as completions for the subcommands in PACKAGE_COMPLETIONS.
+
+    Parameters:
+        parser (ArgumentParser): The empty parser to add the arguments to.
+        description (Dict[str, Any]): The description of the parser (see `describe`).
+        titles (Dict[str, List[str]]): The 'all', 'available', and 'installed' package titles.
+        name (str): The name of the subcommand the parser belongs to, if any.
+
+    Returns:
+        ArgumentParser: The parser.
+    """
+
+    for argument in description["options"]:
+        if argument["nargs"] == 0:
+            parser.add_argument(*argument["flags"], action="store_true", dest=argument["dest"], help=argument["help"])
+        else:
+            parser.add_argument(*argument["flags"], nargs=argument["nargs"], choices=argument["choices"], dest=argument["dest"], help=argument["help"])
+
+    for argument in description["positionals"]:
+        parser.add_argument(argument["dest"], nargs=argument["nargs"], choices=argument["choices"], help=argument["help"])
+
+    if name in PACKAGE_COMPLETIONS:
+        packages = titles.get(PACKAGE_COMPLETIONS[name], [])
+        action = parser.add_argument("packages", nargs="*")
+        action.completer = lambda **kwargs: packages  # type: ignore
+
+    if description["subcommands"]:
+        subparsers = parser.add_subparsers(dest=f"{name} subcommand".strip())
+
+        for subcommand, subdescription in description["subcommands"].items():
+            subparser = subparsers.add_parser(subcommand, help=subdescription["help"], add_help=False)
+            build(subparser, subdescription, titles, f"{name} {subcommand}".strip())
+
+    return parser
+
+
+class CompletionTable:
+    """
+    The cached description of the CLI's parsers and the package titles, used to answer shell completions
+    without loading the subcommands.
+
+    Attributes:
+        path (Path): The location of the cached table.
+        table (Dict[str, Any]): The contents of the table.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = path or paths.MMPM_COMPLETION_TABLE_FILE
+        self.table: Dict[str, Any] = {}
+
+        try:
+            self.table = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    def is_current(self) -> bool:
+        """
+        Determines if the parsers within the table were built by this version of MMPM.
+
+        Returns:
+            bool: True if the table can be used, False otherwise.
+        """
+
+        return isinstance(self.table, dict) and self.table.get("version") == version and "parser" in self.table
+
+    @staticmethod
+    def __packages_stamp__() -> List[int]:
+        """
+        Collects the modification times of the files the package titles are derived from.
+
+        Returns:
+            List[int]: The modification times (in nanoseconds), or 0 for files which don't exist.
+        """
+
+        catalog = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE
+        files = [
+            paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE,
+            catalog,
+            catalog.with_name(f"{catalog.name}-wal"),
+            MMPMEnv().MMPM_MAGICMIRROR_ROOT.get() / "modules",
+        ]
+
+        stamp: List[int] = []
+
+        for file in files:
+            try:
+                stamp.append(file.stat().st_mtime_ns)
+            except OSError:
+                stamp.append(0)
+
+        return stamp
+
+    def __write__(self) -> None:
+        """
+        Writes the table atomically, so concurrent completions never read a partial table.
+        """
+
+        tmp_file = self.path.with_suffix(".tmp")
+
+        try:
+            tmp_file.write_text(json.dumps(self.table), encoding="utf-8")
+            os.replace(tmp_file, self.path)
+        except OSError:
+            pass
+
+    def update(self, parser: ArgumentParser) -> None:
+        """
+        Replaces the parsers within the table with the description of the given (fully registered) parser.
+
+        Parameters:
+            parser (ArgumentParser): The top level parser of the CLI, with every subcommand registered.
+
+        Returns:
+            None
+        """
+
+        self.table = {"version": version, "parser": describe(parser), "stamp": None, "titles": {}}
+        self.__write__()
+
+    def titles(self) -> Dict[str, List[str]]:
+        """
+        Retrieves the package titles offered as completions, refreshing them when the database, catalog, or
+        MagicMirror modules directory have changed since they were cached.
+
+        Returns:
+            Dict[str, List[str]]: The 'all', 'available', and 'installed' package titles.
+        """
+
+        stamp = self.__packages_stamp__()
+
+        if self.table.get("stamp") == stamp:
+            return cast(Dict[str, List[str]], self.table.get("titles", {}))
+
+        titles: Dict[str, List[str]] = {"all": [], "available": [], "installed": []}
+        db_file = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE
+
+        # an empty database would be downloaded, and an expired one refreshed, which is far too slow for completion,
+        # so the titles are only read from a current catalog, and none are offered otherwise
+        if db_file.exists() and db_file.stat().st_size:
+            from mmpm.magicmirror.database import MagicMirrorDatabase  # pylint: disable=import-outside-toplevel
+
+            try:
+                # anything printed would end up in the user's terminal, rather than the completions
+                with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+                    packages = MagicMirrorDatabase().titles(catalog_only=True)
+            except Exception:
+                packages = []
+
+            titles["all"] = sorted({title for title, _ in packages})
+            titles["available"] = sorted({title for title, is_installed in packages if not is_installed})
+            titles["installed"] = sorted({title for title, is_installed in packages if is_installed})
+
+        self.table["stamp"] = self.__packages_stamp__()
+        self.table["titles"] = titles
+        self.__write__()
+
+        return titles
+
+    def parser(self, prog: str) -> Optional[ArgumentParser]:
+        """
+        Rebuilds the parser of the CLI from the table.
+
+        Parameters:
+            prog (str): The name of the program.
+
+        Returns:
+            Optional[ArgumentParser]: The parser, or None if the table isn't current.
+        """
+
+        if not self.is_current():
+            return None
+
+        return build(ArgumentParser(prog=prog, add_help=False), self.table["parser"], self.titles())
+
+
+def complete(prog: str, table: CompletionTable = None) -> bool:
+    """
+    Answers a shell completion request from the completion table. When answered, argcomplete exits the
+    process, so this only returns when the table can't be used (ie. after MMPM was upgraded), in which
+    case the caller should register every subcommand, update the table, and try again.
+
+    Parameters:
+        prog (str): The name of the program.
+        table (CompletionTable): The completion table, which is read from the default location if not provided.
+
+    Returns:
+        bool: False if the request couldn't be answered from the table.
+    """
+
+    if "_ARGCOMPLETE" not in os.environ:
+        return False
+
+    parser = (table or CompletionTable()).parser(prog)
+
+    if parser is None:
+        return False
+
+    import argcomplete  # pylint: disable=import-outside-toplevel
+
+    argcomplete.autocomplete(parser, exit_method=sys.exit)
+    return True
@@ -6,17 +6,27 @@ MMPM_CONFIG_DIR = HOME_DIR / ".config" / "mmpm"
 MMPM_LOG_DIR = MMPM_CONFIG_DIR / "log"
 MMPM_CLI_LOG_FILE = MMPM_LOG_DIR / "mmpm-cli.log"
 MMPM_ENV_FILE = MMPM_CONFIG_DIR / "mmpm-env.json"
+# the custom packages and available upgrades are kept in the catalog, and these are only read to import them into it
 MMPM_CUSTOM_PACKAGES_FILE = MMPM_CONFIG_DIR / "mmpm-custom-packages.json"
 MMPM_AVAILABLE_UPGRADES_FILE = MMPM_CONFIG_DIR / "mmpm-available-upgrades.json"
 MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE = MMPM_CONFIG_DIR / "MagicMirror-3rd-party-packages-db.json"
 MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE = MMPM_CONFIG_DIR / "MagicMirror-3rd-party-packages-db-last-update.json"
+MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE = MMPM_CONFIG_DIR / "MagicMirror-3rd-party-packages-db.sqlite3"
+MMPM_HOST_IP_FILE = MMPM_CONFIG_DIR / "mmpm-host-ip.json"
+MMPM_COMPLETION_TABLE_FILE = MMPM_CONFIG_DIR / "mmpm-completion-table.json"
+MMPM_DEPENDENCY_STORE_DIR = MMPM_CONFIG_DIR / "store"
+MMPM_BUILD_CACHE_DIR = MMPM_CONFIG_DIR / "cache"
+MMPM_MIRRORS_DIR = MMPM_CONFIG_DIR / "mirrors"
 
-# Setup the directories and files
+# Setup the directories and files. Existing files aren't touched, since their modification times are used to tell when they change
 MMPM_CONFIG_DIR.mkdir(exist_ok=True, parents=True)
 MMPM_LOG_DIR.mkdir(exist_ok=True)
-MMPM_CLI_LOG_FILE.touch(exist_ok=True)
-MMPM_ENV_FILE.touch(exist_ok=True)
-MMPM_CUSTOM_PACKAGES_FILE.touch(exist_ok=True)
-MMPM_AVAILABLE_UPGRADES_FILE.touch(exist_ok=True)
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE.touch(exist_ok=True)
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE.touch(exist_ok=True)
+
+for path in (
+    MMPM_CLI_LOG_FILE,
+    MMPM_ENV_FILE,
+    MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE,
+    MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE,
+):
+    if not path.exists():
+        path.touch()
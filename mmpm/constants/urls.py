@@ -1,8 +1,4 @@
 #!/usr/bin/env python3
-from mmpm.utils import get_host_ip
-
-HOST = f"{get_host_ip()}"
-
 MMPM_UI_PORT = 7890
 MMPM_API_SERVER_PORT = 7891
 MMPM_LOG_SERVER_PORT = 6789
@@ -14,3 +10,13 @@ MAGICMIRROR_REPO_URL: str = "https://github.com/MagicMirrorOrg/MagicMirror"
 MAGICMIRROR_WIKI_URL: str = f"{MAGICMIRROR_REPO_URL}/wiki"
 MAGICMIRROR_DOCUMENTATION_URL: str = "https://docs.magicmirror.builders/"
 MAGICMIRROR_MODULES_URL: str = f"{MAGICMIRROR_REPO_URL}/wiki/3rd-party-modules"
+
+
+def __getattr__(name: str) -> str:
+    # HOST requires opening a socket, so it's only determined when a command actually asks for it
+    if name == "HOST":
+        from mmpm.utils import cached_host_ip  # pylint: disable=import-outside-toplevel
+
+        return cached_host_ip()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
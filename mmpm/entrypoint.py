@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
+import os
 import sys
 from argparse import ArgumentParser
 
 import argcomplete
 
-import mmpm.subcommands
+from mmpm.completion import CompletionTable, complete
 from mmpm.constants import urls
 from mmpm.log.factory import MMPMLogFactory
-from mmpm.subcommands.loader import Loader
+from mmpm.subcommands.loader import LazyLoader
+from mmpm.subcommands.manifest import SUBCOMMANDS
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -30,6 +32,9 @@ def main():
 
     app_name = "mmpm"
 
+    # shell completions are answered from the completion table when possible, without loading any subcommands
+    complete(app_name)
+
     parser = ArgumentParser(
         prog=app_name,
         usage=f"{app_name} <subcommand> [option(s)]",
@@ -47,20 +52,25 @@ def main():
         metavar="",
     )
 
-    loader = Loader(
-        module_path=mmpm.subcommands.__path__,
+    loader = LazyLoader(
+        manifest=SUBCOMMANDS,
         module_name="mmpm.subcommands",
         app_name=app_name,
         prefix="_sub_cmd",
     )
 
-    for subcommand in loader.objects.values():
-        subcommand.register(subparser)
+    # only the selected subcommand is imported, unless the completion table needs to be rebuilt from every subcommand
+    loader.register(subparser, selected=LazyLoader.selected(sys.argv[1:]), everything="_ARGCOMPLETE" in os.environ)
+
+    if "_ARGCOMPLETE" in os.environ:
+        table = CompletionTable()
+        table.update(parser)
 
-    argcomplete.autocomplete(parser)
+        if not complete(app_name, table):
+            argcomplete.autocomplete(parser)
 
     args, extra = parser.parse_known_args()
-    subcommand = loader.objects.get(args.subcmd)
+    subcommand = loader.load(args.subcmd) if args.subcmd else None
 
     if not subcommand:
         logger.debug(f"Unable to match '{args.subcmd}' to a valid subcommand")
@@ -3,10 +3,6 @@ import json
 from os.path import getmtime
 from pathlib import Path
 
-from pygments import highlight
-from pygments.formatters.terminal import TerminalFormatter
-from pygments.lexers.data import JsonLexer
-
 from mmpm.constants import color, paths
 from mmpm.singleton import Singleton
 
@@ -17,6 +13,14 @@ MMPM_DEFAULT_ENV: dict = {
     "MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE": "",
     "MMPM_IS_DOCKER_IMAGE": False,
     "MMPM_LOG_LEVEL": "INFO",
+    "MMPM_MAX_WORKERS": 8,
+    "MMPM_MAX_BUILD_WORKERS": 2,
+    "MMPM_GIT_TIMEOUT": 60,
+    "MMPM_CLONE_STRATEGY": "full",
+    "MMPM_DEPENDENCY_STORE": False,
+    "MMPM_BUILD_CACHE_SIZE": 0,
+    "MMPM_REPOSITORY_MIRRORS": False,
+    "MMPM_DATABASE_MAX_AGE": 24,
 }
 
 
@@ -97,6 +101,14 @@ class MMPMEnv(Singleton):
         MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE (EnvVar): Environment variable for the Docker compose file path.
         MMPM_IS_DOCKER_IMAGE (EnvVar): Environment variable indicating if MMPM is running as a Docker image.
         MMPM_LOG_LEVEL (EnvVar): Environment variable for the logging level.
+        MMPM_MAX_WORKERS (EnvVar): Environment variable for the number of concurrent network-bound workers (ie. git operations).
+        MMPM_MAX_BUILD_WORKERS (EnvVar): Environment variable for the number of packages whose dependencies may be installed concurrently (ie. npm install).
+        MMPM_GIT_TIMEOUT (EnvVar): Environment variable for the number of seconds a single git network operation may take.
+        MMPM_CLONE_STRATEGY (EnvVar): Environment variable for how packages are cloned (full, shallow, blobless, or single-branch).
+        MMPM_DEPENDENCY_STORE (EnvVar): Environment variable indicating if the Node dependencies of packages are hard linked from a shared, content-addressed store.
+        MMPM_BUILD_CACHE_SIZE (EnvVar): Environment variable for the number of MiB of built packages kept in the build cache (0 disables the cache).
+        MMPM_REPOSITORY_MIRRORS (EnvVar): Environment variable indicating if packages are cloned and fetched through a bare mirror of their repository, which is kept after they're removed.
+        MMPM_DATABASE_MAX_AGE (EnvVar): Environment variable for the number of hours before the database is refreshed automatically (0 disables).
 
     Methods:
         __init__(): Initializes the MMPMEnv instance, loading environment variables from MMPM_ENV_FILE.
@@ -114,6 +126,14 @@ class MMPMEnv(Singleton):
         self.MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE: EnvVar = None
         self.MMPM_IS_DOCKER_IMAGE: EnvVar = None
         self.MMPM_LOG_LEVEL: EnvVar = None
+        self.MMPM_MAX_WORKERS: EnvVar = None
+        self.MMPM_MAX_BUILD_WORKERS: EnvVar = None
+        self.MMPM_GIT_TIMEOUT: EnvVar = None
+        self.MMPM_CLONE_STRATEGY: EnvVar = None
+        self.MMPM_DEPENDENCY_STORE: EnvVar = None
+        self.MMPM_BUILD_CACHE_SIZE: EnvVar = None
+        self.MMPM_REPOSITORY_MIRRORS: EnvVar = None
+        self.MMPM_DATABASE_MAX_AGE: EnvVar = None
 
         env_vars = {}
 
@@ -147,4 +167,9 @@ class MMPMEnv(Singleton):
         return current_env
 
     def display(self) -> None:  # pragma: no cover
+        # pylint: disable=import-outside-toplevel
+        from pygments import highlight
+        from pygments.formatters.terminal import TerminalFormatter
+        from pygments.lexers.data import JsonLexer
+
         print(highlight(json.dumps(self.get(), indent=2), JsonLexer(), TerminalFormatter()))
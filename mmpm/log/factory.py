@@ -1,27 +1,33 @@
 #!/usr/bin/env python3
+import atexit
 import datetime
 import json
 import logging
 import logging.handlers
 import os
 import shutil
-from threading import Lock
-
-import socketio
+import time
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Optional
 
 from mmpm.__version__ import version
 from mmpm.constants import paths
 from mmpm.env import MMPMEnv
 
+if TYPE_CHECKING:
+    import socketio
+
 
 class JsonFormatter(logging.Formatter):
     """
-    A custom formatter for logging, which outputs log records in a JSON format.
+    A custom formatter for logging, which outputs log records in a JSON format. The JSON is kept on the record,
+    so a record written to several handlers (ie. the log file and SocketIO) is only encoded once.
     """
 
     def format(self, record):
         """
-        Formats the log record into JSON.
+        Formats the log record into JSON, reusing the JSON of a record that was already formatted.
 
         Parameters:
             record (logging.LogRecord): The log record to be formatted.
@@ -30,6 +36,11 @@ class JsonFormatter(logging.Formatter):
             str: A JSON string representation of the log record.
         """
 
+        formatted = getattr(record, "mmpm_json", None)
+
+        if formatted is not None:
+            return formatted
+
         try:
             message = record.getMessage()
         except TypeError:
@@ -47,55 +58,152 @@ class JsonFormatter(logging.Formatter):
             "line": record.lineno,
         }
 
-        return json.dumps(log_data, ensure_ascii=False)
+        record.mmpm_json = json.dumps(log_data, ensure_ascii=False)
+        return record.mmpm_json
 
 
 class SocketIOHandler(logging.Handler):
-    """A logging handler that emits records with SocketIO."""
+    """
+    A logging handler that emits records with SocketIO. Nothing is connected until the first record is emitted,
+    and the connection and every emit happen on a background thread, so neither importing a module nor logging
+    a message ever waits on the SocketIO server. Records are buffered in a bounded queue, where the oldest
+    records are dropped once it's full, and records emitted while the server is unreachable are discarded.
+    """
+
+    # the maximum number of formatted records waiting to be sent
+    CAPACITY = 1024
 
-    def __init__(self, host, port):
+    # how long (in seconds) to wait before trying to reach an unreachable server again
+    RETRY_INTERVAL = 5.0
+
+    # how long (in seconds) closing the handler waits for the buffered records to be sent
+    CLOSE_TIMEOUT = 1.0
+
+    def __init__(self, host, port, capacity: int = CAPACITY):
         """
         Initializes the SocketIOHandler with a specified host and port for the SocketIO server.
 
         Parameters:
             host (str): The host name of the SocketIO server.
             port (int): The port number of the SocketIO server.
+            capacity (int): The maximum number of records buffered while waiting to be sent.
         """
 
         super().__init__()
         self.formatter = JsonFormatter()
-        self.sio = socketio.Client()
-
-        try:
-            self.sio.connect(f"http://{host}:{port}", wait=False)
-        except socketio.exceptions.ConnectionError:
-            pass
+        self.url = f"http://{host}:{port}"
+        self.sio: Optional["socketio.Client"] = None
+        self.queue: Queue = Queue(maxsize=capacity)
+        self.thread: Optional[Thread] = None
 
-    def emit(self, record):
+    def __enqueue__(self, item) -> None:
         """
-        Emits the log record to the connected SocketIO server.
+        Adds an item to the queue without blocking, dropping the oldest item when the queue is full.
 
         Parameters:
-            record (logging.LogRecord): The log record to be emitted.
+            item (Optional[str]): The formatted record, or None to stop the background thread.
+        """
+
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                except Empty:
+                    pass
+
+    def __connect__(self) -> bool:
+        """
+        Connects to the SocketIO server, if not already connected.
+
+        Returns:
+            bool: True if connected, False otherwise.
+        """
+
+        import socketio  # pylint: disable=import-outside-toplevel
+
+        if self.sio is None:
+            self.sio = socketio.Client()
+
+        sio = self.sio
+
+        if not sio.connected:
+            try:
+                sio.connect(self.url)
+            except socketio.exceptions.ConnectionError:
+                return False
+
+        return bool(sio.connected)
+
+    def __run__(self) -> None:
+        """
+        Sends the queued records to the SocketIO server until stopped, connecting on the first record.
         """
 
-        if self.sio.connected:
+        retry_at = 0.0
+
+        while True:
+            message = self.queue.get()
+
+            if message is None:
+                break
+
+            if time.monotonic() < retry_at:
+                continue
+
+            if not self.__connect__():
+                retry_at = time.monotonic() + self.RETRY_INTERVAL
+                continue
+
+            sio = self.sio  # always set once connected
+
             try:
-                self.sio.emit("logs", self.formatter.format(record))
+                sio.emit("logs", message)
             except Exception:
                 pass
 
+    def emit(self, record):
+        """
+        Queues the log record to be emitted to the SocketIO server, starting the background thread if needed.
+
+        Parameters:
+            record (logging.LogRecord): The log record to be emitted.
+        """
+
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = Thread(target=self.__run__, name="mmpm-socketio-log-handler", daemon=True)
+                    self.thread.start()
+
+        self.__enqueue__(message)
+
     def close(self):
         """
-        Closes the connection to the SocketIO server and performs any necessary cleanup.
+        Sends the buffered records (waiting no longer than CLOSE_TIMEOUT), closes the connection to the SocketIO
+        server, and performs any necessary cleanup.
 
         Parameters:
             None
         """
 
-        if self.sio.connected:
+        if self.thread is not None:
+            self.__enqueue__(None)
+            self.thread.join(self.CLOSE_TIMEOUT)
+
+        # the connection is only closed once the background thread has stopped, since it may still be connecting
+        if self.sio is not None and self.sio.connected and (self.thread is None or not self.thread.is_alive()):
             self.sio.disconnect()
-            super().close()
+
+        super().close()
 
 
 class StdoutFormatter(logging.Formatter):
@@ -126,7 +234,10 @@ class MMPMLogFactory:
     """
 
     __logger: logging.Logger = None
+    __file_handler: logging.Handler = None
     __socketio_handler: SocketIOHandler = None
+    __queue_handler: logging.handlers.QueueHandler = None
+    __listener: logging.handlers.QueueListener = None
     __lock: Lock = Lock()
 
     @staticmethod
@@ -147,34 +258,48 @@ class MMPMLogFactory:
 
         file_handler.setFormatter(JsonFormatter())
         file_handler.setLevel(logging.DEBUG)  # always have the log files be DEBUG
-        MMPMLogFactory.__logger.addHandler(file_handler)
+        MMPMLogFactory.__file_handler = file_handler
 
+        # stdout is written synchronously, so log messages stay in order with everything else printed to stdout
         stdout_handler = logging.StreamHandler()
         stdout_handler.setFormatter(StdoutFormatter())
         stdout_handler.setLevel(level)
 
         MMPMLogFactory.__logger.addHandler(stdout_handler)
 
-        socketio_handler = SocketIOHandler("localhost", 6789)
+        # connects lazily, on a background thread, so startup never waits on the SocketIO server
+        MMPMLogFactory.__socketio_handler = SocketIOHandler("localhost", 6789)
+        MMPMLogFactory.__socketio_handler.setLevel(logging.DEBUG)
 
-        if socketio_handler.sio.connected:
-            MMPMLogFactory.__socketio_handler = socketio_handler
-            MMPMLogFactory.__socketio_handler.setLevel(logging.DEBUG)
-            MMPMLogFactory.__logger.addHandler(MMPMLogFactory.__socketio_handler)
-        else:
-            MMPMLogFactory.__logger.debug("Failed to connect to SocketIO server")
+        # the JSON encoding and disk I/O happen on the listener's thread, rather than the thread that logged
+        log_queue: Queue = Queue()
+        MMPMLogFactory.__queue_handler = logging.handlers.QueueHandler(log_queue)
+        MMPMLogFactory.__queue_handler.setLevel(logging.DEBUG)
+        MMPMLogFactory.__logger.addHandler(MMPMLogFactory.__queue_handler)
+
+        MMPMLogFactory.__listener = logging.handlers.QueueListener(log_queue, file_handler, MMPMLogFactory.__socketio_handler, respect_handler_level=True)
+        MMPMLogFactory.__listener.start()
+        atexit.register(MMPMLogFactory.shutdown)
 
     @staticmethod
     def shutdown() -> None:
         """
-        Shuts down the logger, closing any SocketIO connections.
+        Shuts down the logger, writing any queued log records and closing any SocketIO connections. Anything
+        logged afterwards is written directly to the log file.
 
         Parameters:
             None
         """
 
-        if MMPMLogFactory.__socketio_handler is not None:
-            MMPMLogFactory.__logger.debug("Disconnecting from SocketIO server")
+        with MMPMLogFactory.__lock:
+            if MMPMLogFactory.__listener is None:
+                return
+
+            MMPMLogFactory.__listener.stop()
+            MMPMLogFactory.__listener = None
+
+            MMPMLogFactory.__logger.removeHandler(MMPMLogFactory.__queue_handler)
+            MMPMLogFactory.__logger.addHandler(MMPMLogFactory.__file_handler)
             MMPMLogFactory.__socketio_handler.close()
 
     @staticmethod
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+A cache of built packages (see MMPM_BUILD_CACHE_SIZE). Once the dependencies of a package are installed, the
+whole package (including its Git directory and node_modules) is saved as a compressed archive, keyed by its
+repository, commit, CPU architecture and toolchain versions. Installing the same commit of the package again,
+ie. on a second MagicMirror or after rebuilding one from scratch, restores the archive instead of cloning and
+building the package.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from mmpm.constants import paths
+from mmpm.log.factory import MMPMLogFactory
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+# the 'tar' filter (Python 3.12, and backported to security releases) refuses absolute paths and paths outside of
+# the destination, while keeping the permissions of executables and the symlinks within node_modules/.bin
+EXTRACT_OPTIONS: Dict[str, Any] = {"filter": "tar"} if hasattr(tarfile, "tar_filter") else {}
+
+
+class BuildCache:
+    """
+    The cache of built packages, which holds at most `max_size` bytes of archives. When saving an archive
+    exceeds that size, the least recently used archives are evicted.
+
+    Each archive (<key>.tar.gz) is accompanied by its metadata (<key>.json), which describes the package it was
+    saved from, its size, and when it was created and last used.
+
+    Attributes:
+        path (Path): The location of the cache.
+        max_size (int): The maximum number of bytes of archives kept within the cache.
+    """
+
+    def __init__(self, path: Path = None, max_size: int = 0):
+        self.path = path or paths.MMPM_BUILD_CACHE_DIR
+        self.max_size = max_size
+
+    @staticmethod
+    def key(artifact: Dict[str, Any]) -> str:
+        """
+        Determines the key of a built package from everything it was built from.
+
+        Parameters:
+            artifact (Dict[str, Any]): The repository, commit, CPU architecture and toolchain versions.
+
+        Returns:
+            str: The key of the built package.
+        """
+
+        return hashlib.sha256(json.dumps(artifact, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def __archive__(self, key: str) -> Path:
+        return self.path / f"{key}.tar.gz"
+
+    def __metadata__(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def __write_metadata__(self, key: str, metadata: Dict[str, Any]) -> None:
+        tmp_file = self.path / f".{key}.{os.getpid()}.{threading.get_ident()}.json"
+        tmp_file.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+        os.replace(tmp_file, self.__metadata__(key))
+
+    def contains(self, key: str) -> bool:
+        """
+        Checks if a built package is within the cache.
+
+        Parameters:
+            key (str): The key of the built package (see `key`).
+
+        Returns:
+            bool: True if the cache holds the built package, False otherwise.
+        """
+
+        return self.__archive__(key).exists() and self.__metadata__(key).exists()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Lists the metadata of every built package within the cache, from the least to the most recently used.
+
+        Parameters:
+            None
+
+        Returns:
+            List[Dict[str, Any]]: The metadata of each built package, along with its 'key'.
+        """
+
+        entries = []
+
+        for metadata_file in self.path.glob("*.json") if self.path.exists() else []:
+            key = metadata_file.stem
+
+            if key.startswith("."):
+                continue  # still being written
+
+            try:
+                metadata = json.loads(metadata_file.read_text(encoding="utf-8"))
+                metadata["size"] = self.__archive__(key).stat().st_size
+            except (OSError, ValueError):
+                continue  # removed in the meantime
+
+            entries.append({"key": key, **metadata})
+
+        return sorted(entries, key=lambda entry: entry.get("last_used", 0))
+
+    def size(self) -> int:
+        """
+        The number of bytes of archives within the cache.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The size of the cache.
+        """
+
+        return sum(entry["size"] for entry in self.entries())
+
+    def save(self, key: str, directory: Path, metadata: Dict[str, Any]) -> bool:
+        """
+        Saves a built package to the cache, then evicts the least recently used built packages until the cache
+        is within its `max_size`.
+
+        Parameters:
+            key (str): The key of the built package (see `key`).
+            directory (Path): The directory of the built package.
+            metadata (Dict[str, Any]): A description of the built package, ie. its title and commit.
+
+        Returns:
+            bool: True if the built package was saved, False otherwise.
+        """
+
+        tmp_file = self.path / f".{key}.{os.getpid()}.{threading.get_ident()}.tar.gz"
+        start: float = time.monotonic()
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            with tarfile.open(tmp_file, "w:gz", compresslevel=6) as archive:
+                archive.add(directory, arcname=".")
+
+            os.replace(tmp_file, self.__archive__(key))
+            now = time.time()
+            self.__write_metadata__(key, {**metadata, "created": now, "last_used": now})
+        except (OSError, tarfile.TarError) as error:
+            logger.warning(f"Unable to save '{directory}' to the build cache in '{self.path}': {error}")
+            tmp_file.unlink(missing_ok=True)
+            return False
+
+        logger.debug(f"Saved '{directory}' to the build cache as {key} in {time.monotonic() - start:.2f}s")
+        self.evict(self.max_size)
+        return True
+
+    def restore(self, key: str, directory: Path) -> bool:
+        """
+        Restores a built package from the cache. The package is extracted beside the directory first, so the
+        directory is either fully restored or not created at all.
+
+        Parameters:
+            key (str): The key of the built package (see `key`).
+            directory (Path): The directory to restore the built package to, which must not exist (or be empty).
+
+        Returns:
+            bool: True if the built package was restored, False if it isn't within the cache, or couldn't be restored.
+        """
+
+        if not self.contains(key):
+            return False
+
+        tmp_dir = directory.with_name(f".{directory.name}.mmpm-cache")
+        start: float = time.monotonic()
+
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            with tarfile.open(self.__archive__(key), "r:gz") as archive:
+                archive.extractall(tmp_dir, **EXTRACT_OPTIONS)
+
+            os.rename(tmp_dir, directory)
+        except (OSError, tarfile.TarError) as error:
+            logger.warning(f"Unable to restore {key} from the build cache to '{directory}': {error}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        try:
+            metadata = json.loads(self.__metadata__(key).read_text(encoding="utf-8"))
+            self.__write_metadata__(key, {**metadata, "last_used": time.time()})
+        except (OSError, ValueError):
+            pass  # evicted by another process in the meantime
+
+        logger.debug(f"Restored {key} from the build cache to '{directory}' in {time.monotonic() - start:.2f}s")
+        return True
+
+    def remove(self, key: str) -> int:
+        """
+        Removes a built package from the cache.
+
+        Parameters:
+            key (str): The key of the built package (see `key`).
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        archive = self.__archive__(key)
+
+        try:
+            freed = archive.stat().st_size
+            self.__metadata__(key).unlink(missing_ok=True)
+            archive.unlink()
+        except OSError:
+            return 0  # removed by another process already
+
+        return freed
+
+    def evict(self, max_size: int) -> int:
+        """
+        Removes the least recently used built packages until the cache holds at most `max_size` bytes.
+
+        Parameters:
+            max_size (int): The number of bytes the cache may hold (0 removes every built package).
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        entries = self.entries()
+        size = sum(entry["size"] for entry in entries)
+        freed = 0
+
+        for entry in entries:
+            if size <= max_size:
+                break
+
+            logger.debug(f"Evicting {entry['key']} ({entry.get('title', entry.get('repository'))}) from the build cache")
+            freed += self.remove(entry["key"])
+            size -= entry["size"]
+
+        return freed
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+import json
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from mmpm.constants import paths
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.package import MagicMirrorPackage
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+# stored as the 'user_version' of the catalog, and bumped whenever the layout of the catalog changes
+CATALOG_VERSION: int = 2
+
+# the catalog is small, so it's memory-mapped in its entirety when reading
+MMAP_SIZE: int = 64 * 1024 * 1024
+
+# the number of seconds to wait on another process (ie. the API) that's writing to the catalog
+BUSY_TIMEOUT: float = 10.0
+
+COLUMNS: Tuple[str, ...] = ("title", "author", "repository", "description", "category", "directory")
+
+SCHEMA: Tuple[str, ...] = (
+    "CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    f"CREATE TABLE packages (id INTEGER PRIMARY KEY, {', '.join(f'{column} TEXT NOT NULL' for column in COLUMNS)}, is_custom INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX packages_title ON packages (title COLLATE NOCASE)",
+    "CREATE INDEX packages_category ON packages (category)",
+    "CREATE INDEX packages_repository ON packages (repository COLLATE NOCASE, directory COLLATE NOCASE)",
+    # packages are considered equal by their repository and directory (see MagicMirrorPackage.__hash__), which is how
+    # the install and upgrade state is kept, so the state isn't lost when the packages from the wiki are replaced
+    "CREATE TABLE installed (repository TEXT COLLATE NOCASE, directory TEXT COLLATE NOCASE, PRIMARY KEY (repository, directory))",
+    "CREATE TABLE upgradable (repository TEXT COLLATE NOCASE, directory TEXT COLLATE NOCASE, PRIMARY KEY (repository, directory))",
+)
+
+# the rows put in the catalog by the user, rather than built from the JSON database, which are carried over when the
+# layout of the catalog changes. Columns added to these tables must have a default, since older rows lack them
+USER_ROWS: Dict[str, str] = {
+    "packages": "is_custom = 1",
+    "installed": "1",
+    "upgradable": "1",
+    "metadata": "key IN ('mmpm_upgradable', 'magicmirror_upgradable')",
+}
+
+# the first layout holding user rows. Catalogs of older layouts were built entirely from the JSON database, and the
+# user rows were kept in the JSON files used prior to the catalog
+FIRST_USER_VERSION: int = 2
+
+# the fields of a serialized package (see MagicMirrorPackage.serialize), and how each is selected
+FIELDS: Dict[str, str] = {
+    **{column: f"packages.{column}" for column in COLUMNS},
+    "is_installed": "installed.repository IS NOT NULL",
+    "is_upgradable": "upgradable.repository IS NOT NULL",
+}
+
+# every package, along with its install and upgrade state
+FROM_PACKAGES: str = """
+    FROM packages
+    LEFT JOIN installed ON installed.repository = packages.repository AND installed.directory = packages.directory
+    LEFT JOIN upgradable ON upgradable.repository = packages.repository AND upgradable.directory = packages.directory
+"""
+
+# in the order of the 3rd party wiki, followed by the custom packages
+ORDER_BY_PACKAGES: str = "ORDER BY packages.is_custom, packages.id"
+
+SELECT_PACKAGES: str = f"SELECT {', '.join(FIELDS.values())} {FROM_PACKAGES}"
+
+
+def __key__(package: MagicMirrorPackage) -> Tuple[str, str]:
+    return package.repository, package.directory.name
+
+
+class Catalog:
+    """
+    A SQLite store of the MagicMirror packages. It holds a copy of the 3rd party packages database, which
+    is rebuilt whenever the JSON database changes, along with the custom packages, and the install and
+    upgrade state of the packages. Unlike the JSON files, individual columns and rows can be read without
+    deserializing every package, and every write is a single transaction, so concurrent readers (ie. the
+    API and CLI) never see a partial write. The custom packages and upgrade state are only kept in the
+    catalog, so they're carried over whenever the layout of the catalog changes.
+
+    Attributes:
+        path (Path): The location of the catalog.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = path or paths.MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE
+
+    def __open__(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            connection = sqlite3.connect(f"{self.path.absolute().as_uri()}?mode=ro", uri=True, timeout=BUSY_TIMEOUT, isolation_level=None)
+        else:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+
+        connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        return connection
+
+    def __connect__(self, read_only: bool = False) -> sqlite3.Connection:
+        """
+        Opens a connection to the catalog, creating the tables of the catalog, or migrating those of an
+        older layout, if needed. Transactions are managed explicitly (see `__transaction__`).
+
+        Parameters:
+            read_only (bool): If True, the connection can't write to the catalog.
+
+        Returns:
+            sqlite3.Connection: The connection to the catalog.
+        """
+
+        if read_only:
+            try:
+                connection = self.__open__(read_only=True)
+            except sqlite3.OperationalError:  # the catalog doesn't exist yet
+                connection = None
+
+            if connection is not None and connection.execute("PRAGMA user_version").fetchone()[0] == CATALOG_VERSION:
+                return connection
+
+            if connection is not None:
+                connection.close()
+
+            # the tables are created by a connection that can write to the catalog
+            self.__connect__().close()
+            return self.__open__(read_only=True)
+
+        connection = self.__open__()
+
+        if connection.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+            try:
+                self.__create__(connection)
+            except BaseException:
+                connection.close()
+                raise
+
+        return connection
+
+    def __create__(self, connection: sqlite3.Connection) -> None:
+        """
+        Creates the tables of the catalog. The user rows of an older layout are moved into the new tables,
+        while the rest are rebuilt from the JSON database. If the catalog predates the user rows, they're
+        imported from the JSON files that were used prior to the catalog instead.
+
+        Parameters:
+            connection (sqlite3.Connection): The connection to the catalog.
+
+        Returns:
+            None
+        """
+
+        # write-ahead logging lets readers continue while another process is writing
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+
+            # another process may have created the tables while this one was waiting on the lock
+            if version == CATALOG_VERSION:
+                connection.execute("COMMIT")
+                return
+
+            # the indexes of the old tables would clash with those of the new tables
+            for (index,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall():
+                connection.execute(f'DROP INDEX "{index}"')
+
+            old_tables = [table for (table,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()]
+
+            for table in old_tables:
+                connection.execute(f'ALTER TABLE "{table}" RENAME TO "old_{table}"')
+
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+            if version >= FIRST_USER_VERSION:
+                self.__migrate__(connection, old_tables)
+            else:
+                self.__import_json_files__(connection)
+
+            for table in old_tables:
+                connection.execute(f'DROP TABLE "old_{table}"')
+
+            connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            connection.execute("COMMIT")
+
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def __migrate__(self, connection: sqlite3.Connection, old_tables: List[str]) -> None:
+        """
+        Copies the user rows of an older layout (renamed to 'old_<table>') into the tables of the current layout.
+        Only the columns found in both the old and the new table are copied.
+
+        Parameters:
+            connection (sqlite3.Connection): The connection to the catalog, within a transaction.
+            old_tables (List[str]): The tables of the older layout.
+
+        Returns:
+            None
+        """
+
+        for table, condition in USER_ROWS.items():
+            if table not in old_tables:
+                continue
+
+            old_columns = {row[1] for row in connection.execute(f'PRAGMA table_info("old_{table}")')}
+            columns = ", ".join(row[1] for row in connection.execute(f"PRAGMA table_info({table})") if row[1] in old_columns)
+            connection.execute(f'INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM "old_{table}" WHERE {condition}')
+
+    def __import_json_files__(self, connection: sqlite3.Connection) -> None:
+        """
+        Imports the custom packages and available upgrades from the JSON files that were used prior to the catalog.
+
+        Parameters:
+            connection (sqlite3.Connection): The connection to the catalog, within a transaction.
+
+        Returns:
+            None
+        """
+
+        custom_packages = self.__read_json_file__(paths.MMPM_CUSTOM_PACKAGES_FILE) or []
+        upgrades = self.__read_json_file__(paths.MMPM_AVAILABLE_UPGRADES_FILE) or {}
+
+        for package in custom_packages:
+            try:
+                self.__insert__(connection, [MagicMirrorPackage(**package)], is_custom=True)
+            except Exception as error:
+                logger.debug(f"Unable to import custom package: {error}")
+
+        try:
+            self.__set_upgradable__(
+                connection,
+                [MagicMirrorPackage(**package) for package in upgrades.get("packages", [])],
+                bool(upgrades.get("mmpm")),
+                bool(upgrades.get("MagicMirror")),
+            )
+        except Exception as error:
+            logger.debug(f"Unable to import available upgrades: {error}")
+
+    def __read_json_file__(self, file: Path) -> Any:
+        try:
+            with open(file, "r", encoding="utf-8") as data:
+                return json.load(data)
+        except (OSError, ValueError) as error:
+            logger.debug(f"Unable to import {file} into {self.path}: {error}")
+            return None
+
+    @contextmanager
+    def __transaction__(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection to the catalog within a transaction, which is committed if no exception is raised,
+        and rolled back otherwise.
+
+        Parameters:
+            None
+
+        Returns:
+            Iterator[sqlite3.Connection]: The connection to the catalog.
+        """
+
+        with closing(self.__connect__()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+            connection.execute("COMMIT")
+
+    def __insert__(self, connection: sqlite3.Connection, packages: List[MagicMirrorPackage], is_custom: bool = False) -> None:
+        connection.executemany(
+            f"INSERT INTO packages ({', '.join(COLUMNS)}, is_custom) VALUES ({', '.join('?' * len(COLUMNS))}, ?)",
+            ([*(package.serialize()[column] for column in COLUMNS), int(is_custom)] for package in packages),
+        )
+
+    def __set_upgradable__(self, connection: sqlite3.Connection, packages: List[MagicMirrorPackage], mmpm: bool, magicmirror: bool) -> None:
+        connection.execute("DELETE FROM upgradable")
+        connection.executemany("INSERT OR IGNORE INTO upgradable (repository, directory) VALUES (?, ?)", (__key__(package) for package in packages))
+        connection.executemany(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            (("mmpm_upgradable", str(int(mmpm))), ("magicmirror_upgradable", str(int(magicmirror)))),
+        )
+
+    def __source_stamp__(self, source: Path) -> Dict[str, str]:
+        """
+        Identifies the current version of the JSON database the catalog is built from.
+
+        Parameters:
+            source (Path): The JSON database.
+
+        Returns:
+            Dict[str, str]: The details of the JSON database stored in, and compared against, the catalog.
+        """
+
+        stat = source.stat()
+        return {"source_mtime_ns": str(stat.st_mtime_ns), "source_size": str(stat.st_size)}
+
+    def is_current(self, source: Path) -> bool:
+        """
+        Checks if the packages of the catalog were built from the current JSON database.
+
+        Parameters:
+            source (Path): The JSON database.
+
+        Returns:
+            bool: True if the catalog can be used in place of the JSON database, False otherwise.
+        """
+
+        if not self.path.exists() or not source.exists():
+            return False
+
+        stamp = self.__source_stamp__(source)
+
+        try:
+            with closing(self.__connect__(read_only=True)) as connection:
+                metadata = dict(connection.execute(f"SELECT key, value FROM metadata WHERE key IN ({', '.join('?' * len(stamp))})", tuple(stamp)).fetchall())
+        except sqlite3.Error as error:
+            logger.debug(f"Unable to read {self.path}: {error}")
+            return False
+
+        return metadata == stamp
+
+    def write(self, packages: List[MagicMirrorPackage], source: Path) -> bool:
+        """
+        Replaces the packages of the 3rd party wiki with the packages of the JSON database. The custom
+        packages, and the install and upgrade state of the packages, are left untouched.
+
+        Parameters:
+            packages (List[MagicMirrorPackage]): The packages of the JSON database.
+            source (Path): The JSON database the packages were read from.
+
+        Returns:
+            bool: True if the catalog was written, False otherwise.
+        """
+
+        try:
+            with self.__transaction__() as connection:
+                connection.execute("DELETE FROM packages WHERE is_custom = 0")
+                self.__insert__(connection, packages)
+                connection.executemany("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)", self.__source_stamp__(source).items())
+
+        except (sqlite3.Error, OSError) as error:
+            logger.error(f"Failed to write {self.path}: {error}")
+            return False
+
+        return True
+
+    def rows(self, *columns: str) -> List[Tuple[str, ...]]:
+        """
+        Reads the given columns of every package, without creating any MagicMirrorPackage objects.
+
+        Parameters:
+            columns (str): The columns to read, ie. 'title', 'repository'.
+
+        Returns:
+            List[Tuple[str, ...]]: The values of the columns for each package.
+        """
+
+        if any(column not in COLUMNS for column in columns):
+            raise ValueError(f"Columns must be one of {', '.join(COLUMNS)}")
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            return connection.execute(f"SELECT {', '.join(columns)} FROM packages ORDER BY is_custom, id").fetchall()
+
+    def __where__(
+        self,
+        category: str = None,
+        installed: bool = None,
+        upgradable: bool = None,
+        query: str = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Builds the WHERE clause selecting the packages that match all the given filters.
+
+        Parameters:
+            category (str): The exact category of the packages.
+            installed (bool): Whether the packages are installed.
+            upgradable (bool): Whether the packages are upgradable.
+            query (str): Words that must each appear within the title, author, or description of the packages (ignoring case).
+
+        Returns:
+            Tuple[str, List[Any]]: The WHERE clause (empty if there are no filters), and its parameters.
+        """
+
+        conditions: List[str] = []
+        parameters: List[Any] = []
+
+        if category is not None:
+            conditions.append("packages.category = ?")
+            parameters.append(category)
+
+        for field, value in (("is_installed", installed), ("is_upgradable", upgradable)):
+            if value is not None:
+                conditions.append(f"({FIELDS[field]}) = ?")
+                parameters.append(int(value))
+
+        for term in (query or "").split():
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append("(" + " OR ".join(f"{FIELDS[field]} LIKE ? ESCAPE '\\'" for field in ("title", "author", "description")) + ")")
+            parameters.extend([pattern] * 3)
+
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
+
+    def serialized(self, offset: int = 0, limit: int = None, fields: List[str] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Reads the packages, along with their install and upgrade state, in a single query. The result
+        matches `MagicMirrorPackage.serialize(full=True)`, without creating any MagicMirrorPackage objects.
+
+        Parameters:
+            offset (int): The number of matching packages to skip.
+            limit (int): The maximum number of packages to read. No limit if None.
+            fields (List[str]): The fields of each package to read. All fields if None.
+            filters: The filters the packages must match (see `__where__`).
+
+        Returns:
+            List[Dict[str, Any]]: The serialized packages.
+        """
+
+        fields = list(fields or FIELDS)
+
+        if any(field not in FIELDS for field in fields):
+            raise ValueError(f"Fields must be one of {', '.join(FIELDS)}")
+
+        where, parameters = self.__where__(**filters)
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            rows = connection.execute(
+                f"SELECT {', '.join(FIELDS[field] for field in fields)} {FROM_PACKAGES} {where} {ORDER_BY_PACKAGES} LIMIT ? OFFSET ?",
+                (*parameters, -1 if limit is None else limit, offset),
+            ).fetchall()
+
+        booleans = [field for field in fields if field.startswith("is_")]
+        packages = [dict(zip(fields, row)) for row in rows]
+
+        for package in packages:
+            for field in booleans:
+                package[field] = bool(package[field])
+
+        return packages
+
+    def count(self, **filters) -> int:
+        """
+        Counts the packages matching the filters.
+
+        Parameters:
+            filters: The filters the packages must match (see `__where__`).
+
+        Returns:
+            int: The number of matching packages.
+        """
+
+        where, parameters = self.__where__(**filters)
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            return int(connection.execute(f"SELECT COUNT(*) {FROM_PACKAGES} {where}", parameters).fetchone()[0])
+
+    def packages(self, custom_only: bool = False) -> List[MagicMirrorPackage]:
+        """
+        Reads the packages of the catalog, along with their install and upgrade state.
+
+        Parameters:
+            custom_only (bool): Whether to only read the custom packages.
+
+        Returns:
+            List[MagicMirrorPackage]: The packages of the catalog.
+        """
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            rows = connection.execute(f"{SELECT_PACKAGES} {'WHERE packages.is_custom = 1' if custom_only else ''} {ORDER_BY_PACKAGES}").fetchall()
+
+        packages: List[MagicMirrorPackage] = []
+
+        for row in rows:
+            package = MagicMirrorPackage(**dict(zip(COLUMNS, row)), is_installed=bool(row[-2]))
+            package.is_upgradable = bool(row[-1])
+            packages.append(package)
+
+        return packages
+
+    def add_custom_package(self, package: MagicMirrorPackage) -> bool:
+        """
+        Adds a custom package, unless a custom package with the same title (ignoring case) already exists.
+
+        Parameters:
+            package (MagicMirrorPackage): The custom package.
+
+        Returns:
+            bool: True if the package was added, False if the title is already taken.
+        """
+
+        with self.__transaction__() as connection:
+            if connection.execute("SELECT 1 FROM packages WHERE is_custom = 1 AND title = ? COLLATE NOCASE", (package.title,)).fetchone():
+                return False
+
+            self.__insert__(connection, [package], is_custom=True)
+
+        return True
+
+    def remove_custom_package(self, title: str) -> bool:
+        """
+        Removes the custom package(s) with the title.
+
+        Parameters:
+            title (str): The exact title of the custom package.
+
+        Returns:
+            bool: True if a package was removed, False if no custom package has the title.
+        """
+
+        with self.__transaction__() as connection:
+            return connection.execute("DELETE FROM packages WHERE is_custom = 1 AND title = ?", (title,)).rowcount > 0
+
+    def set_installed(self, packages: List[MagicMirrorPackage]) -> None:
+        """
+        Records which packages are installed. Nothing is written if the installed packages haven't changed.
+
+        Parameters:
+            packages (List[MagicMirrorPackage]): The installed packages.
+
+        Returns:
+            None
+        """
+
+        keys = {(repository.lower(), directory.lower()) for repository, directory in map(__key__, packages)}
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            current = {(repository.lower(), directory.lower()) for repository, directory in connection.execute("SELECT repository, directory FROM installed")}
+
+        if keys == current:
+            return
+
+        with self.__transaction__() as connection:
+            connection.execute("DELETE FROM installed")
+            connection.executemany("INSERT OR IGNORE INTO installed (repository, directory) VALUES (?, ?)", keys)
+
+    def set_upgradable(self, packages: List[MagicMirrorPackage], mmpm: bool = False, magicmirror: bool = False) -> None:
+        """
+        Records which packages, and whether MMPM and MagicMirror, have available upgrades.
+
+        Parameters:
+            packages (List[MagicMirrorPackage]): The packages with available upgrades.
+            mmpm (bool): Whether MMPM has an available upgrade.
+            magicmirror (bool): Whether MagicMirror has an available upgrade.
+
+        Returns:
+            None
+        """
+
+        with self.__transaction__() as connection:
+            self.__set_upgradable__(connection, packages, mmpm, magicmirror)
+
+    def upgradable(self) -> Dict[str, Any]:
+        """
+        Reads the available upgrades.
+
+        Parameters:
+            None
+
+        Returns:
+            Dict[str, Any]: Whether MMPM and MagicMirror have available upgrades, and the serialized packages with available upgrades.
+        """
+
+        with closing(self.__connect__(read_only=True)) as connection:
+            metadata = dict(connection.execute("SELECT key, value FROM metadata WHERE key IN ('mmpm_upgradable', 'magicmirror_upgradable')").fetchall())
+            rows = connection.execute(
+                f"""
+                SELECT {', '.join(f'packages.{column}' for column in COLUMNS)} FROM packages
+                JOIN upgradable ON upgradable.repository = packages.repository AND upgradable.directory = packages.directory
+                ORDER BY packages.is_custom, packages.id
+                """
+            ).fetchall()
+
+        return {
+            "mmpm": metadata.get("mmpm_upgradable") == "1",
+            "MagicMirror": metadata.get("magicmirror_upgradable") == "1",
+            "packages": [dict(zip(COLUMNS, row)) for row in rows],
+        }
@@ -2,21 +2,40 @@
 import datetime
 import json
 import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from pathlib import Path, PosixPath
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 from mmpm.constants import color, paths, urls
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.catalog import Catalog
+from mmpm.magicmirror.index import PackageIndex, tokenize
 from mmpm.magicmirror.package import MagicMirrorPackage
 from mmpm.singleton import Singleton
-from mmpm.utils import run_cmd
+from mmpm.utils import git_dir, git_remote_url, run_cmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
+# the C-based tree builder is several times faster than the pure Python one, which is noticeable on a Raspberry Pi.
+# find_spec is used so lxml is only imported when the wiki is actually parsed
+HTML_PARSER: str = "lxml" if find_spec("lxml") is not None else "html.parser"
+
+# matches elements with 'markdown-body' amongst their classes, ie. <div class="markdown-body px-4">
+MARKDOWN_BODY = re.compile(r"\bmarkdown-body\b")
+
+# the minimum number of seconds between two background refreshes of an expired database, so a long-lived process
+# (ie. the API) keeps refreshing it, without spawning a refresh on every load while the wiki is unreachable
+REFRESH_INTERVAL: int = 5 * 60
+
 
 class MagicMirrorDatabase(Singleton):
     """
@@ -30,37 +49,89 @@ class MagicMirrorDatabase(Singleton):
         self.last_update: datetime.datetime = None
         self.expiration_date: datetime.datetime = None
         self.categories: List[str] = None
+        self.index: PackageIndex = None
+        self.etag: str = ""
+        self.last_modified: str = ""
+        self.__last_refresh: Optional[float] = None
+        self.__stamp: Tuple = None
 
-    def __download_packages__(self) -> List[MagicMirrorPackage]:
+    def __download_packages__(self) -> Optional[List[MagicMirrorPackage]]:
         """
-        Scrapes the MagicMirror 3rd Party Wiki for all packages listed by community members.
+        Scrapes the MagicMirror 3rd Party Wiki for all packages listed by community members. If
+        the ETag and/or Last-Modified values of a previous response are known, a conditional request
+        is made, and the page is only downloaded and parsed if it has changed since then.
 
         Parameters:
             None
 
         Returns:
-            packages: List[MagicMirrorPackage] A list of MagicMirrorPackage objects extracted from the 3rd party wiki.
+            packages: Optional[List[MagicMirrorPackage]] A list of MagicMirrorPackage objects extracted from the 3rd party wiki,
+                      or None if the wiki has not been modified since the last download.
         """
 
         packages: List[MagicMirrorPackage] = []
+        headers: Dict[str, str] = {}
+
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
 
         try:
-            response = requests.get(urls.MAGICMIRROR_MODULES_URL, timeout=10)
+            response = requests.get(urls.MAGICMIRROR_MODULES_URL, headers=headers, timeout=10)
         except requests.exceptions.RequestException:
             logger.fatal("Unable to retrieve MagicMirror modules.")
+            return packages
+
+        if response.status_code == 304:
+            logger.debug(f"{urls.MAGICMIRROR_MODULES_URL} has not been modified since {self.last_modified or self.etag}")
+            return None
+
+        self.etag = response.headers.get("ETag", "")
+        self.last_modified = response.headers.get("Last-Modified", "")
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        table_soup = soup.find_all("table")
-        categories_soup = soup.find_all(attrs={"class": "markdown-body"})[0].find_all("h3")
+        return self.__parse_packages__(response.text)
+
+    def __parse_packages__(self, html: str, parser: str = HTML_PARSER) -> List[MagicMirrorPackage]:
+        """
+        Extracts the packages and categories from the HTML of the MagicMirror 3rd Party Wiki. When lxml is
+        the parser, the page is handed off to `__parse_packages_lxml__`. Otherwise, only the main 'markdown-body'
+        element of the page is parsed into a BeautifulSoup tree, which skips the markup GitHub wraps around
+        the wiki (navigation, scripts, sidebar, footer, etc).
+
+        Parameters:
+            html (str): The HTML of the 3rd party wiki page.
+            parser (str): The BeautifulSoup tree builder to use. Defaults to 'lxml' if it is installed, otherwise 'html.parser'.
+
+        Returns:
+            packages: List[MagicMirrorPackage] A list of MagicMirrorPackage objects extracted from the 3rd party wiki.
+        """
+
+        if parser == "lxml":
+            return self.__parse_packages_lxml__(html)
+
+        packages: List[MagicMirrorPackage] = []
+        soup = BeautifulSoup(html, parser, parse_only=SoupStrainer(attrs={"class": MARKDOWN_BODY}))
+        markdown_body = soup.find(class_=MARKDOWN_BODY)
+
+        if markdown_body is None:
+            logger.error("Unable to locate the package tables in the MagicMirror 3rd Party module wiki page.")
+            return packages
+
+        table_soup = markdown_body.find_all("table")
+        categories_soup = markdown_body.find_all("h3")
 
         self.categories = []
 
         for category in categories_soup[2:]:
             if hasattr(category, "contents"):
+                heading: Any = category.contents[-1]  # the heading's text, or the tag it's nested within
+
                 if hasattr(category.contents, "contents"):
-                    self.categories.append(category.contents[-1].contents[0])
+                    self.categories.append(heading.contents[0])
                 else:
-                    self.categories.append(category.contents[-1])
+                    self.categories.append(heading)
 
         # the first index is a row that literally says 'Title' 'Author' 'Description'
         tr_soup: list = [table.find_all("tr")[1:] for table in table_soup]
@@ -85,6 +156,58 @@ class MagicMirrorDatabase(Singleton):
 
         return packages
 
+    def __parse_packages_lxml__(self, html: str) -> List[MagicMirrorPackage]:
+        """
+        Extracts the packages and categories from the HTML of the MagicMirror 3rd Party Wiki using lxml
+        directly. Skipping the BeautifulSoup tree entirely is roughly an order of magnitude faster than
+        the 'html.parser' backend, and produces the same packages.
+
+        Parameters:
+            html (str): The HTML of the 3rd party wiki page.
+
+        Returns:
+            packages: List[MagicMirrorPackage] A list of MagicMirrorPackage objects extracted from the 3rd party wiki.
+        """
+
+        from lxml import html as lxml_html  # pylint: disable=import-outside-toplevel
+
+        packages: List[MagicMirrorPackage] = []
+        markdown_body = lxml_html.fromstring(html).xpath('(//*[contains(concat(" ", normalize-space(@class), " "), " markdown-body ")])[1]')
+
+        if not markdown_body:
+            logger.error("Unable to locate the package tables in the MagicMirror 3rd Party module wiki page.")
+            return packages
+
+        self.categories = []
+
+        for category in markdown_body[0].xpath(".//h3")[2:]:
+            if len(category) and category[-1].tail is not None:
+                self.categories.append(category[-1].tail)
+            else:
+                self.categories.append(category.text_content())
+
+        # the first index is a row that literally says 'Title' 'Author' 'Description'
+        tr_soup: list = [table.xpath(".//tr")[1:] for table in markdown_body[0].xpath(".//table")]
+
+        for index, row in enumerate(tr_soup):
+            for entry in row:
+                try:
+                    table_data: list = entry.xpath(".//td")
+
+                    if not table_data or not table_data[0].text_content() or table_data[0].text_content() == "mmpm":
+                        continue
+
+                    packages.append(MagicMirrorPackage.from_lxml_data(table_data, category=self.categories[index]))
+
+                except Exception as error:  # broad exception isn't best, but there's a lot that can happen here
+                    logger.error(
+                        "There may have been a breaking change in the layout of the MagicMirror 3rd Party module wiki page. Please create an issue on the MMPM's GitHub repository."
+                    )
+                    logger.error(f"{error}")
+                    continue
+
+        return packages
+
     def __discover_installed_packages__(self) -> List[MagicMirrorPackage]:
         """
         Discovers installed MagicMirror packages by scanning the modules directory.
@@ -102,31 +225,29 @@ class MagicMirrorDatabase(Singleton):
             logger.warning(f"{self.env.MMPM_MAGICMIRROR_ROOT.name}='{modules_dir}' does not exist")
             return []
 
-        package_directories: List[PosixPath] = [
-            directory for directory in modules_dir.iterdir() if directory.is_dir() and (directory / ".git").exists()
-        ]
+        packages_found: List[MagicMirrorPackage] = []
 
-        if not package_directories:
-            logger.debug(f"No packages found in {modules_dir}")
-            return []
+        # the Git config of each package is read directly, rather than spawning 'git' in each package directory
+        with os.scandir(modules_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
 
-        packages_found: List[MagicMirrorPackage] = []
+                package_dir = Path(entry.path)
 
-        for package_dir in package_directories:
-            os.chdir(package_dir)
-            error_code, remote_origin_url, _ = run_cmd(["git", "config", "--get", "remote.origin.url"], progress=False)
+                if git_dir(package_dir) is None:
+                    continue
 
-            if error_code:
-                logger.error(f"Unable to communicate with git server to retrieve information about {package_dir}")
-                continue
+                remote_origin_url = git_remote_url(package_dir)
 
-            error_code, project_name, _ = run_cmd(["basename", remote_origin_url.strip(), ".git"], progress=False)
+                if remote_origin_url is None:
+                    logger.error(f"Unable to determine repository origin for {package_dir}")
+                    continue
 
-            if error_code:
-                logger.error(f"Unable to determine repository origin for {project_name}")
-                continue
+                packages_found.append(MagicMirrorPackage(repository=remote_origin_url, directory=entry.name))
 
-            packages_found.append(MagicMirrorPackage(repository=remote_origin_url.strip(), directory=package_dir.name))
+        if not packages_found:
+            logger.debug(f"No packages found in {modules_dir}")
 
         return packages_found
 
@@ -143,22 +264,54 @@ class MagicMirrorDatabase(Singleton):
         """
 
         upgradable: List[MagicMirrorPackage] = []
+        installed: List[MagicMirrorPackage] = [package for package in self.packages if package.is_installed]
+
+        workers: int = max(1, self.env.MMPM_MAX_WORKERS.get())
+        timeout: int = self.env.MMPM_GIT_TIMEOUT.get() or None
+
+        logger.debug(f"Checking {len(installed)} package(s) for updates using {workers} worker(s)")
+
+        start: float = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(package.update, timeout) for package in installed]
+
+        try:
+            # results are collected in submission order so the output stays readable, even though
+            # the packages themselves are checked concurrently
+            for package, future in zip(installed, futures):
+                try:
+                    future.result()
+                except Exception as error:
+                    logger.error(f"Failed to check {package.title} for updates: {error}")
+                    package.is_upgradable = False
 
-        for package in filter(lambda pkg: pkg.is_installed, self.packages):
-            print(f"Retrieving: {package.repository} [{color.n_cyan(package.title)}]")
-            package.update()
+                print(f"Retrieved: {package.repository} [{color.n_cyan(package.title)}]")
 
-            if package.is_upgradable:
-                upgradable.append(package)
+                if package.is_upgradable:
+                    upgradable.append(package)
+        except KeyboardInterrupt:
+            logger.info("User killed process with CTRL-C")
 
-        configuration = self.upgradable()
+            for future in futures:
+                future.cancel()
 
-        configuration["MagicMirror"] = can_upgrade_magicmirror
-        configuration["mmpm"] = can_upgrade_mmpm
-        configuration["packages"] = [package.serialize() for package in upgradable]
+            executor.shutdown(wait=False)
+            sys.exit(127)
 
-        with open(paths.MMPM_AVAILABLE_UPGRADES_FILE, mode="w", encoding="utf-8") as upgrade_file:
-            json.dump(configuration, upgrade_file)
+        executor.shutdown(wait=True)
+
+        if installed:
+            # each check only asks the remote for the SHA of the tracked branch (see mmpm.utils.repo_up_to_date),
+            # so the time reported here is dominated by network latency rather than transfer size
+            print(f"Checked {len(installed)} package(s) for updates in {time.monotonic() - start:.2f}s")
+
+        self.write_upgradable(
+            {
+                "mmpm": can_upgrade_mmpm,
+                "MagicMirror": can_upgrade_magicmirror,
+                "packages": [package.serialize() for package in upgradable],
+            }
+        )
 
         return int(can_upgrade_mmpm) + int(can_upgrade_magicmirror) + len(upgradable)
 
@@ -177,6 +330,16 @@ class MagicMirrorDatabase(Singleton):
             "packages": len(self.packages),
         }
 
+    def is_stale(self) -> bool:
+        """
+        Checks if the database is older than the maximum age set by MMPM_DATABASE_MAX_AGE.
+
+        Returns:
+            bool: True if the database has expired, False otherwise, or if expiration is disabled.
+        """
+
+        return self.expiration_date is not None and datetime.datetime.now() >= self.expiration_date
+
     def is_initialized(self) -> bool:
         """
         Checks if the MagicMirror database has been initialized with packages.
@@ -190,36 +353,126 @@ class MagicMirrorDatabase(Singleton):
     def search(self, query: str, case_sensitive: bool = False, title_only: bool = False) -> List[MagicMirrorPackage]:
         """
         Searches the MagicMirror packages based on a query, with options for case sensitivity
-        and title-only search.
+        and title-only search. Searches are answered by the package index, so each term of the query
+        may be found anywhere within a word, every term must match, and title matches are ranked first.
+        Every package containing the query as a substring is matched by the index, unless the query has
+        no letters or digits, in which case the packages are scanned for it instead.
 
         Parameters:
             query (str): The search query.
             case_sensitive (bool): Whether the search is case sensitive.
-            title_only (bool): Whether to search only within titles.
+            title_only (bool): Whether to search only for packages with the exact title.
 
         Returns:
             List[MagicMirrorPackage]: A list of MagicMirrorPackage objects matching the search criteria.
         """
 
         query = query.strip()
+        index = self.__get_index__()
 
         if title_only:
-            if case_sensitive:
-                match = lambda query, pkg: query == pkg.title
-            else:
-                query = query.lower()
-                match = lambda query, pkg: query == pkg.title.lower()
+            return index.title(query, case_sensitive=case_sensitive)
+
+        # if the query matches one of the category names exactly, return everything in that category
+        if query in index.categories:
+            return index.category(query)
+
+        if case_sensitive:
+            terms = query.split()
+            match = lambda term, pkg: term in pkg.description or term in pkg.title or term in pkg.author
         else:
-            # if the query matches one of the category names exactly, return everything in that category
-            if query in self.categories:
-                return [package for package in self.packages if package.category == query]
-            elif case_sensitive:
-                match = lambda query, pkg: query in pkg.description or query in pkg.title or query in pkg.author
-            else:
-                query = query.lower()
-                match = lambda query, pkg: query in pkg.description.lower() or query in pkg.title.lower() or query in pkg.author.lower()
+            terms = query.lower().split()
+            match = lambda term, pkg: term in pkg.description.lower() or term in pkg.title.lower() or term in pkg.author.lower()
+
+        results = index.search(query)
+
+        if case_sensitive:
+            results = [package for package in results if all(match(term, package) for term in terms)]
+
+        # the index matches every package containing the query, unless the query has no terms (ie. '-')
+        if not tokenize(query):
+            query = query if case_sensitive else query.lower()
+            results = [package for package in self.packages if match(query, package)]
+
+        return results
+
+    def titles(self, catalog_only: bool = False) -> List[Tuple[str, bool]]:
+        """
+        Retrieves the title of each package, and whether it's installed. If the database hasn't been loaded,
+        and the catalog is current, only the needed columns are read from the catalog, which is much faster
+        than loading the database, since no MagicMirrorPackage objects are created.
+
+        Parameters:
+            catalog_only (bool): If True, the database is never loaded (which may download or refresh it), and
+                no titles are returned unless it's already loaded, or the catalog is current, ie. for shell completion.
+
+        Returns:
+            List[Tuple[str, bool]]: The title of each package, and whether it's installed.
+        """
+
+        db_file = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE
+        catalog = Catalog()
+
+        if not self.is_initialized() and db_file.exists() and db_file.stat().st_size and catalog.is_current(db_file):
+            # packages are considered equal by their repository and directory, so the same is done here
+            installed = {(package.repository.lower(), package.directory.name.lower()) for package in self.__discover_installed_packages__()}
+            rows = catalog.rows("title", "repository", "directory")
+
+            return [(title, (repository.strip().lower(), directory.strip().lower()) in installed) for title, repository, directory in rows]
+
+        if not self.is_initialized():
+            if catalog_only:
+                return []
+
+            self.load()
+
+        return [(package.title, package.is_installed) for package in self.packages]
+
+    def lookup(self, title: str = None, repository: str = None, directory: str = None, category: str = None) -> List[MagicMirrorPackage]:
+        """
+        Finds packages by exact (case-insensitive) title, repository URL, or directory name, or by exact
+        category, using the lookup tables of the package index rather than scanning the packages. Only the
+        first of the provided keys is used.
+
+        Parameters:
+            title (str): The title of the package(s).
+            repository (str): The repository URL of the package(s). Different spellings of the same URL are considered equal.
+            directory (str): The name of the directory of the package(s) within the MagicMirror modules directory.
+            category (str): The exact name of the category of the package(s).
+
+        Returns:
+            List[MagicMirrorPackage]: The matching packages.
+        """
+
+        index = self.__get_index__()
 
-        return [package for package in self.packages if match(query, package)]
+        if title is not None:
+            return index.title(title)
+        elif repository is not None:
+            return index.repository(repository)
+        elif directory is not None:
+            return index.directory(directory)
+        elif category is not None:
+            return index.category(category)
+
+        return []
+
+    def __get_index__(self) -> PackageIndex:
+        """
+        Returns the index of the packages. It's built during 'load', but the packages may have been replaced
+        without calling 'load' (ie. by the API or tests), in which case the index is rebuilt.
+
+        Parameters:
+            None
+
+        Returns:
+            PackageIndex: The index of the current packages.
+        """
+
+        if self.index is None or self.index.packages is not self.packages:
+            self.index = PackageIndex(self.packages or [])
+
+        return self.index
 
     def load(self, update: bool = False) -> bool:
         """
@@ -232,6 +485,16 @@ class MagicMirrorDatabase(Singleton):
         Returns:
             bool: True if successful, False otherwise.
         """
+
+        # the packages are cached until one of the files they're loaded from, or the modules directory, changes
+        if not update and self.packages and self.__stamp is not None and self.__stamp == self.__get_stamp__():
+            logger.debug("Using cached packages")
+
+            if self.is_stale():
+                self.__refresh_in_background__()
+
+            return True
+
         self.packages = []  # this is really related to the API, needing to clear the list out
 
         db_file = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE
@@ -239,47 +502,208 @@ class MagicMirrorDatabase(Singleton):
         db_last_update = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE
 
         should_update = update or not db_exists or not db_last_update.exists() or not db_last_update.stat().st_size
+        metadata: Dict[str, str] = self.__read_last_update__() if db_exists else {}
+
+        # the cache validators are only useful if there's a cached copy of the database to fall back on
+        self.etag = metadata.get("etag", "")
+        self.last_modified = metadata.get("last_modified", "")
 
         if should_update:
             print(f"Retrieving: {urls.MAGICMIRROR_MODULES_URL} [{color.n_cyan('3rd Party Modules')}]")
-            self.packages = self.__download_packages__()
+            packages = self.__download_packages__()
+
+            if packages is None:
+                logger.debug(f"Using cached copy of {db_file}")
+                self.packages = []
+                self.__write_last_update__()
+            elif packages:
+                self.packages = packages
 
-            if self.packages:
-                with open(db_file, "w", encoding="utf-8") as db:
+                # written to a temporary file first, so a concurrent reader (ie. a background refresh) never sees a partial file
+                db_tmp_file = db_file.with_suffix(f".{os.getpid()}.tmp")
+
+                with open(db_tmp_file, "w", encoding="utf-8") as db:
                     json.dump(self.packages, db, default=lambda package: package.serialize())
 
-                with open(db_last_update, "w", encoding="utf-8") as last_update_file:
-                    self.last_update = datetime.datetime.now()
-                    json.dump(
-                        {"last_update": str(self.last_update.replace(microsecond=0))},
-                        last_update_file,
-                    )
+                os.replace(db_tmp_file, db_file)
+
+                self.__write_last_update__()
             else:
                 logger.error(f"Failed to retrieve packages from {urls.MAGICMIRROR_MODULES_URL}. Please check your internet connection.")
 
         else:
-            with open(db_last_update, mode="r", encoding="utf-8") as db_last_update_file:
-                self.last_update = json.load(db_last_update_file)["last_update"]
+            self.last_update = self.__parse_last_update__(metadata.get("last_update", ""))
+
+        max_age: int = self.env.MMPM_DATABASE_MAX_AGE.get()
+        self.expiration_date = self.last_update + datetime.timedelta(hours=max_age) if max_age > 0 and self.last_update else None
+
+        if not should_update and self.is_stale():
+            # serve the cached copy now, and let a detached process refresh it for next time (stale-while-revalidate)
+            self.__refresh_in_background__()
+
+        catalog = Catalog()
+        db_exists = db_file.exists() and bool(db_file.stat().st_size)
+
+        # packages are hashed by repository and directory, so each membership test is constant time
+        discovered_packages: Set[MagicMirrorPackage] = set(self.__discover_installed_packages__())
+
+        try:
+            # the catalog is rebuilt whenever the JSON database changes (ie. after downloading the packages)
+            if db_exists and not catalog.is_current(db_file):
+                if not self.packages:
+                    with open(db_file, mode="r", encoding="utf-8") as db:
+                        self.packages = [MagicMirrorPackage(**package) for package in json.load(db)]
 
-        if not self.packages and db_exists:
-            self.packages = []
+                catalog.write(self.packages, db_file)
 
-            with open(db_file, mode="r", encoding="utf-8") as db:
-                packages = json.load(db)
-                self.packages = [MagicMirrorPackage(**package) for package in packages]
+            catalog.set_installed(list(discovered_packages))
 
-        self.packages.extend(self.custom_packages())
+            # the packages of the 3rd party wiki, followed by the custom packages
+            self.packages = catalog.packages()
 
-        self.categories = list({package.category for package in self.packages})
-        discovered_packages: List[MagicMirrorPackage] = self.__discover_installed_packages__()
+        except sqlite3.Error as error:
+            logger.error(f"Unable to read packages from {catalog.path}: {error}")
 
-        if discovered_packages:
-            for package in self.packages:  # type: ignore
-                if package in discovered_packages:  # (mypy thinks 'package' is a Dict[str, str])
-                    package.is_installed = True  # type: ignore
+            if not self.packages and db_exists:
+                with open(db_file, mode="r", encoding="utf-8") as db:
+                    self.packages = [MagicMirrorPackage(**package) for package in json.load(db)]
+
+        self.index = PackageIndex(self.packages)
+        self.categories = list(self.index.categories)
+
+        for package in self.packages:  # type: ignore
+            package.is_installed = package in discovered_packages  # (mypy thinks 'package' is a Dict[str, str])
+
+        # taken last, so the writes made while loading don't invalidate the cache
+        self.__stamp = self.__get_stamp__()
 
         return bool(len(self.packages))
 
+    def __get_stamp__(self) -> Tuple:
+        """
+        Collects the modification times of the files the packages are loaded from, and of the MagicMirror
+        modules directory (which changes when packages are installed or removed). If none of them have
+        changed, the packages loaded previously are still current.
+
+        Parameters:
+            None
+
+        Returns:
+            Tuple: The paths and their modification times (None for paths that don't exist).
+        """
+
+        catalog_file = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE
+
+        watched = (
+            paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE,
+            paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE,
+            catalog_file,
+            catalog_file.with_name(f"{catalog_file.name}-wal"),  # writes to the catalog land here first
+            self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules",
+        )
+
+        stamp = []
+
+        for path in watched:
+            try:
+                stamp.append((str(path), os.stat(path).st_mtime_ns))
+            except OSError:
+                stamp.append((str(path), None))
+
+        return tuple(stamp)
+
+    def __read_last_update__(self) -> Dict[str, str]:
+        """
+        Reads the metadata stored alongside the database, which includes the time of the last
+        update, and the HTTP cache validators (ETag/Last-Modified) of the 3rd party wiki.
+
+        Parameters:
+            None
+
+        Returns:
+            Dict[str, str]: The metadata, or an empty dictionary if the file is missing or invalid.
+        """
+
+        db_last_update = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE
+
+        if not db_last_update.exists() or not db_last_update.stat().st_size:
+            return {}
+
+        with open(db_last_update, mode="r", encoding="utf-8") as db_last_update_file:
+            try:
+                metadata: Dict[str, str] = json.load(db_last_update_file)
+                return metadata
+            except json.JSONDecodeError:
+                logger.warning(f"Encountered error when reading from {db_last_update}. Ignoring contents.")
+                return {}
+
+    def __parse_last_update__(self, last_update: str) -> datetime.datetime:
+        """
+        Converts the stored time of the last database update to a datetime object.
+
+        Parameters:
+            last_update (str): The time of the last update, ie. '2024-01-01 12:00:00'
+
+        Returns:
+            datetime.datetime: The time of the last update, or datetime.min if it could not be parsed (forcing a refresh).
+        """
+
+        try:
+            return datetime.datetime.fromisoformat(last_update)
+        except (TypeError, ValueError):
+            logger.debug(f"Unable to parse last update time of '{last_update}'")
+            return datetime.datetime.min
+
+    def __refresh_in_background__(self) -> None:
+        """
+        Spawns a detached `mmpm db --refresh` process to download a fresh copy of the database,
+        without making the caller wait for it. At most one refresh is started every REFRESH_INTERVAL seconds.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        now = time.monotonic()
+
+        if self.__last_refresh is not None and now - self.__last_refresh < REFRESH_INTERVAL:
+            return
+
+        self.__last_refresh = now
+        logger.debug(f"Database expired on {self.expiration_date}. Refreshing in the background.")
+        run_cmd([sys.executable, "-m", "mmpm.entrypoint", "db", "--refresh"], background=True)
+
+    def __write_last_update__(self) -> None:
+        """
+        Stores the current time as the last update of the database, along with the HTTP cache
+        validators (ETag/Last-Modified) of the most recent response from the 3rd party wiki.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        self.last_update = datetime.datetime.now().replace(microsecond=0)
+
+        db_last_update = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE
+        db_last_update_tmp = db_last_update.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(db_last_update_tmp, "w", encoding="utf-8") as last_update_file:
+            json.dump(
+                {
+                    "last_update": str(self.last_update),
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                },
+                last_update_file,
+            )
+
+        os.replace(db_last_update_tmp, db_last_update)
+
     def custom_packages(self) -> List[MagicMirrorPackage]:
         """
         Retrieves custom MagicMirror packages added by the user.
@@ -288,26 +712,41 @@ class MagicMirrorDatabase(Singleton):
             List[MagicMirrorPackage]: A list of custom MagicMirrorPackage objects.
         """
 
-        data: List[Dict[str, str]] = []
-        packages: List[MagicMirrorPackage] = []
-        db_custom_pkgs_file = paths.MMPM_CUSTOM_PACKAGES_FILE
+        try:
+            return Catalog().packages(custom_only=True)
+        except sqlite3.Error as error:
+            logger.error(f"Unable to read custom packages: {error}")
+            return []
 
-        if not db_custom_pkgs_file.stat().st_size == 0:
-            with open(db_custom_pkgs_file, mode="r+", encoding="utf-8") as custom_pkgs:
-                try:
-                    data = json.load(custom_pkgs)
-                except json.decoder.JSONDecodeError:
-                    logger.error(f"{db_custom_pkgs_file} has an invalid layout. Recreating file.")
-                    json.dump(data, custom_pkgs)
-                    data = []
+    def serialized(self, offset: int = 0, limit: int = None, fields: List[str] = None, **filters) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Retrieves the packages, along with their install and upgrade state, serialized as with
+        `MagicMirrorPackage.serialize(full=True)`. The packages are read from the package catalog, which
+        is brought up to date first, and no MagicMirrorPackage objects are created.
 
-        for package in data:
-            try:
-                packages.append(MagicMirrorPackage(**package))  # type: ignore
-            except Exception as error:
-                logger.debug(f"Unable to parse custom package: {error}")
+        Parameters:
+            offset (int): The number of matching packages to skip.
+            limit (int): The maximum number of packages to retrieve. No limit if None.
+            fields (List[str]): The fields of each package to retrieve. All fields if None.
+            filters: The category, installed, upgradable, and query filters the packages must match (see `Catalog.serialized`).
 
-        return packages
+        Returns:
+            Optional[Tuple[int, List[Dict[str, Any]]]]: The total number of matching packages, and the requested
+                                                        page of serialized packages, or None if the database is unavailable.
+        """
+
+        catalog = Catalog()
+
+        try:
+            # brings the catalog, and the install state within it, up to date (unless nothing has changed)
+            if not self.load():
+                return None
+
+            return catalog.count(**filters), catalog.serialized(offset=offset, limit=limit, fields=fields, **filters)
+
+        except sqlite3.Error as error:
+            logger.error(f"Unable to read packages from {catalog.path}: {error}")
+            return None
 
     def upgradable(self) -> Dict[str, Any]:
         """
@@ -316,24 +755,32 @@ class MagicMirrorDatabase(Singleton):
         Returns:
             Dict[str, Any]: A dictionary containing information about upgradable items.
         """
-        reset_file: bool = False
-        upgrades_file = paths.MMPM_AVAILABLE_UPGRADES_FILE
 
-        with open(upgrades_file, "r", encoding="utf-8") as upgradable:
-            try:
-                upgrades: dict = json.load(upgradable)
-            except json.JSONDecodeError:
-                logger.warning(f"Encountered error when reading from {upgrades_file}. Resetting file.")
-                reset_file = True
+        try:
+            return Catalog().upgradable()
+        except sqlite3.Error as error:
+            logger.error(f"Unable to read available upgrades: {error}")
+            return {"mmpm": False, "MagicMirror": False, "packages": []}
 
-        if not reset_file:
-            return upgrades
+    def write_upgradable(self, upgradable: Dict[str, Any]) -> None:
+        """
+        Saves the upgradable MagicMirror packages and applications.
 
-        with open(upgrades_file, "w", encoding="utf-8") as upgradable:
-            upgrades = {"mmpm": False, "MagicMirror": False, "packages": []}
-            json.dump(upgrades, upgradable)
+        Parameters:
+            upgradable (Dict[str, Any]): Whether MMPM and MagicMirror are upgradable, and the serialized upgradable packages.
 
-        return upgrades
+        Returns:
+            None
+        """
+
+        try:
+            Catalog().set_upgradable(
+                [MagicMirrorPackage(**package) for package in upgradable.get("packages", [])],
+                mmpm=bool(upgradable.get("mmpm")),
+                magicmirror=bool(upgradable.get("MagicMirror")),
+            )
+        except sqlite3.Error as error:
+            logger.error(f"Failed to save available upgrades: {error}")
 
     def add_mm_pkg(self, title: str, author: str, repository: str, description: str = None) -> bool:
         """
@@ -353,38 +800,20 @@ class MagicMirrorDatabase(Singleton):
             title=title,
             author=author,
             repository=repository,
-            description=description,
+            description=description or "",
             category="Custom Packages",
         )
 
         package.directory = Path(package.repository.split("/")[-1].replace(".git", ""))
 
         try:
-            ext_pkgs_file = paths.MMPM_CUSTOM_PACKAGES_FILE
-
-            if ext_pkgs_file.exists() and ext_pkgs_file.stat().st_size:
-                custom_packages = []
-
-                with open(ext_pkgs_file, "r", encoding="utf-8") as mm_ext_pkgs:
-                    custom_packages = json.load(mm_ext_pkgs)
-
-                existing_packages = [pkg.get("title").lower() for pkg in custom_packages]
-
-                if package.title.lower() in existing_packages:
-                    logger.error(f"A package with named {package.title} is already registered as an Custom Package")
-                    return False
-
-                with open(ext_pkgs_file, "w", encoding="utf-8") as mm_ext_pkgs:
-                    custom_packages.append(package.serialize())
-                    json.dump(custom_packages, mm_ext_pkgs)
-            else:
-                # if file didn't exist previously, or it was empty, this is the first custom package that's been added
-                with open(ext_pkgs_file, "w", encoding="utf-8") as mm_ext_pkgs:
-                    json.dump([package.serialize()], mm_ext_pkgs)
+            if not Catalog().add_custom_package(package):
+                logger.error(f"A package with named {package.title} is already registered as an Custom Package")
+                return False
 
             print(color.n_green(f"\nSuccessfully added {package.title} to 'Custom Packages'\n"))
 
-        except IOError as error:
+        except sqlite3.Error as error:
             logger.error(f"Failed to save custom module: {error}")
             return False
 
@@ -392,8 +821,7 @@ class MagicMirrorDatabase(Singleton):
 
     def remove_mm_pkg(self, title: str = None) -> bool:
         """
-        Allows user to remove an Custom Package from the data saved in
-        ~/.config/mmpm/mmpm-custom-packages.json
+        Allows user to remove a Custom Package from the package catalog
 
         Parameters:
             title (str): Custom package title
@@ -402,33 +830,13 @@ class MagicMirrorDatabase(Singleton):
             success (bool): True on success, False on error
         """
 
-        file = paths.MMPM_CUSTOM_PACKAGES_FILE
-
-        packages: List[MagicMirrorPackage] = []
-
-        with open(file, "r", encoding="utf-8") as custom_pkgs:
-            data = json.load(custom_pkgs)
-
-            if not data:
-                logger.fatal("No custom packages found in database")
-                return False
-
-            try:
-                packages = [MagicMirrorPackage(**package) for package in data]
-            except Exception as error:
-                logger.debug(f"Unable to parse custom package: {error}")
-                packages = []
-
-            try:
-                match: MagicMirrorPackage = next(filter(lambda pkg: pkg.title == title, packages))
-            except StopIteration:
+        try:
+            if not Catalog().remove_custom_package(title):
                 logger.error(f"Unable to locate Custom Package named '{color.n_green(title)}'")
                 return False
 
-        if match:
-            packages.remove(match)
-
-        with open(file, "w", encoding="utf-8") as custom_pkgs:
-            json.dump([package.serialize() for package in packages], custom_pkgs)
+        except sqlite3.Error as error:
+            logger.error(f"Failed to remove custom module: {error}")
+            return False
 
         return True
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+from mmpm.magicmirror.package import MagicMirrorPackage
+
+# terms are the runs of letters and digits in the lowercase text, ie. 'MMM-Weather' -> 'mmm', 'weather'
+TERM = re.compile(r"[^\W_]+")
+
+# how much a match within each field contributes to the rank of a package, so title hits rank above author hits, etc
+FIELD_WEIGHTS: Dict[str, int] = {"title": 4, "author": 2, "description": 1}
+
+# how much the way a query term matches a term multiplies the weight of the field, ie. 'weather' matches the whole
+# of 'weather', the prefix of 'weatherby', and the inside of 'openweathermap'
+TERM_BONUSES: Dict[str, int] = {"whole": 4, "prefix": 2, "infix": 1}
+
+
+def normalize_repository(repository: str) -> str:
+    """
+    Reduces a repository URL to a canonical, lowercase 'host/owner/name' form, so the different ways of
+    writing the same repository are considered equal, ie. 'git@github.com:Owner/Name.git' and
+    'https://github.com/owner/name/' are both 'github.com/owner/name'.
+
+    Parameters:
+        repository (str): The repository URL.
+
+    Returns:
+        str: The normalized repository URL.
+    """
+
+    normalized = repository.strip().lower()
+    normalized = re.sub(r"^[a-z+]+://", "", normalized)  # scheme, ie. https://, ssh://, git+ssh://
+    normalized = re.sub(r"^[^@/]+@", "", normalized)  # user, ie. git@
+    normalized = re.sub(r"^([^/:]+):(?!\d+/)", r"\1/", normalized)  # scp-like syntax, ie. github.com:owner/name
+    normalized = normalized.rstrip("/")
+
+    return normalized[: -len(".git")] if normalized.endswith(".git") else normalized
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits the text into lowercase search terms.
+
+    Parameters:
+        text (str): The text to split.
+
+    Returns:
+        List[str]: The terms found in the text.
+    """
+
+    return TERM.findall(text.lower())
+
+
+class PackageIndex:
+    """
+    An inverted index of the MagicMirror packages. Each lowercase term found in the title, author, or
+    description of a package is mapped to the packages containing it, which allows for ranked searches
+    that only scan the distinct terms, rather than every package, on every query. The packages are also
+    mapped by title, repository, directory, and category, for constant time lookups.
+
+    Attributes:
+        packages (List[MagicMirrorPackage]): The indexed packages. The position of a package is its id within the index.
+        postings (Dict[str, Dict[int, int]]): Maps each term to the ids of the packages containing it, and the weight of the best field it appeared in.
+        terms (List[str]): The sorted terms of the index, scanned for the terms containing each query term.
+        titles (Dict[str, List[int]]): Maps each lowercase title to the ids of the packages with that title.
+        repositories (Dict[str, List[int]]): Maps each normalized repository URL to the ids of the packages with that repository.
+        directories (Dict[str, List[int]]): Maps each lowercase directory name to the ids of the packages with that directory.
+        categories (Dict[str, List[int]]): Maps each category to the ids of the packages within it.
+    """
+
+    def __init__(self, packages: List[MagicMirrorPackage]):
+        self.packages = packages
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.titles: Dict[str, List[int]] = defaultdict(list)
+        self.repositories: Dict[str, List[int]] = defaultdict(list)
+        self.directories: Dict[str, List[int]] = defaultdict(list)
+        self.categories: Dict[str, List[int]] = defaultdict(list)
+
+        for package_id, package in enumerate(packages):
+            self.titles[package.title.lower()].append(package_id)
+            self.repositories[normalize_repository(package.repository)].append(package_id)
+            self.directories[package.directory.name.lower()].append(package_id)
+            self.categories[package.category].append(package_id)
+
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(getattr(package, field)):
+                    postings = self.postings[term]
+                    postings[package_id] = max(postings.get(package_id, 0), weight)
+
+        self.terms: List[str] = sorted(self.postings)
+
+    def __expand__(self, query_term: str) -> List[str]:
+        """
+        Finds all the terms of the index containing the query term, ie. 'weather' is found within
+        'openweathermap' and 'currentweather', as well as 'weather'.
+
+        Parameters:
+            query_term (str): The term of a query.
+
+        Returns:
+            List[str]: The matching terms.
+        """
+
+        return [term for term in self.terms if query_term in term]
+
+    def search(self, query: str) -> List[MagicMirrorPackage]:
+        """
+        Finds the packages matching every term of the query, where each query term may be found anywhere
+        within a term of the title, author, or description of a package. Results are ranked by the fields
+        matched (title, then author, then description), with whole term matches ranked above prefix matches,
+        and prefix matches above matches within a term. Packages with the same rank are kept in their
+        original order.
+
+        Parameters:
+            query (str): The search query.
+
+        Returns:
+            List[MagicMirrorPackage]: The matching packages, ordered by rank.
+        """
+
+        scores: Dict[int, int] = {}
+
+        for position, query_term in enumerate(tokenize(query)):
+            term_scores: Dict[int, int] = {}
+
+            for term in self.__expand__(query_term):
+                bonus = TERM_BONUSES["whole" if term == query_term else "prefix" if term.startswith(query_term) else "infix"]
+
+                for package_id, weight in self.postings[term].items():
+                    term_scores[package_id] = max(term_scores.get(package_id, 0), weight * bonus)
+
+            # every term of the query must match, so only the packages matched by all previous terms are kept
+            if position:
+                scores = {package_id: score + term_scores[package_id] for package_id, score in scores.items() if package_id in term_scores}
+            else:
+                scores = term_scores
+
+            if not scores:
+                break
+
+        return [self.packages[package_id] for package_id in sorted(scores, key=lambda package_id: (-scores[package_id], package_id))]
+
+    def title(self, title: str, case_sensitive: bool = False) -> List[MagicMirrorPackage]:
+        """
+        Finds the packages with exactly the given title.
+
+        Parameters:
+            title (str): The title of the package(s).
+            case_sensitive (bool): Whether the title must match case.
+
+        Returns:
+            List[MagicMirrorPackage]: The packages with the title.
+        """
+
+        packages = [self.packages[package_id] for package_id in self.titles.get(title.lower(), [])]
+        return [package for package in packages if package.title == title] if case_sensitive else packages
+
+    def repository(self, repository: str) -> List[MagicMirrorPackage]:
+        """
+        Finds the packages with the given repository, regardless of how the URL is written.
+
+        Parameters:
+            repository (str): The repository URL of the package(s).
+
+        Returns:
+            List[MagicMirrorPackage]: The packages with the repository.
+        """
+
+        return [self.packages[package_id] for package_id in self.repositories.get(normalize_repository(repository), [])]
+
+    def directory(self, directory: str) -> List[MagicMirrorPackage]:
+        """
+        Finds the packages installed to, or that would be installed to, the given directory name.
+
+        Parameters:
+            directory (str): The name of the directory within the MagicMirror modules directory.
+
+        Returns:
+            List[MagicMirrorPackage]: The packages with the directory.
+        """
+
+        return [self.packages[package_id] for package_id in self.directories.get(directory.lower(), [])]
+
+    def category(self, category: str) -> List[MagicMirrorPackage]:
+        """
+        Finds the packages within the given category.
+
+        Parameters:
+            category (str): The exact name of the category.
+
+        Returns:
+            List[MagicMirrorPackage]: The packages within the category.
+        """
+
+        return [self.packages[package_id] for package_id in self.categories.get(category, [])]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Bare mirrors of the repositories of packages (see MMPM_REPOSITORY_MIRRORS). Packages are cloned and fetched from
+the mirror of their repository rather than the remote, and only the mirror is fetched from the remote. Removing a
+package leaves its mirror behind, so a package which is installed again shortly after being removed is cloned
+without any network transfer at all.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from re import sub
+from typing import Dict, List, Optional
+
+from mmpm.constants import paths
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.utils import run_cmd
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+# the number of seconds a mirror is considered current after it was fetched, so installing a package again
+# within this time doesn't contact the remote
+MIRROR_MAX_AGE: int = 60 * 60
+
+# written within the mirror each time it's fetched from the remote
+FETCH_STAMP_FILE: str = "mmpm-last-fetch"
+
+
+class RepositoryMirror:
+    """
+    The bare mirror of a repository, which holds every branch and tag of the remote. Packages are redirected to
+    the mirror for a single git command (see `redirect`), so the 'origin' of each package remains the URL of the
+    remote, and each package keeps its own objects (the mirror may be removed at any time).
+
+    Attributes:
+        repository (str): The URL of the remote repository.
+        path (Path): The location of the mirror.
+    """
+
+    # a mirror is only changed by one thread at a time, ie. when two packages share a repository
+    __locks: Dict[Path, threading.Lock] = {}
+    __locks_lock = threading.Lock()
+
+    def __init__(self, repository: str, mirrors_dir: Path = None):
+        self.repository = repository
+
+        name = sub(r"\.git$", "", repository.rstrip("/").rsplit("/", 1)[-1])
+        digest = hashlib.sha256(repository.encode("utf-8")).hexdigest()[:12]
+        self.path = (mirrors_dir or paths.MMPM_MIRRORS_DIR) / f"{name}-{digest}.git"
+
+    def __lock__(self) -> threading.Lock:
+        with self.__locks_lock:
+            return self.__locks.setdefault(self.path, threading.Lock())
+
+    def __create__(self, source: str, progress: bool) -> bool:
+        """
+        Creates the mirror by cloning the source (the remote, or an installed package) into a temporary
+        directory, which is moved into place once complete.
+        """
+
+        tmp_dir = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        error_code, _, stderr = run_cmd(
+            [
+                "git",
+                "clone",
+                "--bare",
+                # allows packages to be cloned from the mirror with MMPM_CLONE_STRATEGY=blobless
+                "--config",
+                "uploadpack.allowFilter=true",
+                source,
+                str(tmp_dir),
+            ],
+            progress=progress,
+            message="Mirroring",
+            cwd=self.path.parent,
+        )
+
+        # a bare clone doesn't fetch the branches of the remote afterwards, unless told to
+        if not error_code:
+            error_code, _, stderr = run_cmd(["git", "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"], progress=False, cwd=tmp_dir)
+
+        if not error_code and source != self.repository:
+            error_code, _, stderr = run_cmd(["git", "remote", "set-url", "origin", self.repository], progress=False, cwd=tmp_dir)
+
+        try:
+            if not error_code:
+                os.rename(tmp_dir, self.path)
+                return True
+        except OSError as error:
+            stderr = str(error)
+
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.warning(f"Unable to mirror {self.repository} in '{self.path}': {stderr}")
+        return False
+
+    def exists(self) -> bool:
+        """
+        Checks if the mirror has been created.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the mirror exists, False otherwise.
+        """
+
+        return (self.path / "HEAD").exists()
+
+    def age(self) -> float:
+        """
+        The number of seconds since the mirror was last fetched from the remote.
+
+        Parameters:
+            None
+
+        Returns:
+            float: The age of the mirror, or infinity if it has never been fetched.
+        """
+
+        try:
+            return time.time() - (self.path / FETCH_STAMP_FILE).stat().st_mtime
+        except OSError:
+            return float("inf")
+
+    def update(self, progress: bool = True, max_age: int = MIRROR_MAX_AGE) -> bool:
+        """
+        Creates the mirror, or fetches the latest changes of the remote into it, unless it was fetched within
+        the last `max_age` seconds.
+
+        Parameters:
+            progress (bool): If True, displays a spinner while the remote is contacted.
+            max_age (int): The number of seconds since the last fetch before the mirror is fetched again.
+
+        Returns:
+            bool: True if the mirror is current, False if the remote couldn't be reached.
+        """
+
+        with self.__lock__():
+            if self.exists() and self.age() < max_age:
+                logger.debug(f"Mirror of {self.repository} in '{self.path}' was fetched {self.age():.0f}s ago")
+                return True
+
+            if self.exists():
+                error_code, _, stderr = run_cmd(["git", "fetch", "--prune", "origin"], progress=progress, message="Updating mirror", cwd=self.path)
+
+                if error_code:
+                    logger.warning(f"Unable to update the mirror of {self.repository} in '{self.path}': {stderr}")
+                    return False
+
+            elif not self.__create__(self.repository, progress):
+                return False
+
+            (self.path / FETCH_STAMP_FILE).touch()
+            return True
+
+    def seed(self, directory: Path) -> bool:
+        """
+        Creates the mirror from an installed package (ie. before it's removed), which must be a complete
+        clone of the repository. The mirror is considered as current as the package.
+
+        Parameters:
+            directory (Path): The directory of the package.
+
+        Returns:
+            bool: True if the mirror was created (or existed already), False otherwise.
+        """
+
+        with self.__lock__():
+            if not self.exists() and not self.__create__(str(directory), progress=False):
+                return False
+
+            (self.path / FETCH_STAMP_FILE).touch()
+            return True
+
+    def redirect(self, url: Optional[str] = None) -> List[str]:
+        """
+        The options which redirect a git command from the remote to the mirror, ie. `git <options> clone
+        <repository> <directory>`. The URL of the remote is still recorded as the 'origin' of a clone.
+
+        Parameters:
+            url (Optional[str]): The URL the command refers to the remote by, if not the `repository`, ie. the
+                'origin' of a package cloned before its mirror existed.
+
+        Returns:
+            List[str]: The options, given to 'git' before the command.
+        """
+
+        return ["-c", f"url.{self.path.as_uri()}.insteadOf={url or self.repository}"]
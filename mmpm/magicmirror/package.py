@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import datetime
+import hashlib
 import json
-import os
+import platform
+import shutil
 import sys
+import threading
+import time
 from multiprocessing import cpu_count
 from pathlib import Path, PosixPath
 from re import sub
 from textwrap import fill
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 from bs4 import NavigableString, Tag
@@ -15,10 +19,51 @@ from bs4 import NavigableString, Tag
 from mmpm.constants import color
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
-from mmpm.utils import repo_up_to_date, run_cmd, safe_get_request
+from mmpm.magicmirror.cache import BuildCache
+from mmpm.magicmirror.mirror import MIRROR_MAX_AGE, RepositoryMirror
+from mmpm.magicmirror.store import DependencyStore
+from mmpm.utils import git_config, git_dir, git_remote_url, human_readable_size, repo_up_to_date, run_cmd, safe_get_request
 
 NA: str = "N/A"
 
+# the arguments given to 'git clone' for each MMPM_CLONE_STRATEGY. A shallow clone implies --single-branch,
+# and a blobless clone retrieves the contents of files (of older commits) from the remote only when needed
+CLONE_STRATEGIES: Dict[str, List[str]] = {
+    "full": [],
+    "shallow": ["--depth", "1"],
+    "blobless": ["--filter=blob:none"],
+    "single-branch": ["--single-branch"],
+}
+
+# the strategy a package was cloned with is recorded in its Git config, ie. `git config mmpm.cloneStrategy`
+CLONE_STRATEGY_KEY: str = "mmpm.cloneStrategy"
+
+# the files read by each dependency installer, the commands reporting the version of its toolchain, and the
+# directories it creates. When none of these have changed since the last successful install (according to the
+# build stamp kept within the package's Git directory), the dependencies are not installed again
+DEPENDENCY_MANIFESTS: Dict[str, List[str]] = {
+    "npm": ["package.json", "package-lock.json", "npm-shrinkwrap.json"],
+    "bundle": ["Gemfile", "Gemfile.lock"],
+    "pip": ["requirements.txt"],
+}
+
+TOOLCHAINS: Dict[str, List[List[str]]] = {
+    "npm": [["node", "--version"], ["npm", "--version"]],
+    "bundle": [["ruby", "--version"], ["bundle", "--version"]],
+    "pip": [["pip", "--version"]],
+}
+
+DEPENDENCY_OUTPUTS: Dict[str, List[str]] = {
+    "npm": ["node_modules"],
+    "bundle": [],
+    "pip": [],
+}
+
+BUILD_STAMP_FILE: str = "mmpm-build-stamp.json"
+
+__toolchain_versions: Dict[str, str] = {}
+__toolchain_versions_lock = threading.Lock()
+
 logger = MMPMLogFactory.get_logger(__name__)
 
 
@@ -26,6 +71,51 @@ def __sanitize__(string: str) -> str:
     return sub("[//]", "", string)
 
 
+def already_up_to_date(stdout: str) -> bool:
+    """
+    Determines if a 'git merge' (or 'git pull') had nothing to apply from its output. Older versions of git
+    report 'Already up-to-date.' rather than 'Already up to date.'
+
+    Parameters:
+        stdout (str): The standard output of git.
+
+    Returns:
+        bool: True if there were no changes, False otherwise.
+    """
+
+    return "up to date" in stdout or "up-to-date" in stdout
+
+
+def toolchain_version(installer: str) -> str:
+    """
+    Reports the version of the toolchain used by a dependency installer (see TOOLCHAINS), ie. the versions of
+    'node' and 'npm'. The versions are only requested once per process, even when packages are built
+    concurrently.
+
+    Parameters:
+        installer (str): The name of the dependency installer, ie. 'npm'.
+
+    Returns:
+        str: The versions reported by the toolchain, or an empty string for each command that failed.
+    """
+
+    with __toolchain_versions_lock:
+        if installer not in __toolchain_versions:
+            versions = []
+
+            for command in TOOLCHAINS.get(installer, []):
+                try:
+                    error_code, stdout, _ = run_cmd(command, progress=False)
+                except OSError:  # the toolchain isn't installed
+                    error_code, stdout = 1, ""
+
+                versions.append("" if error_code else stdout.strip())
+
+            __toolchain_versions[installer] = " | ".join(versions)
+
+        return __toolchain_versions[installer]
+
+
 # pylint: disable=too-many-instance-attributes
 class MagicMirrorPackage:
     """
@@ -200,33 +290,92 @@ class MagicMirrorPackage:
         """
 
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+
+        # the mirror allows the package to be installed again without contacting the remote. Shallow and blobless
+        # clones don't hold the complete history, so their mirror must be created from the remote instead
+        if self.env.MMPM_REPOSITORY_MIRRORS.get() and git_dir(modules_dir / self.directory) is not None and self.clone_strategy() == "full":
+            RepositoryMirror(self.repository).seed(modules_dir / self.directory)
+
         error_code, stdout, stderr = run_cmd(["rm", "-rf", str(modules_dir / self.directory)], message="Removing package")
+
+        if self.env.MMPM_DEPENDENCY_STORE.get():
+            DependencyStore().prune()
+
         return not error_code and not stderr and not stdout
 
-    def clone(self) -> Tuple[int, str, str]:
+    def clone(self, progress: bool = True) -> Tuple[int, str, str]:
         """
-        Clones the package repository into the MagicMirror modules directory.
+        Clones the package repository into the MagicMirror modules directory, using the MMPM_CLONE_STRATEGY
+        (see CLONE_STRATEGIES). The strategy is recorded in the Git config of the clone. When
+        MMPM_REPOSITORY_MIRRORS is enabled, the package is cloned from the mirror of its repository (see `mirror`).
 
         Parameters:
-            None
+            progress (bool): If True, displays a spinner while cloning.
 
         Returns:
             Tuple[int, str, str]: The result of the clone operation including any error codes and messages.
         """
 
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+        strategy: str = self.env.MMPM_CLONE_STRATEGY.get()
+
+        if strategy not in CLONE_STRATEGIES:
+            logger.warning(f"Unknown {self.env.MMPM_CLONE_STRATEGY.name} '{strategy}', must be one of {', '.join(CLONE_STRATEGIES)}. Using 'full'.")
+            strategy = "full"
+
+        mirror = self.mirror(progress=progress, offline=True)
 
         return run_cmd(
-            ["git", "clone", self.repository, str(modules_dir / self.directory)],
+            [
+                "git",
+                *(mirror.redirect() if mirror is not None else []),
+                "clone",
+                *CLONE_STRATEGIES[strategy],
+                "--config",
+                f"{CLONE_STRATEGY_KEY}={strategy}",
+                self.repository,
+                str(modules_dir / self.directory),
+            ],
+            progress=progress,
             message="Downloading",
+            cwd=modules_dir,
         )
 
-    def update(self) -> None:
+    def mirror(self, progress: bool = True, max_age: int = MIRROR_MAX_AGE, offline: bool = False) -> Optional[RepositoryMirror]:
         """
-        Checks for updates to the package by querying the remote repository.
+        Brings the mirror of the package's repository up to date (see RepositoryMirror), if MMPM_REPOSITORY_MIRRORS
+        is enabled.
 
         Parameters:
-            None
+            progress (bool): If True, displays a spinner while the remote is contacted.
+            max_age (int): The number of seconds since the mirror was last fetched before it's fetched again.
+            offline (bool): If True, the mirror is used even if the remote couldn't be reached.
+
+        Returns:
+            Optional[RepositoryMirror]: The mirror, or None if mirrors are disabled, or the mirror couldn't be updated.
+        """
+
+        if not self.env.MMPM_REPOSITORY_MIRRORS.get():
+            return None
+
+        mirror = RepositoryMirror(self.repository)
+
+        if mirror.update(progress=progress, max_age=max_age):
+            return mirror
+
+        if offline and mirror.exists():
+            logger.warning(f"Unable to reach the remote of {self.title}. Using its mirror, last updated {mirror.age() / 3600:.1f} hours ago.")
+            return mirror
+
+        return None
+
+    def update(self, timeout: int = None) -> None:
+        """
+        Checks for updates to the package by querying the remote repository. The current
+        working directory is left untouched, so multiple packages may be updated concurrently.
+
+        Parameters:
+            timeout (int): The number of seconds the remote query may take before giving up. No limit if None.
 
         Returns:
             None
@@ -238,37 +387,136 @@ class MagicMirrorPackage:
             self.is_upgradable = False
             return
 
-        os.chdir(modules_dir / self.directory)
-
         try:
-            self.is_upgradable = repo_up_to_date(modules_dir / self.directory)
+            self.is_upgradable = repo_up_to_date(modules_dir / self.directory, timeout=timeout)
         except KeyboardInterrupt:
             logger.info("User killed process with CTRL-C")
             sys.exit(127)
 
-    def upgrade(self, force: bool = False) -> bool:
+    def clone_strategy(self) -> str:
         """
-        Upgrades the package by pulling the latest changes from the remote repository.
+        Determines the strategy the package was cloned with (see CLONE_STRATEGIES). Packages cloned before the
+        strategy was recorded, or cloned by hand, are assumed to be 'shallow' if their history is incomplete,
+        and 'full' otherwise.
 
         Parameters:
-            force (bool): If True, forces the upgrade even if the repository is up to date.
+            None
 
         Returns:
-            bool: True if the upgrade is successful, False otherwise.
+            str: The clone strategy.
+        """
+        directory: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules" / self.directory
+        section, _, key = CLONE_STRATEGY_KEY.partition(".")
+        strategy = git_config(directory, section, key)
+
+        if strategy in CLONE_STRATEGIES:
+            return strategy
+
+        dot_git = git_dir(directory)
+        return "shallow" if dot_git is not None and (dot_git / "shallow").exists() else "full"
+
+    def deepen(self) -> bool:
+        """
+        Retrieves the complete history of a package which was cloned shallowly, for when the changes of the
+        remote can't be merged without it (ie. the merge base is older than the commits that were cloned).
+        Afterwards, the package is recorded as having a 'full' clone.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the history was retrieved, False if the package isn't shallow, or the fetch failed.
+        """
+        directory: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules" / self.directory
+
+        if self.clone_strategy() != "shallow":
+            return False
+
+        logger.debug(f"{self.title} is a shallow clone. Retrieving the rest of its history.")
+        mirror = self.mirror()  # fetched already by `fetch`
+        git = ["git", *mirror.redirect(git_remote_url(directory))] if mirror is not None else ["git"]
+        error_code, _, stderr = run_cmd([*git, "fetch", "--unshallow"], message="Retrieving history", cwd=directory)
+
+        if error_code:
+            logger.error(f"Failed to retrieve the history of {self.title}: {stderr}")
+            return False
+
+        run_cmd(["git", "config", CLONE_STRATEGY_KEY, "full"], progress=False, cwd=directory)
+        return True
+
+    def fetch(self, progress: bool = True) -> Tuple[int, str, str]:
+        """
+        Retrieves the latest changes of the package from its remote repository, without applying them. The
+        current working directory is left untouched, so multiple packages may be fetched concurrently. When
+        MMPM_REPOSITORY_MIRRORS is enabled, the mirror of the repository is fetched from the remote, and the
+        package from the mirror.
+
+        Parameters:
+            progress (bool): If True, displays a spinner while fetching.
+
+        Returns:
+            Tuple[int, str, str]: The result of the fetch including any error codes and messages.
+        """
+        directory: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules" / self.directory
+        mirror = self.mirror(progress=progress, max_age=0)
+        git = ["git", *mirror.redirect(git_remote_url(directory))] if mirror is not None else ["git"]
+        return run_cmd([*git, "fetch"], progress=progress, message="Retrieving changes", cwd=directory)
+
+    def fast_forward(self, progress: bool = True) -> Tuple[int, str, str]:
+        """
+        Fast-forwards the package to the changes retrieved by `fetch`. Local commits are never merged or
+        discarded, so a package which has diverged from its remote repository isn't upgraded. If the package
+        was cloned shallowly, and can't be fast-forwarded, the rest of its history is retrieved and the
+        fast-forward is retried.
+
+        Parameters:
+            progress (bool): If True, displays a spinner while merging.
+
+        Returns:
+            Tuple[int, str, str]: The result of the merge including any error codes and messages (see `already_up_to_date`).
         """
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+        command = ["git", "merge", "--ff-only", "@{upstream}"]
+
+        error_code, stdout, stderr = run_cmd(command, progress=progress, message="Applying changes", cwd=modules_dir / self.directory)
+
+        if error_code and self.deepen():
+            error_code, stdout, stderr = run_cmd(command, progress=progress, message="Applying changes", cwd=modules_dir / self.directory)
+
+        return error_code, stdout, stderr
+
+    def upgrade(self, force: bool = False) -> bool:
+        """
+        Upgrades the package by fetching and fast-forwarding to the latest changes from the remote repository,
+        and installing its dependencies if they changed. To upgrade several packages at once, see
+        `mmpm.magicmirror.pipeline.UpgradePipeline`.
 
-        os.chdir(modules_dir / self.directory)
+        Parameters:
+            force (bool): If True, checks the dependencies are installed even if the repository is up to date.
+
+        Returns:
+            bool: True if the upgrade is successful, False otherwise.
+        """
+        error_code, stdout, stderr = self.fetch()
 
-        error_code, stdout, stderr = run_cmd(["git", "pull"], message="Retrieving changes")
+        if not error_code:
+            error_code, stdout, stderr = self.fast_forward()
 
-        if error_code or stderr:
+        # git reports its progress (ie. 'From https://github.com/...') on stderr, so only the exit code signals a failure
+        if error_code:
             logger.error(f"Failed to upgrade {self.title}: {stderr}")
             return False
 
-        elif "up to date" not in stdout or force and InstallationHandler(self).install():
-            print(f"Upgraded {color.n_green(self.title)}")
-            logger.debug(f"Upgraded {color.n_green(self.title)}")
+        if already_up_to_date(stdout) and not force:
+            return True
+
+        # the dependencies are only installed again when their manifests or toolchain changed (see InstallationHandler.exec)
+        if not InstallationHandler(self).install():
+            logger.error(f"Failed to install the dependencies of {self.title}")
+            return False
+
+        print(f"Upgraded {color.n_green(self.title)}")
+        logger.debug(f"Upgraded {color.n_green(self.title)}")
 
         return True
 
@@ -320,6 +568,89 @@ class MagicMirrorPackage:
             directory=repo.split("/")[-1].replace(".git", ""),
         )
 
+    @classmethod
+    def from_lxml_data(cls, raw_data: list, category=NA):
+        """
+        Creates a MagicMirrorPackage instance from raw HTML data parsed by lxml. This mirrors the
+        behavior of `from_raw_data`, but works directly with lxml elements, which avoids building
+        a BeautifulSoup tree of the wiki page.
+
+        Parameters:
+            raw_data (List[lxml.html.HtmlElement]): A list of the <td> elements of a table row.
+            category (str): The category of the package.
+
+        Returns:
+            MagicMirrorPackage: An instance of MagicMirrorPackage created from the provided data.
+        """
+        title_cell = raw_data[0]
+
+        # the title must be the first node of the first element in the cell, ie. <td><a href="...">MMM-Title</a></td>
+        if title_cell.text is not None or title_cell[0].text is None:
+            raise ValueError(f"Unexpected layout of title cell: {title_cell.text_content()}")
+
+        title_info = title_cell[0].text
+        package_title: str = __sanitize__(title_info) if title_info else NA
+
+        anchor_tag = next(title_cell.iter("a"))
+        repo = str(anchor_tag.get("href")) if anchor_tag.get("href") is not None else NA
+
+        # some people get fancy and embed anchor tags
+        author_info = __lxml_contents__(raw_data[1])
+        package_author = str() if author_info else NA
+
+        for info in author_info:
+            if isinstance(info, str):
+                package_author += f"{info.strip()} "
+            else:
+                package_author += f"{__lxml_contents__(info)[0].strip()} "
+
+        description_info = __lxml_contents__(raw_data[2])
+        package_description: str = "" if description_info else NA
+
+        # some people embed other html elements in here, so they need to be parsed out
+        for info in description_info:
+            if isinstance(info, str):
+                package_description += info
+            else:
+                for content in __lxml_contents__(info):
+                    package_description += content if isinstance(content, str) else __lxml_string__(content)
+
+        return MagicMirrorPackage(
+            title=package_title,
+            author=package_author,
+            description=package_description,
+            repository=repo,
+            category=category,
+            directory=repo.split("/")[-1].replace(".git", ""),
+        )
+
+
+def __lxml_contents__(element) -> list:
+    """
+    Returns the child nodes of an lxml element, including text nodes, similar to the 'contents' of a BeautifulSoup Tag.
+    """
+    contents: list = [] if element.text is None else [element.text]
+
+    for child in element:
+        contents.append(child)
+
+        if child.tail is not None:
+            contents.append(child.tail)
+
+    return contents
+
+
+def __lxml_string__(element) -> str:
+    """
+    Returns the only string within an lxml element, similar to the 'string' of a BeautifulSoup Tag.
+    """
+    contents = __lxml_contents__(element)
+
+    if len(contents) != 1:
+        raise ValueError(f"Element <{element.tag}> does not contain exactly one string")
+
+    return contents[0] if isinstance(contents[0], str) else __lxml_string__(contents[0])
+
 
 __NULL__: int = hash(MagicMirrorPackage())
 
@@ -328,15 +659,46 @@ class InstallationHandler:
     """
     Delegate class that handles the installation process of
     MagicMirrorPackage's by cloning their repo and identifying dependencies
-    that need to be installed.
+    that need to be installed. Every command is run within the package's
+    directory, rather than changing the working directory of the process,
+    so multiple packages may be installed concurrently.
+
+    Attributes:
+        package (MagicMirrorPackage): The package being installed.
+        progress (bool): If True, a spinner is displayed while each command runs. This should be disabled
+            when packages are installed concurrently, since the spinners would overwrite one another.
+        restored (bool): True if the package was restored from the build cache, so it's built already.
     """
 
-    __slots__ = {"package"}
+    __slots__ = {"package", "progress", "restored"}
 
-    def __init__(self, package: MagicMirrorPackage):
+    def __init__(self, package: MagicMirrorPackage, progress: bool = True):
         self.package = package
+        self.progress = progress
+        self.restored = False
+
+    def exec(self, funk: Callable, installer: str = "") -> bool:
+        """
+        Runs one of the dependency installation methods (ie. `npm_install`). When an installer is given, the
+        installation is skipped if its build stamp is current, and the build stamp is updated afterwards.
+
+        Parameters:
+            funk (Callable): The dependency installation method.
+            installer (str): The name of the dependency installer (see DEPENDENCY_MANIFESTS), if any.
+
+        Returns:
+            bool: True if the dependencies were installed (or were already), False otherwise.
+        """
+
+        stamp = self.build_stamp(installer) if installer else None
+
+        if stamp is not None and stamp == self.read_build_stamp():
+            logger.debug(f"Dependencies of '{self.package.title}' are unchanged since they were last installed. Skipping '{installer}'.")
+            return True
+
+        # a failed (or interrupted) install must not leave the previous build stamp behind
+        self.write_build_stamp(None)
 
-    def exec(self, funk: Callable) -> bool:
         logger.debug(f"Calling exec wrapper to install dependencies for '{self.package.title}'")
         error_code, _, stderr = funk()
 
@@ -344,22 +706,127 @@ class InstallationHandler:
             logger.error(stderr)
             return False
 
+        if stamp is not None:
+            # the outputs are only known once the installer has run, ie. npm doesn't create node_modules without dependencies
+            self.write_build_stamp(self.build_stamp(installer))
+
         return True
 
-    # pylint: disable=too-many-return-statements
+    def build_stamp_file(self) -> Optional[Path]:
+        """
+        Locates the build stamp of the package, which is kept within its Git directory, so it is never
+        committed, and is removed along with the package.
+
+        Parameters:
+            None
+
+        Returns:
+            Optional[Path]: The location of the build stamp, or None if the package isn't a Git repository.
+        """
+
+        dot_git = git_dir(Path(self.package.directory))
+        return dot_git / BUILD_STAMP_FILE if dot_git is not None else None
+
+    def build_stamp(self, installer: str) -> Optional[Dict[str, Any]]:
+        """
+        Describes everything the dependencies installed by an installer are derived from: the content hashes
+        of its manifests, the version of its toolchain, and which of its output directories exist.
+
+        Parameters:
+            installer (str): The name of the dependency installer (see DEPENDENCY_MANIFESTS).
+
+        Returns:
+            Optional[Dict[str, Any]]: The build stamp, or None if the package isn't a Git repository.
+        """
+
+        if self.build_stamp_file() is None:
+            return None
+
+        manifests: Dict[str, Optional[str]] = {}
+
+        for manifest in DEPENDENCY_MANIFESTS[installer]:
+            try:
+                manifests[manifest] = hashlib.sha256((self.package.directory / manifest).read_bytes()).hexdigest()
+            except OSError:
+                manifests[manifest] = None
+
+        return {
+            "installer": installer,
+            "manifests": manifests,
+            "toolchain": toolchain_version(installer),
+            "outputs": [output for output in DEPENDENCY_OUTPUTS[installer] if self.exists(output)],
+        }
+
+    def read_build_stamp(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the build stamp written after the dependencies of the package were last installed.
+
+        Parameters:
+            None
+
+        Returns:
+            Optional[Dict[str, Any]]: The build stamp, or None if there isn't one.
+        """
+
+        stamp_file = self.build_stamp_file()
+
+        if stamp_file is None:
+            return None
+
+        try:
+            stamp: Dict[str, Any] = json.loads(stamp_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        return stamp
+
+    def write_build_stamp(self, stamp: Optional[Dict[str, Any]]) -> None:
+        """
+        Writes (or removes, if None) the build stamp of the package.
+
+        Parameters:
+            stamp (Optional[Dict[str, Any]]): The build stamp.
+
+        Returns:
+            None
+        """
+
+        stamp_file = self.build_stamp_file()
+
+        if stamp_file is None:
+            return
+
+        try:
+            if stamp is None:
+                stamp_file.unlink(missing_ok=True)
+            else:
+                stamp_file.write_text(json.dumps(stamp, indent=2), encoding="utf-8")
+        except OSError as error:
+            logger.warning(f"Unable to update the build stamp of '{self.package.title}': {error}")
+
     def install(self) -> bool:
         """
-        Utility method that detects package.json, Gemfiles, Makefiles, and
-        CMakeLists.txt files, and handles the build process for each of the
-        previously mentioned files. If the install is successful, an empty string
-        is returned. The installation process relies on the location of the current
-        directory the os library detects.
+        Clones the package (if it hasn't been already) and installs its dependencies.
 
         Parameters:
-            directory (str): the root directory of the package
+            None
 
         Returns:
-            stderr (str): success if the string is empty, fail if not
+            bool: True if the installation is successful, False otherwise.
+        """
+
+        return self.clone() and self.build()
+
+    def clone(self) -> bool:
+        """
+        Resolves the directory of the package within the MagicMirror modules directory, and clones the
+        repository into it, unless it has been cloned already.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the package is ready to be built, False otherwise.
         """
         root = self.package.env.MMPM_MAGICMIRROR_ROOT
         modules_dir = root.get() / "modules"
@@ -369,28 +836,64 @@ class InstallationHandler:
             logger.fatal(f"{root.name}='{modules_dir}' does not exist. Is {root.name} set properly?")
             return False
 
-        os.chdir(modules_dir)
-
         if not (self.package.directory / ".git").exists():
+            if self.restore():
+                return True
+
             logger.debug(f"{self.package.directory / '.git'} not found. Cloning repo.")
-            error_code, _, stderr = self.package.clone()
+            error_code, _, stderr = self.package.clone(progress=self.progress)
 
             if error_code:
                 logger.error(f"Failed to clone {self.package.title}: {stderr}")
                 return False
 
-        os.chdir(self.package.directory)
+        return True
+
+    def build(self) -> bool:
+        """
+        Installs the dependencies of the package (see `__build__`), and saves the built package to the build
+        cache, if it's enabled. The package must have been cloned (or restored) already (see `clone`).
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the dependencies were installed (or there were none), False otherwise.
+        """
+
+        if self.restored:
+            return True
+
+        if not self.__build__():
+            return False
+
+        self.save()
+        return True
+
+    # pylint: disable=too-many-return-statements
+    def __build__(self) -> bool:
+        """
+        Utility method that detects package.json, Gemfiles, Makefiles, and
+        CMakeLists.txt files, and handles the build process for each of the
+        previously mentioned files.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the dependencies were installed (or there were none), False otherwise.
+        """
 
         if self.exists("package.json"):
-            return self.exec(self.npm_install)
+            return self.exec(self.npm_install, installer="npm")
         elif self.exists("Gemfile"):
-            return self.exec(self.bundle_install)
+            return self.exec(self.bundle_install, installer="bundle")
         elif self.exists("Makefile"):
             return self.exec(self.make)
         elif self.exists("CMakeLists.txt"):
             return self.exec(self.cmake)
         elif self.exists("requirements.txt"):
-            return self.exec(self.pip_install)
+            return self.exec(self.pip_install, installer="pip")
         elif self.exists("pom.xml"):
             return self.exec(self.maven_install)
         elif self.exists("go.mod"):
@@ -399,6 +902,104 @@ class InstallationHandler:
         logger.debug(f"Unable to find any dependency file associated with {self.package.title}")
         return True
 
+    def build_cache(self) -> Optional[BuildCache]:
+        """
+        Opens the build cache, which is limited to MMPM_BUILD_CACHE_SIZE MiB.
+
+        Parameters:
+            None
+
+        Returns:
+            Optional[BuildCache]: The build cache, or None if it's disabled.
+        """
+
+        max_size: int = self.package.env.MMPM_BUILD_CACHE_SIZE.get()
+        return BuildCache(max_size=max_size * 1024 * 1024) if max_size > 0 else None
+
+    def artifact(self, commit: str) -> Dict[str, Any]:
+        """
+        Describes everything a built package is derived from, which determines its key within the build cache.
+        The versions of every toolchain are included, since the dependency installer isn't known until the
+        package has been cloned.
+
+        Parameters:
+            commit (str): The commit of the package.
+
+        Returns:
+            Dict[str, Any]: The repository, commit, CPU architecture and toolchain versions.
+        """
+
+        return {
+            "repository": self.package.repository,
+            "commit": commit,
+            "arch": platform.machine(),
+            "toolchains": {installer: toolchain_version(installer) for installer in TOOLCHAINS},
+        }
+
+    def restore(self) -> bool:
+        """
+        Restores the package from the build cache, if the latest commit of its repository was built (with
+        the same CPU architecture and toolchains) before.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the package was restored, False if it must be cloned and built.
+        """
+
+        cache = self.build_cache()
+
+        if cache is None:
+            return False
+
+        error_code, stdout, stderr = run_cmd(["git", "ls-remote", self.package.repository, "HEAD"], progress=False)
+
+        if error_code or not stdout.strip():
+            logger.debug(f"Unable to find the latest commit of {self.package.title}: {stderr}")
+            return False
+
+        if not cache.restore(BuildCache.key(self.artifact(stdout.split()[0])), self.package.directory):
+            return False
+
+        logger.info(f"Restored {self.package.title} from the build cache")
+        self.restored = True
+
+        # the hard links to the dependency store aren't kept within the archive
+        if self.package.env.MMPM_DEPENDENCY_STORE.get():
+            DependencyStore().link(self.package.directory / "node_modules")
+
+        return True
+
+    def save(self) -> None:
+        """
+        Saves the built package to the build cache, unless the cache is disabled, or holds the same commit
+        already.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        cache = self.build_cache()
+
+        if cache is None:
+            return
+
+        error_code, stdout, stderr = run_cmd(["git", "rev-parse", "HEAD"], progress=False, cwd=self.package.directory)
+
+        if error_code:
+            logger.debug(f"Unable to find the current commit of {self.package.title}: {stderr}")
+            return
+
+        artifact = self.artifact(stdout.strip())
+        key = BuildCache.key(artifact)
+
+        if not cache.contains(key):
+            cache.save(key, self.package.directory, {"title": self.package.title, **artifact})
+
     def cmake(self) -> Tuple[int, str, str]:
         """
         Wrapper method around calling cmake to build a module's dependencies.
@@ -407,17 +1008,16 @@ class InstallationHandler:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'cmake' command.
         """
         logger.debug(f"Running 'cmake ..' in {self.package.directory}")
 
         build_dir = Path(self.package.directory / "build")
-        build_dir.mkdir(exist_ok=True)
 
-        os.system(f"rm -rf {build_dir}/*")
-        os.chdir(build_dir)
+        shutil.rmtree(build_dir, ignore_errors=True)
+        build_dir.mkdir(exist_ok=True)
 
-        return run_cmd(["cmake", ".."], message="Building with CMake")
+        return run_cmd(["cmake", ".."], progress=self.progress, message="Building with CMake", cwd=build_dir)
 
     def make(self) -> Tuple[int, str, str]:
         """
@@ -427,23 +1027,72 @@ class InstallationHandler:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'make' command.
         """
         logger.debug(f"Found Makefile. Running `make -j {cpu_count()} in {self.package.directory}`")
-        return run_cmd(["make", "-j", f"{cpu_count()}"], message="Building with 'make'")
+        return run_cmd(["make", "-j", f"{cpu_count()}"], progress=self.progress, message="Building with 'make'", cwd=self.package.directory)
 
     def npm_install(self) -> Tuple[int, str, str]:
         """
-        Wrapper method around calling 'npm install' to install/build a module's dependencies.
+        Wrapper method around calling 'npm install' to install/build a module's dependencies. When the module
+        has a lockfile, 'npm ci' is used instead, which installs exactly what the lockfile specifies, and
+        never rewrites it. If 'npm ci' fails (ie. the lockfile doesn't match package.json), 'npm install'
+        is run instead.
 
         Parameters:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'npm install' command.
+        """
+        command = ["npm", "ci"] if self.exists("package-lock.json") or self.exists("npm-shrinkwrap.json") else ["npm", "install"]
+        shared: bool = self.package.env.MMPM_DEPENDENCY_STORE.get()
+
+        # 'npm ci' always starts from an empty node_modules, but 'npm install' overwrites existing files in place,
+        # which would change the copies shared with other packages
+        if shared and command[1] == "install":
+            shutil.rmtree(self.package.directory / "node_modules", ignore_errors=True)
+
+        logger.debug(f"Found package.json. Running `{' '.join(command)}` in {self.package.directory}")
+        start: float = time.monotonic()
+        result = run_cmd(command, progress=self.progress, message="Installing Node dependencies", cwd=self.package.directory)
+
+        # the lockfile of a module is often left out of date when its package.json changes, which 'npm ci' refuses
+        if result[0] and command[1] == "ci":
+            logger.warning(f"`npm ci` failed in {self.package.directory}. Falling back to `npm install`: {result[2]}")
+
+            if shared:
+                shutil.rmtree(self.package.directory / "node_modules", ignore_errors=True)
+
+            result = run_cmd(["npm", "install"], progress=self.progress, message="Installing Node dependencies", cwd=self.package.directory)
+
+        if shared and not result[0]:
+            self.share_dependencies(time.monotonic() - start)
+
+        return result
+
+    def share_dependencies(self, install_time: float) -> None:
+        """
+        Links the Node dependencies of the package to the shared dependency store (see DependencyStore), and
+        reports the disk usage and install time of the dependencies before and after.
+
+        Parameters:
+            install_time (float): The number of seconds 'npm' took to install the dependencies.
+
+        Returns:
+            None
         """
-        logger.debug(f"Found package.json. Running `npm install` in {self.package.directory}")
-        return run_cmd(["npm", "install"], message="Installing Node dependencies")
+
+        report = DependencyStore().link(self.package.directory / "node_modules")
+
+        if report["error"]:
+            return
+
+        logger.info(
+            f"Linked the dependencies of {self.package.title} to the shared dependency store: "
+            f"{human_readable_size(report['size'])} installed in {install_time:.2f}s, "
+            f"{human_readable_size(report['size'] - report['shared'])} after linking {report['files']} files in {report['seconds']:.2f}s"
+        )
 
     def bundle_install(self) -> Tuple[int, str, str]:
         """
@@ -453,10 +1102,10 @@ class InstallationHandler:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'bundle install' command.
         """
         logger.debug(f"Found Gemfile. Running `bundle install` in {self.package.directory}")
-        return run_cmd(["bundle", "install"], message="Installing Ruby dependencies")
+        return run_cmd(["bundle", "install"], progress=self.progress, message="Installing Ruby dependencies", cwd=self.package.directory)
 
     def pip_install(self) -> Tuple[int, str, str]:
         """
@@ -471,7 +1120,9 @@ class InstallationHandler:
         logger.debug(f"Running 'pip install' in {self.package.directory}")
         return run_cmd(
             ["pip", "install", "-r", "requirements.txt"],
+            progress=self.progress,
             message="Installing Python dependencies",
+            cwd=self.package.directory,
         )
 
     def maven_install(self) -> Tuple[int, str, str]:
@@ -482,10 +1133,10 @@ class InstallationHandler:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'mvn install' command.
         """
         logger.debug(f"Running 'mvn install' in {self.package.directory}")
-        return run_cmd(["mvn", "install"], message="Building with Maven")
+        return run_cmd(["mvn", "install"], progress=self.progress, message="Building with Maven", cwd=self.package.directory)
 
     def go_build(self) -> Tuple[int, str, str]:
         """
@@ -495,10 +1146,10 @@ class InstallationHandler:
             None
 
         Returns:
-            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
+            Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'go build' command.
         """
         logger.debug(f"Running 'go build' in {self.package.directory}")
-        return run_cmd(["go", "build"], message="Building Go project")
+        return run_cmd(["go", "build"], progress=self.progress, message="Building Go project", cwd=self.package.directory)
 
     def exists(self, file_name: str) -> bool:
         """
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Installs and upgrades multiple MagicMirror packages concurrently. Cloning and fetching are network-bound, so
+every package is cloned or fetched at once (up to MMPM_MAX_WORKERS), while installing dependencies (ie. 'npm
+install') is CPU, memory, and disk bound, so only MMPM_MAX_BUILD_WORKERS packages are built at a time. A
+package is built as soon as it has been cloned (or upgraded), rather than waiting for every other package.
+"""
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from mmpm.env import MMPMEnv
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage, already_up_to_date
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+# the outcome of upgrading a package (see UpgradePipeline)
+UPGRADED: str = "upgraded"
+UP_TO_DATE: str = "up to date"
+FAILED: str = "failed"
+
+
+class InstallationPipeline:
+    """
+    Clones and builds a list of packages concurrently, using separate worker pools for the network-bound
+    and CPU-bound stages. The results are reported in the order the packages were given, so the output
+    stays readable, even though the packages themselves are installed concurrently.
+
+    Attributes:
+        packages (List[MagicMirrorPackage]): The packages to install.
+        env (MMPMEnv): The MMPM environment variables.
+        workers (int): The number of packages cloned concurrently.
+        build_workers (int): The number of packages whose dependencies are installed concurrently.
+    """
+
+    def __init__(self, packages: List[MagicMirrorPackage]):
+        self.packages = packages
+        self.env = MMPMEnv()
+        self.workers: int = max(1, self.env.MMPM_MAX_WORKERS.get())
+        self.build_workers: int = max(1, self.env.MMPM_MAX_BUILD_WORKERS.get())
+
+    @staticmethod
+    def __clone__(handler: InstallationHandler, builds: ThreadPoolExecutor) -> Optional[Future]:
+        """
+        Clones a package, and queues it to be built once cloned.
+
+        Parameters:
+            handler (InstallationHandler): The installation handler of the package.
+            builds (ThreadPoolExecutor): The worker pool of the build stage.
+
+        Returns:
+            Optional[Future]: The pending build of the package, or None if it couldn't be cloned.
+        """
+
+        return builds.submit(handler.build) if handler.clone() else None
+
+    def run(self) -> Iterator[Tuple[MagicMirrorPackage, bool]]:
+        """
+        Installs the packages, yielding the result of each one in the order the packages were given.
+
+        Parameters:
+            None
+
+        Returns:
+            Iterator[Tuple[MagicMirrorPackage, bool]]: Each package, and if it was installed successfully.
+        """
+
+        logger.debug(f"Installing {len(self.packages)} package(s) using {self.workers} clone and {self.build_workers} build worker(s)")
+
+        directories: Dict[str, Future] = {}
+        clones: List[Future] = []
+
+        builds = ThreadPoolExecutor(max_workers=self.build_workers)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        for package in self.packages:
+            directory = package.directory.name.lower()
+
+            # two packages cloned into the same directory would clobber one another, so the package
+            # installed into the directory first is the one both results are taken from
+            if directory not in directories:
+                directories[directory] = executor.submit(self.__clone__, InstallationHandler(package, progress=False), builds)
+
+            clones.append(directories[directory])
+
+        try:
+            for package, clone in zip(self.packages, clones):
+                success = False
+
+                try:
+                    build = clone.result()
+                    success = bool(build is not None and build.result())
+                except Exception as error:
+                    logger.error(f"Failed to install {package.title}: {error}")
+
+                yield package, success
+        except KeyboardInterrupt:
+            logger.info("User killed process with CTRL-C")
+
+            for clone in clones:
+                clone.cancel()
+
+            executor.shutdown(wait=False)
+            builds.shutdown(wait=False)
+            sys.exit(127)
+
+        # the clones must finish before the builds they queue can be waited on
+        executor.shutdown(wait=True)
+        builds.shutdown(wait=True)
+
+
+class UpgradePipeline:
+    """
+    Upgrades a list of packages in three stages. The changes of every package are fetched concurrently,
+    then each package is fast-forwarded in the order the packages were given, and the dependencies of each
+    upgraded package are installed (see InstallationHandler.build) by a separate, smaller pool of workers,
+    while the remaining packages are fast-forwarded.
+
+    Attributes:
+        packages (List[MagicMirrorPackage]): The packages to upgrade.
+        force (bool): If True, the dependencies of packages which are already up to date are checked too.
+        env (MMPMEnv): The MMPM environment variables.
+        workers (int): The number of packages fetched concurrently.
+        build_workers (int): The number of packages whose dependencies are installed concurrently.
+    """
+
+    def __init__(self, packages: List[MagicMirrorPackage], force: bool = False):
+        self.packages = packages
+        self.force = force
+        self.env = MMPMEnv()
+        self.workers: int = max(1, self.env.MMPM_MAX_WORKERS.get())
+        self.build_workers: int = max(1, self.env.MMPM_MAX_BUILD_WORKERS.get())
+
+    def __fast_forward__(self, package: MagicMirrorPackage, fetch: Future, builds: ThreadPoolExecutor) -> Tuple[str, Optional[Future]]:
+        """
+        Fast-forwards a package once its changes have been fetched, and queues it to be built if it changed.
+
+        Parameters:
+            package (MagicMirrorPackage): The package.
+            fetch (Future): The pending fetch of the package.
+            builds (ThreadPoolExecutor): The worker pool of the build stage.
+
+        Returns:
+            Tuple[str, Optional[Future]]: The outcome of the upgrade so far, and the pending build of the package, if any.
+        """
+
+        error_code, _, stderr = fetch.result()
+
+        if error_code:
+            logger.error(f"Failed to retrieve changes for {package.title}: {stderr.strip()}")
+            return FAILED, None
+
+        error_code, stdout, stderr = package.fast_forward(progress=False)
+
+        # git reports its progress on stderr, so only the exit code signals a failure
+        if error_code:
+            logger.error(f"Failed to upgrade {package.title}: {stderr.strip()}")
+            return FAILED, None
+
+        outcome = UP_TO_DATE if already_up_to_date(stdout) else UPGRADED
+
+        if outcome == UP_TO_DATE and not self.force:
+            return outcome, None
+
+        return outcome, builds.submit(InstallationHandler(package, progress=False).install)
+
+    def run(self) -> Iterator[Tuple[MagicMirrorPackage, str]]:
+        """
+        Upgrades the packages, yielding the outcome of each one (UPGRADED, UP_TO_DATE, or FAILED) in the order
+        the packages were given.
+
+        Parameters:
+            None
+
+        Returns:
+            Iterator[Tuple[MagicMirrorPackage, str]]: Each package, and the outcome of its upgrade.
+        """
+
+        logger.debug(f"Upgrading {len(self.packages)} package(s) using {self.workers} fetch and {self.build_workers} build worker(s)")
+
+        builds = ThreadPoolExecutor(max_workers=self.build_workers)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        fetches = [executor.submit(package.fetch, False) for package in self.packages]
+        outcomes: List[Tuple[str, Optional[Future]]] = []
+
+        try:
+            # fast-forwarding only touches the local repository, so the packages are merged one at a time, in order
+            for package, fetch in zip(self.packages, fetches):
+                try:
+                    outcomes.append(self.__fast_forward__(package, fetch, builds))
+                except Exception as error:
+                    logger.error(f"Failed to upgrade {package.title}: {error}")
+                    outcomes.append((FAILED, None))
+
+            for package, (outcome, build) in zip(self.packages, outcomes):
+                try:
+                    if build is not None and not build.result():
+                        logger.error(f"Failed to install the dependencies of {package.title}")
+                        outcome = FAILED
+                except Exception as error:
+                    logger.error(f"Failed to install the dependencies of {package.title}: {error}")
+                    outcome = FAILED
+
+                yield package, outcome
+        except KeyboardInterrupt:
+            logger.info("User killed process with CTRL-C")
+
+            for future in fetches:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+            builds.shutdown(wait=False)
+            sys.exit(127)
+
+        executor.shutdown(wait=True)
+        builds.shutdown(wait=True)
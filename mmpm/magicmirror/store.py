@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+A content-addressed store for the Node dependencies of packages (see MMPM_DEPENDENCY_STORE). After 'npm'
+installs the dependencies of a package, each file within its node_modules is replaced by a hard link to the
+copy of that file in the store, similar to pnpm. The same versions of common dependencies (ie. axios,
+moment, node-fetch) are then kept on disk once, no matter how many packages use them.
+"""
+import hashlib
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from mmpm.constants import paths
+from mmpm.log.factory import MMPMLogFactory
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+
+class DependencyStore:
+    """
+    The shared store of dependency files, where each file is named after the SHA-256 of its contents. A file
+    in the store is removed by `prune` once no package links to it anymore.
+
+    Hard links can't cross file systems, so the store must be on the same file system as the MagicMirror
+    modules directory. Otherwise, the dependencies of each package are left as they are.
+
+    Attributes:
+        path (Path): The location of the store.
+    """
+
+    # some tools write to node_modules/.cache while MagicMirror is running, so those files are never shared
+    IGNORED: Tuple[str, ...] = (".cache",)
+
+    def __init__(self, path: Path = None):
+        self.path = path or paths.MMPM_DEPENDENCY_STORE_DIR
+
+    def __entry__(self, file: Path, mode: int) -> Path:
+        """
+        Determines the location of a file within the store.
+
+        Parameters:
+            file (Path): The file.
+            mode (int): The permissions of the file.
+
+        Returns:
+            Path: The location of the file within the store.
+        """
+
+        digest = hashlib.sha256()
+
+        with open(file, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 16), b""):
+                digest.update(chunk)
+
+        # hard links share their permissions, so executables are stored separately from other files
+        name = digest.hexdigest() + ("-x" if mode & stat.S_IXUSR else "")
+        return self.path / name[:2] / name[2:]
+
+    @staticmethod
+    def __link__(file: Path, entry: Path) -> bool:
+        """
+        Replaces a file with a hard link to its copy in the store, or adds the file to the store if there
+        isn't a copy yet.
+
+        Parameters:
+            file (Path): The file.
+            entry (Path): The location of the file within the store.
+
+        Returns:
+            bool: True if the file was replaced by the copy in the store, False if it was added to the store.
+        """
+
+        tmp_file = file.with_name(f".{file.name}.mmpm-store")
+
+        # the store may be changed by another package at the same time, so this is retried once
+        for _ in range(2):
+            try:
+                tmp_file.unlink(missing_ok=True)
+                os.link(entry, tmp_file)
+                os.replace(tmp_file, file)
+                return True
+            except FileNotFoundError:
+                pass  # there isn't a copy yet (or it was just pruned)
+
+            try:
+                entry.parent.mkdir(parents=True, exist_ok=True)
+                os.link(file, entry)
+                return False
+            except FileExistsError:
+                pass  # another package added the same file
+
+        return False
+
+    def link(self, directory: Path) -> Dict[str, Any]:
+        """
+        Replaces each file within a directory (ie. a package's node_modules) with a hard link to its copy in
+        the store.
+
+        Parameters:
+            directory (Path): The directory.
+
+        Returns:
+            Dict[str, Any]: The number of 'files', their total 'size', how much of that size is 'shared' with
+                other packages (rather than 'added' to the store), the number of 'seconds' taken, and an 'error'
+                if the files couldn't be linked.
+        """
+
+        report: Dict[str, Any] = {"files": 0, "size": 0, "shared": 0, "added": 0, "seconds": 0.0, "error": ""}
+        start: float = time.monotonic()
+
+        try:
+            for root, directories, files in os.walk(directory):
+                directories[:] = [name for name in directories if name not in self.IGNORED]
+
+                for name in files:
+                    file = Path(root) / name
+                    info = os.lstat(file)
+
+                    if not stat.S_ISREG(info.st_mode):
+                        continue
+
+                    report["files"] += 1
+                    report["size"] += info.st_size
+
+                    if info.st_nlink > 1:  # linked already
+                        report["shared"] += info.st_size
+                    elif self.__link__(file, self.__entry__(file, info.st_mode)):
+                        report["shared"] += info.st_size
+                    else:
+                        report["added"] += info.st_size
+
+        except OSError as error:
+            logger.warning(f"Unable to link '{directory}' to the dependency store in '{self.path}': {error}")
+            report["error"] = str(error)
+
+        report["seconds"] = time.monotonic() - start
+        return report
+
+    def prune(self) -> int:
+        """
+        Removes the files within the store which no package links to anymore.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The number of bytes freed.
+        """
+
+        freed = 0
+
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                entry = Path(root) / name
+
+                try:
+                    info = entry.stat()
+
+                    if info.st_nlink == 1:
+                        entry.unlink()
+                        freed += info.st_size
+                except OSError:
+                    continue
+
+        logger.debug(f"Pruned {freed} bytes from the dependency store")
+        return freed
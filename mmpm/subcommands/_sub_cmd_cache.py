@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+""" Command line options for 'cache' subcommand """
+import datetime
+
+from mmpm.constants import color
+from mmpm.env import MMPMEnv
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.cache import BuildCache
+from mmpm.subcommands.sub_cmd import SubCmd
+from mmpm.utils import human_readable_size
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+
+class Cache(SubCmd):
+    """
+    The 'Cache' subcommand allows users to inspect the build cache of packages, and prune it.
+
+    Custom Attributes:
+        env (MMPMEnv): An instance of the MMPMEnv class for reading the size limit of the build cache.
+    """
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.name = "cache"
+        self.help = "Display or prune the build cache of packages"
+        self.usage = f"{self.app_name} {self.name} [--<option>]"
+        self.env = MMPMEnv()
+
+    def register(self, subparser):
+        self.parser = subparser.add_parser(self.name, usage=self.usage, help=self.help)
+
+        group = self.parser.add_mutually_exclusive_group()
+
+        group.add_argument(
+            "-i",
+            "--info",
+            action="store_true",
+            help="display the packages within the build cache, from the most to the least recently used (default)",
+            dest="info",
+        )
+
+        group.add_argument(
+            "-p",
+            "--prune",
+            nargs="?",
+            type=int,
+            const=-1,
+            metavar="MiB",
+            help=f"remove the least recently used packages until the build cache fits within MiB (defaults to {self.env.MMPM_BUILD_CACHE_SIZE.name})",
+            dest="prune",
+        )
+
+    def exec(self, args, extra):
+        if extra:
+            logger.error(f"Extra arguments are not accepted. See '{self.app_name} {self.name} --help'")
+            return
+
+        max_size: int = self.env.MMPM_BUILD_CACHE_SIZE.get()
+        cache = BuildCache(max_size=max_size * 1024 * 1024)
+
+        if args.prune is not None:
+            limit: int = max_size if args.prune < 0 else args.prune
+            freed: int = cache.evict(limit * 1024 * 1024)
+            logger.info(f"Removed {human_readable_size(freed)} from the build cache, which now holds {human_readable_size(cache.size())}")
+            return
+
+        entries = cache.entries()
+
+        for entry in reversed(entries):
+            last_used = datetime.datetime.fromtimestamp(entry.get("last_used", 0)).strftime("%Y-%m-%d %H:%M:%S")
+
+            print(
+                color.n_green(entry.get("title", entry.get("repository", entry["key"]))),
+                f"\n\tCommit: {entry.get('commit', '')[:12]}",
+                f"\n\tArchitecture: {entry.get('arch', '')}",
+                f"\n\tSize: {human_readable_size(entry['size'])}",
+                f"\n\tLast used: {last_used}\n",
+            )
+
+        size = sum(entry["size"] for entry in entries)
+        status = f"limited to {max_size} MiB" if max_size > 0 else f"disabled, see {self.env.MMPM_BUILD_CACHE_SIZE.name}"
+        print(f"{len(entries)} package(s), {human_readable_size(size)} in {cache.path} ({status})")
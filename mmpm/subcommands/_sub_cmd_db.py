@@ -25,7 +25,7 @@ class Db(SubCmd):
     def __init__(self, app_name):
         self.app_name = app_name
         self.name = "db"
-        self.help = "Display database metadata, or display raw database contents"
+        self.help = "Display database metadata, refresh the database, or display raw database contents"
         self.usage = f"{self.app_name} {self.name} [--<option>]"
         self.database = MagicMirrorDatabase()
 
@@ -42,6 +42,14 @@ class Db(SubCmd):
             dest="info",
         )
 
+        group.add_argument(
+            "-r",
+            "--refresh",
+            action="store_true",
+            help="refresh the database with the latest packages from the MagicMirror 3rd party wiki",
+            dest="refresh",
+        )
+
         group.add_argument(
             "-d",
             "--dump",
@@ -51,13 +59,19 @@ class Db(SubCmd):
         )
 
     def exec(self, args, extra):
-        if not self.database.is_initialized():
-            self.database.load()
-
         if extra:
             logger.error(f"Extra arguments are not accepted. See '{self.app_name} {self.name} --help'")
             return
 
+        if args.refresh:
+            # checked before the initial load, otherwise an expired database would trigger another background refresh
+            if not self.database.load(update=True):
+                logger.error("Failed to refresh database. See `mmpm logs` for details")
+            return
+
+        if not self.database.is_initialized():
+            self.database.load()
+
         if args.info:
             info = self.database.info()
             convert_string = lambda s: " ".join([s.split("_")[0].capitalize()] + [word.lower() for word in s.split("_")[1:]])
@@ -8,7 +8,7 @@ from mmpm.constants import color, paths
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.subcommands.sub_cmd import SubCmd
-from mmpm.utils import confirm, get_host_ip, prompt
+from mmpm.utils import cached_host_ip, confirm, prompt
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -48,7 +48,7 @@ class GuidedSetup(SubCmd):
         print("I'll help you setup your environment variables and additional features. Let's get started!\n")
 
         magicmirror_root: str = f"{Path.home()}/MagicMirror"
-        magicmirror_uri: str = f"http://{get_host_ip()}:8080"
+        magicmirror_uri: str = f"http://{cached_host_ip()}:8080"
         magicmirror_pm2_proc: str = ""
         magicmirror_docker_compose_file: str = ""
         mmpm_is_docker_image: bool = False
@@ -67,7 +67,7 @@ class GuidedSetup(SubCmd):
         if not mmpm_is_docker_image and not magicmirror_docker_compose_file and confirm("Are you using PM2 to start/stop MagicMirror?"):
             magicmirror_pm2_proc = prompt("What is the name of the PM2 process for MagicMirror?")
 
-        magicmirror_uri = prompt("Enter the address and port used to access MagicMirror: ", default=f"http://{get_host_ip()}:8080")
+        magicmirror_uri = prompt("Enter the address and port used to access MagicMirror: ", default=f"http://{cached_host_ip()}:8080")
 
         install_ui = not mmpm_is_docker_image and confirm("Would you like to install the MMPM UI (user interface)?")
         install_as_module = confirm("Would you like to hide/show MagicMirror modules through MMPM?")
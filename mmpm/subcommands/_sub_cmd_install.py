@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """ Command line options for 'install' subcommand """
+import time
 from typing import List
 
 from mmpm.constants import color
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.pipeline import InstallationPipeline
 from mmpm.subcommands.sub_cmd import SubCmd
 from mmpm.utils import confirm
 
@@ -50,10 +52,14 @@ class Install(SubCmd):
         results: List[MagicMirrorPackage] = []
 
         for name in extra:
-            results.extend([pkg for pkg in self.database.packages if name == pkg.title])
+            matches = self.database.search(name, case_sensitive=True, title_only=True)
 
-            if not results:
-                logger.error("Unable to locate package(s) based on query.")
+            if not matches:
+                logger.error(f"Unable to locate package named '{name}'")
+
+            results.extend(matches)
+
+        selected: List[MagicMirrorPackage] = []
 
         for package in results:
             if package.is_installed:
@@ -63,8 +69,28 @@ class Install(SubCmd):
             if not args.assume_yes and not confirm(f"Install {package.title} ({package.repository})?"):
                 continue
 
-            if package.install():
+            selected.append(package)
+
+        if not selected:
+            return
+
+        pipeline = InstallationPipeline(selected)
+        failed: List[MagicMirrorPackage] = []
+        start: float = time.monotonic()
+
+        print(f"Installing {len(selected)} package(s) using {pipeline.workers} download and {pipeline.build_workers} build worker(s)")
+
+        for package, success in pipeline.run():
+            if success:
                 logger.info(f"Installed {color.n_green(package.title)} ({package.repository})")
-            elif confirm(f"Installation failed. Would you like to remove {package.title}?"):
+            else:
+                logger.error(f"Failed to install {package.title} ({package.repository})")
+                failed.append(package)
+
+        print(f"Installed {len(selected) - len(failed)} of {len(selected)} package(s) in {time.monotonic() - start:.2f}s")
+
+        # the prompts are deferred until every package has finished, so they aren't interleaved with the results
+        for package in failed:
+            if confirm(f"Installation failed. Would you like to remove {package.title}?"):
                 package.is_installed = True
                 package.remove()
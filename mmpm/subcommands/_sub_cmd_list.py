@@ -78,6 +78,17 @@ class List(SubCmd):
         )
 
     def exec(self, args, extra):
+        if args.title_only and (args.all or args.installed or args.exclude_installed):
+            # only the titles are needed, which are read without loading the entire database
+            for title, is_installed in self.database.titles():
+                if args.installed and is_installed:
+                    print(title)
+                elif args.all and is_installed:
+                    print(f"{title} [installed]")
+                elif not args.installed and not is_installed:
+                    print(title)
+            return
+
         if not self.database.is_initialized():
             self.database.load()
 
@@ -91,7 +102,7 @@ class List(SubCmd):
                 package.display(title_only=args.title_only, exclude_installed=args.exclude_installed)
 
         elif args.categories:
-            categories = {package.category for package in self.database.packages}
+            categories = self.database.categories
 
             if args.title_only:
                 for category in categories:
@@ -99,7 +110,7 @@ class List(SubCmd):
                 return
 
             for category in categories:
-                package_count = sum(1 for package in self.database.packages if package.category == category)
+                package_count = len(self.database.lookup(category=category))
                 print(color.n_green(category), f"\n\tPackages: {package_count}\n")
 
         elif args.upgradable:
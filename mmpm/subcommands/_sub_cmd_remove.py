@@ -1,7 +1,5 @@
 #!/usr/bin/env python3
 """ Command line options for 'remove' subcommand """
-from typing import List
-
 from mmpm.constants import color
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
@@ -46,15 +44,16 @@ class Remove(SubCmd):
         if not self.database.is_initialized():
             self.database.load()
 
-        package_titles: List[str] = {package.title: package for package in self.database.packages}
-
         for name in extra:
-            package = package_titles.get(name)
+            matches = self.database.search(name, case_sensitive=True, title_only=True)
 
-            if package is None:
+            if not matches:
                 logger.error(f"'{name}' is not found in the installed packages")
                 continue
 
+            # if multiple packages share a title, prefer the one that's installed
+            package = next((match for match in matches if match.is_installed), matches[0])
+
             if not package.is_installed:
                 logger.error(f"'{package.title}' is not installed")
                 continue
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 """ Command line options for 'upgrade' subcommand """
-import json
-from typing import List
+import time
+from typing import Dict, List, Set
 
 from mmpm import utils
-from mmpm.constants import paths
+from mmpm.constants import color
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
 from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.pipeline import FAILED, UP_TO_DATE, UPGRADED, UpgradePipeline
 from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
@@ -54,27 +55,60 @@ class Upgrade(SubCmd):
             dest="force",
         )
 
+    def upgrade_packages(self, packages: List[MagicMirrorPackage], force: bool = False) -> List[MagicMirrorPackage]:
+        """
+        Upgrades the packages concurrently (see UpgradePipeline), and prints a summary of the outcomes.
+
+        Parameters:
+            packages (List[MagicMirrorPackage]): The packages to upgrade.
+            force (bool): If True, the dependencies of packages which are already up to date are checked too.
+
+        Returns:
+            List[MagicMirrorPackage]: The packages which failed to upgrade.
+        """
+
+        pipeline = UpgradePipeline(packages, force=force)
+        outcomes: Dict[str, List[MagicMirrorPackage]] = {UPGRADED: [], UP_TO_DATE: [], FAILED: []}
+        colors = {UPGRADED: color.n_green, UP_TO_DATE: color.n_cyan, FAILED: color.n_red}
+        start: float = time.monotonic()
+
+        print(f"Upgrading {len(packages)} package(s) using {pipeline.workers} download and {pipeline.build_workers} build worker(s)")
+
+        for package, outcome in pipeline.run():
+            outcomes[outcome].append(package)
+
+        for outcome, upgraded in outcomes.items():
+            for package in upgraded:
+                print(f"{colors[outcome](outcome.capitalize())}: {package.title}")
+
+        print(
+            f"{len(outcomes[UPGRADED])} upgraded, {len(outcomes[UP_TO_DATE])} up to date, {len(outcomes[FAILED])} failed "
+            f"in {time.monotonic() - start:.2f}s"
+        )
+
+        return outcomes[FAILED]
+
     def exec(self, args, extra):
         if not self.database.is_initialized():
             self.database.load()
 
         upgradable = self.database.upgradable()
-        packages_to_upgrade: List[MagicMirrorPackage] = []
+        pending: Set[MagicMirrorPackage] = {MagicMirrorPackage(**package) for package in upgradable["packages"]}
 
         if args.force:
-            for package in filter(lambda pkg: pkg.is_installed, self.database.packages):
-                package.upgrade(force=True)
-
-            upgradable["packages"] = {}
+            packages = [package for package in self.database.packages if package.is_installed]
 
         elif not any(upgradable.values()):
             logger.info("All packages and applications are up to date.\n ")
             return
 
-        if upgradable["packages"]:
-            packages = {MagicMirrorPackage(**package) for package in upgradable["packages"]}
-            packages_to_upgrade.extend(filter(lambda pkg: pkg.upgrade(), packages))
-            upgradable["packages"] = [package.serialize() for package in (packages - set(packages_to_upgrade))]
+        else:
+            packages = [MagicMirrorPackage(**package) for package in upgradable["packages"]]
+
+        if packages:
+            # only the packages which failed remain upgradable
+            failed = self.upgrade_packages(packages, force=args.force)
+            upgradable["packages"] = [package.serialize() for package in failed if package in pending]
 
         upgradable["MagicMirror"] = upgradable["MagicMirror"] and self.magicmirror.upgrade()
 
@@ -84,5 +118,4 @@ class Upgrade(SubCmd):
             else:
                 upgradable["mmpm"] = utils.upgrade()
 
-        with open(paths.MMPM_AVAILABLE_UPGRADES_FILE, mode="w", encoding="utf-8") as upgrade_file:
-            json.dump(upgradable, upgrade_file)
+        self.database.write_upgradable(upgradable)
@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
 from importlib import import_module
 from pkgutil import iter_modules
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
 
+def snake_to_pascal(name: str) -> str:
+    """
+    Converts the name of a subcommand module to the name of its class, ie. 'mm_ctl' -> 'MmCtl'.
+
+    Args:
+        name (str): The module name, without its prefix.
+
+    Returns:
+        str: The class name.
+    """
+
+    return name.replace("_", " ").title().replace(" ", "")
+
+
 class Loader:
     """
     This class handles dynamically loading all subcommands/endpoints from given modules.
@@ -58,7 +73,6 @@ class Loader:
         """
 
         objects: Dict[str, object] = {}
-        snake_to_pascal = lambda name: name.replace("_", " ").title().replace(" ", "")
 
         for submodule in iter_modules(module_path):
             if submodule.name.startswith(prefix):
@@ -73,3 +87,93 @@ class Loader:
                     logger.error(f"Failed to load subcommand module: {error}")
 
         return objects
+
+
+class LazyLoader:
+    """
+    Registers subcommands from a static manifest, rather than importing every subcommand module. Only the
+    selected subcommand is imported, constructed, and allowed to register its options. The rest are registered
+    with just their name and help message, which is all the top level help output needs.
+
+    Attributes:
+        objects (Dict[str, SubCmd]): The loaded subcommands, by name.
+
+    Args:
+        manifest (Dict[str, Tuple[str, str]]): Maps each subcommand name to its module name and help message.
+        module_name (str): The name of the package the subcommand modules are within.
+        app_name (str, optional): The name of the app, if applicable. Defaults to an empty string.
+        prefix (str, optional): The prefix of the subcommand module names. Defaults to an empty string.
+    """
+
+    def __init__(self, manifest: Dict[str, Tuple[str, str]], module_name: str, app_name: str = "", prefix: str = ""):
+        self.manifest = manifest
+        self.module_name = module_name
+        self.app_name = app_name
+        self.prefix = prefix
+        self.objects: Dict[str, SubCmd] = {}
+
+    @staticmethod
+    def selected(argv: List[str]) -> Optional[str]:
+        """
+        Determines the subcommand selected on the command line, which is the first argument that isn't an option,
+        since the top level parser only has the help option.
+
+        Args:
+            argv (List[str]): The command line arguments, excluding the program name.
+
+        Returns:
+            Optional[str]: The name of the selected subcommand, or None if there isn't one.
+        """
+
+        return next((arg for arg in argv if not arg.startswith("-")), None)
+
+    def load(self, name: str) -> Optional[SubCmd]:
+        """
+        Imports and constructs the subcommand with the given name.
+
+        Args:
+            name (str): The name of the subcommand.
+
+        Returns:
+            Optional[SubCmd]: The subcommand, or None if it isn't in the manifest or failed to load.
+        """
+
+        if name in self.objects:
+            return self.objects[name]
+
+        if name not in self.manifest:
+            return None
+
+        module, _ = self.manifest[name]
+        class_name = snake_to_pascal(module.replace(self.prefix, "", 1))
+
+        try:
+            objekt = getattr(import_module(f"{self.module_name}.{module}"), class_name)
+            self.objects[name] = objekt(self.app_name) if self.app_name else objekt()
+        except Exception as error:  # ie. a missing class, or a failed import or constructor
+            logger.error(f"Failed to load subcommand module: {error}")
+            return None
+
+        return self.objects[name]
+
+    def register(self, subparser, selected: Optional[str] = None, everything: bool = False) -> None:
+        """
+        Registers every subcommand of the manifest with the subparser. Only the selected subcommand (or every
+        subcommand, if requested) is loaded and registers its own options.
+
+        Args:
+            subparser (argparse._SubParsersAction): The subparser to register the subcommands with.
+            selected (Optional[str]): The name of the subcommand selected on the command line.
+            everything (bool): If True, every subcommand is loaded, ie. for shell completion.
+
+        Returns:
+            None
+        """
+
+        for name, (_, help_message) in self.manifest.items():
+            subcommand = self.load(name) if everything or name == selected else None
+
+            if subcommand is not None:
+                subcommand.register(subparser)
+            else:
+                subparser.add_parser(name, help=help_message.format(app_name=self.app_name))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+A static table of the subcommands, which allows the CLI to register every subcommand's parser without importing
+(and constructing) them all. Only the module of the subcommand selected on the command line is imported.
+test/subcommands/test_manifest.py keeps this table in sync with the subcommand modules.
+"""
+from typing import Dict, Tuple
+
+# maps the name of each subcommand to the module it's defined in, and its help message (formatted with the app name)
+SUBCOMMANDS: Dict[str, Tuple[str, str]] = {
+    "cache": ("_sub_cmd_cache", "Display or prune the build cache of packages"),
+    "completion": ("_sub_cmd_completion", "Generate commands to enable autocompletion for {app_name}"),
+    "db": ("_sub_cmd_db", "Display database metadata, refresh the database, or display raw database contents"),
+    "env": ("_sub_cmd_env", "Display the env environment variables and their value(s)"),
+    "guided-setup": ("_sub_cmd_guided_setup", "Interactively setup {app_name} and its features"),
+    "install": ("_sub_cmd_install", "Install MagicMirror packages"),
+    "list": ("_sub_cmd_list", "List items such as installed packages, packages available, available upgrades, etc"),
+    "logs": ("_sub_cmd_logs", "Display, tail, or zip the {app_name} log files"),
+    "mm-ctl": ("_sub_cmd_mm_ctl", "Commands to interact with/control MagicMirror"),
+    "mm-pkg": ("_sub_cmd_mm_pkg", "Manually add/remove custom MagicMirror packages in your local database (similar to add-apt-repository)"),
+    "open": ("_sub_cmd_open", "Open config files, documentation, wikis, and MagicMirror itself"),
+    "remove": ("_sub_cmd_remove", "Remove installed MagicMirror packages"),
+    "search": ("_sub_cmd_search", "Search for MagicMirror packages"),
+    "show": ("_sub_cmd_show", "Show details about one or more packages"),
+    "ui": ("_sub_cmd_ui", "Interact with the {app_name} UI "),
+    "update": ("_sub_cmd_update", "Check for updates for installed packages, MMPM, and MagicMirror"),
+    "upgrade": ("_sub_cmd_upgrade", "Upgrade packages, MMPM, and/or MagicMirror"),
+    "version": ("_sub_cmd_version", "Display {app_name} application version"),
+}
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 import json
 import os
+import re
 import socket
 import subprocess
 import time
 import urllib.request
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import git
 import requests
@@ -17,21 +18,171 @@ from yaspin import yaspin
 from yaspin.spinners import Spinners
 
 from mmpm.__version__ import version as current_version
-from mmpm.constants import color
+from mmpm.constants import color, paths
 from mmpm.log.factory import MMPMLogFactory
 
 logger = MMPMLogFactory.get_logger(__name__)
 
+# how long (in seconds) a detected host IP address is reused by later invocations of MMPM
+HOST_IP_TTL = 60 * 60
 
-def repo_up_to_date(path: Path):
+# the host IP address detected by this process, see cached_host_ip
+__host_ip: Dict[str, str] = {}
+
+# a section header of a Git config file, ie. [core], or [remote "origin"]
+GIT_CONFIG_SECTION = re.compile(r'^\[\s*([\w.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+
+
+def remote_head_ref(repo: git.Repo) -> str:
+    """
+    Determines the remote ref the local branch of a repository tracks. Falls back to
+    the remote's HEAD when the branch has no upstream, or the repository has a detached HEAD.
+
+    Parameters:
+        repo (git.Repo): The repository to inspect.
+
+    Returns:
+        str: The fully qualified ref on the remote, ie. 'refs/heads/master', or 'HEAD'.
+    """
+
+    try:
+        tracking = repo.active_branch.tracking_branch()
+    except TypeError:  # raised by GitPython when the HEAD is detached
+        tracking = None
+
+    return f"refs/heads/{tracking.remote_head}" if tracking is not None else "HEAD"
+
+
+def git_dir(path: Path) -> Optional[Path]:
+    """
+    Locates the Git directory of the repository (or worktree) at the given path. The '.git' entry
+    may be a directory, or a 'gitfile' pointing elsewhere (ie. for worktrees and submodules).
+
+    Parameters:
+        path (Path): The root of the repository.
+
+    Returns:
+        Optional[Path]: The Git directory, or None if the path isn't a repository.
+    """
+
+    dot_git = path / ".git"
+
+    if dot_git.is_dir():
+        return dot_git
+
+    try:
+        with open(dot_git, "r", encoding="utf-8") as gitfile:
+            contents = gitfile.read().strip()
+    except OSError:
+        return None
+
+    if not contents.startswith("gitdir:"):
+        return None
+
+    directory = Path(contents[len("gitdir:") :].strip())
+    return directory if directory.is_absolute() else path / directory
+
+
+def git_config(path: Path, section: str, key: str, subsection: Optional[str] = None) -> Optional[str]:
+    """
+    Reads a value from the configuration of the repository at the given path, without spawning 'git'.
+    Worktrees share the configuration of their main repository, which is found through the 'commondir'
+    file of the worktree's Git directory.
+
+    Parameters:
+        path (Path): The root of the repository.
+        section (str): The name of the section (case-insensitive), ie. 'remote'.
+        key (str): The name of the key (case-insensitive), ie. 'url'.
+        subsection (Optional[str]): The name of the subsection (case-sensitive), ie. 'origin'.
+
+    Returns:
+        Optional[str]: The value, or None if the path isn't a repository, or the value isn't set.
+    """
+
+    directory = git_dir(path)
+
+    if directory is None:
+        return None
+
+    try:
+        with open(directory / "commondir", "r", encoding="utf-8") as commondir:
+            common = Path(commondir.read().strip())
+            directory = common if common.is_absolute() else directory / common
+    except OSError:
+        pass  # not a worktree
+
+    try:
+        with open(directory / "config", "r", encoding="utf-8") as config:
+            lines = config.readlines()
+    except OSError:
+        return None
+
+    in_section = False
+
+    for line in lines:
+        line = line.strip()
+
+        if not line or line[0] in "#;":
+            continue
+
+        header = GIT_CONFIG_SECTION.match(line)
+
+        if header:
+            name, subname = header.group(1).lower(), header.group(2)
+
+            if subname is None and "." in name:  # the deprecated [remote.origin] syntax
+                name, _, subname = name.partition(".")
+
+            # section names are case-insensitive, but subsection names (ie. the name of the remote) are not
+            in_section = name == section.lower() and subname == subsection
+            line = line[header.end() :].strip()  # a 'key = value' may follow on the same line
+
+            if not line:
+                continue
+
+        if in_section:
+            name, _, value = line.partition("=")
+
+            if name.strip().lower() == key.lower():
+                value = value.strip()
+                return value[1:-1] if len(value) > 1 and value[0] == value[-1] == '"' else value
+
+    return None
+
+
+def git_remote_url(path: Path, remote: str = "origin") -> Optional[str]:
+    """
+    Reads the URL of a remote from the configuration of the repository at the given path, without
+    spawning 'git' (see `git_config`).
+
+    Parameters:
+        path (Path): The root of the repository.
+        remote (str): The name of the remote.
+
+    Returns:
+        Optional[str]: The URL of the remote, or None if the path isn't a repository, or the remote doesn't exist.
+    """
+
+    return git_config(path, "remote", "url", subsection=remote)
+
+
+def repo_up_to_date(path: Path, timeout: int = None, fetch: bool = False):
     """
     Checks if the Git repository at the given path is up-to-date with its remote origin.
+    The repository is accessed by path rather than the current working directory, so
+    this is safe to call from multiple threads at once.
+
+    By default, only the SHA of the tracked branch is requested from the remote using
+    `git ls-remote`, which transfers a few hundred bytes rather than every new object
+    and ref. The objects themselves are retrieved when the package is upgraded.
 
     Parameters:
         path (Path): The file system path to the Git repository.
+        timeout (int): The number of seconds the remote query may take before it is killed. No limit if None.
+        fetch (bool): If True, perform a full `git fetch` and compare against 'origin/HEAD' instead.
 
     Returns:
-        bool: True if the local repository is up-to-date, False otherwise.
+        bool: True if the local repository is out-of-date, False otherwise.
     """
 
     try:
@@ -42,18 +193,26 @@ def repo_up_to_date(path: Path):
             logger.error(f"Repository in {path} is bare. Cannot determine if out-of-date.")
             return False
 
-        logger.debug(f"Fetching information for repo found in '{path}'")
-        remote = repo.remotes.origin
-        remote.fetch()
+        local_sha: str = repo.head.commit.hexsha
+
+        if fetch:
+            logger.debug(f"Fetching information for repo found in '{path}'")
+            repo.remotes.origin.fetch(kill_after_timeout=timeout)
+            remote_sha: str = repo.refs["origin/HEAD"].commit.hexsha  # type: ignore
+        else:
+            ref = remote_head_ref(repo)
+            logger.debug(f"Querying remote '{ref}' for repo found in '{path}'")
+            output = str(repo.git.ls_remote("origin", ref, kill_after_timeout=timeout))
 
-        # Get local and remote HEAD commit
-        local_commit = repo.head.commit
-        remote_commit = repo.refs["origin/HEAD"].commit  # type: ignore
+            if not output.strip():
+                logger.error(f"Remote of repo located at {path} did not advertise '{ref}'")
+                return False
 
-        logger.debug(f"SHAs found in '{path}' -- local={local_commit.hexsha} & remote={remote_commit.hexsha}")
+            remote_sha = output.split()[0]
 
-        remote = repo.remotes.origin
-        return local_commit.hexsha != remote_commit.hexsha
+        logger.debug(f"SHAs found in '{path}' -- local={local_sha} & remote={remote_sha}")
+
+        return local_sha != remote_sha
     except Exception as error:
         logger.error(f"Failed to get status of repo located at {path}: {error}")
         return False
@@ -85,7 +244,49 @@ def get_host_ip() -> str:
     return address
 
 
-def run_cmd(command: List[str], progress=True, background=False, message: str = "") -> Tuple[int, str, str]:
+def cached_host_ip(ttl: int = HOST_IP_TTL) -> str:
+    """
+    Retrieves the local IP address of the host machine, detecting it at most once per process. A detected
+    address is persisted for `ttl` seconds, so invocations of MMPM made shortly after one another share it,
+    rather than each opening a socket. The 'localhost' fallback is never persisted.
+
+    Parameters:
+        ttl (int): The number of seconds a persisted address remains valid.
+
+    Returns:
+        str: The local IP address.
+    """
+
+    if "address" in __host_ip:
+        return __host_ip["address"]
+
+    cache_file = paths.MMPM_HOST_IP_FILE
+
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+
+        if time.time() < float(cached["expires"]):
+            logger.debug(f"Using cached Host IP={cached['address']}")
+            __host_ip["address"] = str(cached["address"])
+            return __host_ip["address"]
+    except (OSError, ValueError, TypeError, KeyError) as error:
+        logger.debug(f"No usable cached host IP address in {cache_file}: {error}")
+
+    address = get_host_ip()
+    __host_ip["address"] = address
+
+    if address != "localhost":
+        try:
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps({"address": address, "expires": time.time() + ttl}), encoding="utf-8")
+            os.replace(tmp_file, cache_file)
+        except OSError as error:
+            logger.debug(f"Failed to cache host IP address in {cache_file}: {error}")
+
+    return address
+
+
+def run_cmd(command: List[str], progress=True, background=False, message: str = "", cwd: Optional[Path] = None) -> Tuple[int, str, str]:
     """
     Executes a shell command and captures its output and errors.
 
@@ -94,6 +295,7 @@ def run_cmd(command: List[str], progress=True, background=False, message: str =
         progress (bool): If True, displays a spinner during command execution.
         background (bool): If True, runs the command in the background.
         message (str): The message to display alongside the spinner.
+        cwd (Optional[Path]): The directory to execute the command within, rather than the current working directory.
 
     Returns:
         Tuple[int, str, str]: A tuple containing the command's return code, standard output, and standard error.
@@ -104,13 +306,13 @@ def run_cmd(command: List[str], progress=True, background=False, message: str =
         # fully detach the terminal from the process so nothing hangs
         with open(os.devnull, "wb") as devnull:
             # pylint: disable=subprocess-popen-preexec-fn
-            subprocess.Popen(command, stdout=devnull, stderr=devnull, stdin=devnull, close_fds=True, preexec_fn=os.setsid)
+            subprocess.Popen(command, stdout=devnull, stderr=devnull, stdin=devnull, close_fds=True, preexec_fn=os.setsid, cwd=cwd)
 
         return 0, "", ""
 
-    logger.debug(f'Executing command `{" ".join(command)}`')
+    logger.debug(f'Executing command `{" ".join(command)}`' + (f" in {cwd}" if cwd else ""))
 
-    with subprocess.Popen(command, stderr=subprocess.PIPE, stdout=subprocess.PIPE) as process:
+    with subprocess.Popen(command, stderr=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd) as process:
         if progress:
             with yaspin(text=message, color="green") as spinner:
                 spinner.spinner = Spinners.bouncingBar
@@ -123,6 +325,26 @@ def run_cmd(command: List[str], progress=True, background=False, message: str =
         return process.returncode, stdout.decode("utf-8"), stderr.decode("utf-8")
 
 
+def human_readable_size(size: float) -> str:
+    """
+    Formats a number of bytes, ie. 1536 as '1.5 KiB'.
+
+    Parameters:
+        size (float): The number of bytes.
+
+    Returns:
+        str: The formatted size.
+    """
+
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+        size /= 1024
+
+    return f"{size:.1f} GiB"
+
+
 def get_pids(process_name: str) -> List[str]:
     """
     Retrieves process IDs for all processes with the given name.
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import subprocess
 from pathlib import Path
+from typing import Dict
 from unittest.mock import MagicMock
 
 from pytest import fixture
@@ -30,6 +32,14 @@ class MockedMMPMEnv(MMPMEnv):
         self.MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE = MutableMagicMock()
         self.MMPM_IS_DOCKER_IMAGE = MutableMagicMock()
         self.mmpm_log_level = MutableMagicMock()
+        self.MMPM_MAX_WORKERS = MutableMagicMock()
+        self.MMPM_MAX_BUILD_WORKERS = MutableMagicMock()
+        self.MMPM_GIT_TIMEOUT = MutableMagicMock()
+        self.MMPM_CLONE_STRATEGY = MutableMagicMock()
+        self.MMPM_DEPENDENCY_STORE = MutableMagicMock()
+        self.MMPM_BUILD_CACHE_SIZE = MutableMagicMock()
+        self.MMPM_REPOSITORY_MIRRORS = MutableMagicMock()
+        self.MMPM_DATABASE_MAX_AGE = MutableMagicMock()
 
         self.MMPM_MAGICMIRROR_ROOT.get.return_value = Path("/tmp/MagicMirror")
         self.MMPM_MAGICMIRROR_URI.get.return_value = "http://localhost:8080"
@@ -37,3 +47,35 @@ class MockedMMPMEnv(MMPMEnv):
         self.MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE.get.return_value = ""
         self.MMPM_IS_DOCKER_IMAGE.get.return_value = False
         self.mmpm_log_level.get.return_value = "INFO"
+        self.MMPM_MAX_WORKERS.get.return_value = 8
+        self.MMPM_MAX_BUILD_WORKERS.get.return_value = 2
+        self.MMPM_GIT_TIMEOUT.get.return_value = 60
+        self.MMPM_CLONE_STRATEGY.get.return_value = "full"
+        self.MMPM_DEPENDENCY_STORE.get.return_value = False
+        self.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        self.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+        self.MMPM_DATABASE_MAX_AGE.get.return_value = 24
+
+
+def git(repository: Path, *args: str) -> str:
+    """Runs a git command within the repository, as a throwaway identity, and returns its output."""
+    command = ["git", "-C", str(repository), "-c", "user.name=test", "-c", "user.email=test@test.com", "-c", "init.defaultBranch=master", *args]
+    return subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(repository: Path, message: str, files: Dict[str, str] = None) -> str:
+    """Writes the files (name to contents) within the repository, and commits every change, returning the new commit."""
+    for name, contents in (files or {}).items():
+        (repository / name).write_text(contents, encoding="utf-8")
+
+    git(repository, "add", "-A")
+    git(repository, "commit", "-q", "--allow-empty", "-m", message)
+    return git(repository, "rev-parse", "HEAD")
+
+
+def create_repository(path: Path, files: Dict[str, str] = None) -> Path:
+    """Creates a git repository with an initial commit of the files (name to contents), or an empty one if there are none."""
+    path.mkdir(parents=True, exist_ok=True)
+    git(path, "init", "-q")
+    commit(path, "initial", files)
+    return path
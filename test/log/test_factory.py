@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import logging
+import threading
+import unittest
+from unittest.mock import patch
+
+import socketio
+
+from mmpm.log.factory import JsonFormatter, SocketIOHandler
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("mmpm", logging.DEBUG, __file__, 1, message, None, None)
+
+
+class TestJsonFormatter(unittest.TestCase):
+    @patch("mmpm.log.factory.json.dumps", return_value="{}")
+    def test_format_once(self, mock_dumps):
+        record = make_record("message")
+
+        # ie. the file and SocketIO handlers each format the record with their own formatter
+        self.assertEqual(JsonFormatter().format(record), "{}")
+        self.assertEqual(JsonFormatter().format(record), "{}")
+        mock_dumps.assert_called_once()
+
+
+class TestSocketIOHandler(unittest.TestCase):
+    @patch("socketio.Client")
+    def test_connects_lazily(self, mock_client):
+        handler = SocketIOHandler("localhost", 6789)
+
+        mock_client.assert_not_called()
+        self.assertIsNone(handler.thread)
+
+        client = mock_client.return_value
+        client.connected = False
+        client.connect.side_effect = lambda url: setattr(client, "connected", True)
+
+        handler.emit(make_record("first"))
+        handler.emit(make_record("second"))
+        handler.close()
+
+        mock_client.return_value.connect.assert_called_once_with("http://localhost:6789")
+        messages = [call.args[1] for call in mock_client.return_value.emit.call_args_list]
+        self.assertEqual(len(messages), 2)
+        self.assertIn('"message": "first"', messages[0])
+        self.assertIn('"message": "second"', messages[1])
+        mock_client.return_value.disconnect.assert_called_once()
+
+    @patch("socketio.Client")
+    def test_unreachable_server(self, mock_client):
+        mock_client.return_value.connected = False
+        mock_client.return_value.connect.side_effect = socketio.exceptions.ConnectionError()
+
+        handler = SocketIOHandler("localhost", 6789)
+
+        for index in range(10):
+            handler.emit(make_record(f"message {index}"))
+
+        handler.close()
+
+        # records are discarded until the retry interval has passed, rather than trying to connect for each one
+        mock_client.return_value.connect.assert_called_once()
+        mock_client.return_value.emit.assert_not_called()
+        self.assertFalse(handler.thread.is_alive())
+
+    @patch("socketio.Client")
+    def test_close_while_connecting(self, mock_client):
+        connecting = threading.Event()
+        release = threading.Event()
+
+        client = mock_client.return_value
+        client.connected = False
+        # the client is connected before connect() returns, ie. while it waits on the namespaces
+        client.connect.side_effect = lambda url: (setattr(client, "connected", True), connecting.set(), release.wait())
+
+        handler = SocketIOHandler("localhost", 6789)
+        handler.CLOSE_TIMEOUT = 0.01
+        handler.emit(make_record("message"))
+        self.assertTrue(connecting.wait(5))
+
+        # the background thread is still connecting, so the client is left to it rather than disconnected
+        handler.close()
+        client.disconnect.assert_not_called()
+
+        release.set()
+        handler.thread.join(5)
+
+    def test_bounded_buffer(self):
+        handler = SocketIOHandler("localhost", 6789, capacity=3)
+
+        for index in range(5):
+            handler.__enqueue__(f"message {index}")
+
+        self.assertEqual([handler.queue.get_nowait() for _ in range(3)], ["message 2", "message 3", "message 4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
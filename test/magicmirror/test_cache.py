@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from mmpm.magicmirror.cache import BuildCache
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        self.root = Path(self.tmp_dir.name)
+        self.cache = BuildCache(self.root / "cache", max_size=1024 * 1024)
+
+    def create_module(self, name: str, size: int = 1024) -> Path:
+        directory = self.root / "modules" / name
+        (directory / ".git").mkdir(parents=True)
+        (directory / "node_modules" / ".bin").mkdir(parents=True)
+
+        (directory / ".git" / "HEAD").write_text("ref: refs/heads/master\n", encoding="utf-8")
+        (directory / f"{name}.js").write_bytes(os.urandom(size))
+        (directory / "node_modules" / "cli.js").write_text("#!/usr/bin/env node\n", encoding="utf-8")
+        (directory / "node_modules" / "cli.js").chmod(0o755)
+        (directory / "node_modules" / ".bin" / "cli").symlink_to("../cli.js")
+
+        return directory
+
+    def artifact(self, commit: str) -> dict:
+        return {"repository": "https://github.com/test/MMM-Module", "commit": commit, "arch": "aarch64", "toolchains": {"npm": "v20.0.0 | 10.0.0"}}
+
+    def test_key(self):
+        self.assertEqual(BuildCache.key(self.artifact("a" * 40)), BuildCache.key(dict(reversed(self.artifact("a" * 40).items()))))
+        self.assertNotEqual(BuildCache.key(self.artifact("a" * 40)), BuildCache.key(self.artifact("b" * 40)))
+        self.assertNotEqual(BuildCache.key(self.artifact("a" * 40)), BuildCache.key({**self.artifact("a" * 40), "arch": "x86_64"}))
+
+    def test_save_and_restore(self):
+        directory = self.create_module("MMM-Module")
+        key = BuildCache.key(self.artifact("a" * 40))
+
+        self.assertFalse(self.cache.restore(key, directory.with_name("MMM-Restored")))
+        self.assertTrue(self.cache.save(key, directory, {"title": "MMM-Module", **self.artifact("a" * 40)}))
+        self.assertTrue(self.cache.contains(key))
+
+        restored = directory.with_name("MMM-Restored")
+        self.assertTrue(self.cache.restore(key, restored))
+
+        self.assertEqual((restored / "MMM-Module.js").read_bytes(), (directory / "MMM-Module.js").read_bytes())
+        self.assertTrue((restored / ".git" / "HEAD").exists())
+        self.assertTrue(os.access(restored / "node_modules" / "cli.js", os.X_OK))
+        self.assertEqual(os.readlink(restored / "node_modules" / ".bin" / "cli"), "../cli.js")
+        self.assertEqual([path.name for path in restored.parent.iterdir() if path.name.startswith(".")], [])
+
+        # an existing installation is never overwritten
+        self.assertFalse(self.cache.restore(key, directory))
+
+        entries = self.cache.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["key"], key)
+        self.assertEqual(entries[0]["title"], "MMM-Module")
+        self.assertEqual(entries[0]["commit"], "a" * 40)
+        self.assertGreaterEqual(entries[0]["last_used"], entries[0]["created"])
+        self.assertEqual(self.cache.size(), entries[0]["size"])
+
+    def test_lru_eviction(self):
+        # random contents don't compress, so each archive is a little over 400 KiB
+        keys = [BuildCache.key(self.artifact(str(index) * 40)) for index in range(3)]
+
+        for index, key in enumerate(keys[:2]):
+            self.cache.save(key, self.create_module(f"MMM-Module-{index}", size=400 * 1024), {"title": f"MMM-Module-{index}"})
+
+        # using the oldest archive makes the other one the least recently used
+        metadata_file = self.cache.path / f"{keys[0]}.json"
+        metadata = json.loads(metadata_file.read_text(encoding="utf-8"))
+        metadata_file.write_text(json.dumps({**metadata, "last_used": metadata["last_used"] - 60}), encoding="utf-8")
+        self.assertTrue(self.cache.restore(keys[0], self.root / "restored"))
+
+        self.cache.save(keys[2], self.create_module("MMM-Module-2", size=400 * 1024), {"title": "MMM-Module-2"})
+
+        self.assertEqual([entry["key"] for entry in self.cache.entries()], [keys[0], keys[2]])
+        self.assertLessEqual(self.cache.size(), self.cache.max_size)
+
+        self.assertGreater(self.cache.evict(0), 0)
+        self.assertEqual(self.cache.entries(), [])
+        self.assertEqual(list(self.cache.path.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
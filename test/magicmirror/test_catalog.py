@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.magicmirror.catalog import Catalog
+from mmpm.magicmirror.package import MagicMirrorPackage
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.source = self.tmp_path / "packages.json"
+        self.catalog = Catalog(self.tmp_path / "packages.sqlite3")
+
+        # the JSON files used prior to the catalog, which are imported when the catalog is created
+        for name, path in {
+            "MMPM_CUSTOM_PACKAGES_FILE": self.tmp_path / "custom-packages.json",
+            "MMPM_AVAILABLE_UPGRADES_FILE": self.tmp_path / "available-upgrades.json",
+        }.items():
+            patcher = patch(f"mmpm.constants.paths.{name}", path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.packages = [
+            MagicMirrorPackage(
+                title="MMM-Forecast",
+                author="Jane",
+                repository="https://github.com/jane/MMM-Forecast",
+                description="Shows the weather forecast",
+                category="Weather",
+                directory="MMM-Forecast",
+            ),
+            MagicMirrorPackage(title="MMM-Calendar", author="John", repository="https://github.com/john/MMM-Calendar", category="Time"),
+        ]
+
+        with open(self.source, "w", encoding="utf-8") as source:
+            json.dump([package.serialize() for package in self.packages], source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_is_current(self):
+        self.assertFalse(self.catalog.is_current(self.source))
+        self.assertTrue(self.catalog.write(self.packages, self.source))
+        self.assertTrue(self.catalog.is_current(self.source))
+
+        # the JSON database changed after the catalog was built
+        stat = self.source.stat()
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertFalse(self.catalog.is_current(self.source))
+
+    def test_is_current_invalid_catalog(self):
+        self.catalog.path.write_text("not a catalog", encoding="utf-8")
+        self.assertFalse(self.catalog.is_current(self.source))
+
+    def test_import_json_files(self):
+        custom = MagicMirrorPackage(title="MMM-Custom", repository="https://github.com/me/MMM-Custom", directory="MMM-Custom", category="Custom Packages")
+        (self.tmp_path / "custom-packages.json").write_text(json.dumps([custom.serialize()]), encoding="utf-8")
+        (self.tmp_path / "available-upgrades.json").write_text(
+            json.dumps({"mmpm": True, "MagicMirror": False, "packages": [self.packages[0].serialize()]}), encoding="utf-8"
+        )
+
+        self.catalog.write(self.packages, self.source)
+
+        self.assertEqual(self.catalog.packages(custom_only=True), [custom])
+        self.assertEqual(self.catalog.upgradable(), {"mmpm": True, "MagicMirror": False, "packages": [self.packages[0].serialize()]})
+
+    def test_migrate(self):
+        custom = MagicMirrorPackage(title="MMM-Custom", repository="https://github.com/me/MMM-Custom", category="Custom Packages")
+
+        self.catalog.write(self.packages, self.source)
+        self.catalog.set_installed(self.packages[:1])
+        self.catalog.set_upgradable(self.packages[:1], mmpm=True)
+        self.catalog.add_custom_package(custom)
+
+        # the JSON files are only imported into catalogs that predate the user rows
+        (self.tmp_path / "custom-packages.json").write_text(json.dumps([self.packages[1].serialize()]), encoding="utf-8")
+
+        with patch("mmpm.magicmirror.catalog.CATALOG_VERSION", 3):
+            # the user rows are carried over to the new layout, while the packages of the wiki are rebuilt
+            self.assertFalse(self.catalog.is_current(self.source))
+            self.assertEqual(self.catalog.packages(custom_only=True), [custom])
+            self.assertEqual(self.catalog.rows("title"), [("MMM-Custom",)])
+            self.assertEqual(self.catalog.upgradable()["mmpm"], True)
+
+            self.catalog.write(self.packages, self.source)
+            self.assertEqual([(package.is_installed, package.is_upgradable) for package in self.catalog.packages()], [(True, True), (False, False), (False, False)])
+
+    def test_read_only(self):
+        self.catalog.write(self.packages, self.source)
+
+        with closing(self.catalog.__connect__(read_only=True)) as connection, self.assertRaises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM packages")
+
+    def test_rows(self):
+        self.catalog.write(self.packages, self.source)
+        self.assertEqual(self.catalog.rows("title"), [("MMM-Forecast",), ("MMM-Calendar",)])
+        self.assertEqual(self.catalog.rows("title", "directory"), [("MMM-Forecast", "MMM-Forecast"), ("MMM-Calendar", "")])
+
+        with self.assertRaises(ValueError):
+            self.catalog.rows("title; DROP TABLE packages")
+
+    def test_packages(self):
+        self.catalog.write(self.packages, self.source)
+        packages = self.catalog.packages()
+
+        self.assertEqual(packages, self.packages)
+        self.assertEqual([package.serialize() for package in packages], [package.serialize() for package in self.packages])
+
+    def test_write_replaces_packages(self):
+        custom = MagicMirrorPackage(title="MMM-Custom", repository="https://github.com/me/MMM-Custom", category="Custom Packages")
+
+        self.catalog.write(self.packages, self.source)
+        self.catalog.set_installed(self.packages[:1])
+        self.catalog.set_upgradable(self.packages[:1])
+        self.assertTrue(self.catalog.add_custom_package(custom))
+
+        self.catalog.write(self.packages[:1], self.source)
+
+        # the custom packages, and install/upgrade state, are kept, and the custom packages come last
+        self.assertEqual(self.catalog.rows("title"), [("MMM-Forecast",), ("MMM-Custom",)])
+        self.assertTrue(self.catalog.packages()[0].is_installed)
+        self.assertTrue(self.catalog.packages()[0].is_upgradable)
+
+    def test_custom_packages(self):
+        custom = MagicMirrorPackage(title="MMM-Custom", repository="https://github.com/me/MMM-Custom", category="Custom Packages")
+
+        self.assertTrue(self.catalog.add_custom_package(custom))
+        self.assertFalse(self.catalog.add_custom_package(MagicMirrorPackage(title="mmm-custom")))
+        self.assertEqual(self.catalog.packages(custom_only=True), [custom])
+
+        self.assertFalse(self.catalog.remove_custom_package("mmm-custom"))
+        self.assertTrue(self.catalog.remove_custom_package("MMM-Custom"))
+        self.assertEqual(self.catalog.packages(custom_only=True), [])
+
+    def test_set_installed(self):
+        self.catalog.write(self.packages, self.source)
+
+        # the install state is matched by repository and directory, regardless of case
+        installed = MagicMirrorPackage(repository="https://github.com/JANE/mmm-forecast", directory="mmm-forecast")
+        self.catalog.set_installed([installed])
+        self.assertEqual([package.is_installed for package in self.catalog.packages()], [True, False])
+
+        self.catalog.set_installed([])
+        self.assertEqual([package.is_installed for package in self.catalog.packages()], [False, False])
+
+    def test_serialized(self):
+        self.catalog.write(self.packages, self.source)
+        self.catalog.set_installed(self.packages)
+        self.catalog.set_upgradable(self.packages[1:], mmpm=True)
+
+        expected = [package.serialize(full=True) for package in self.catalog.packages()]
+
+        self.assertEqual(self.catalog.serialized(), expected)
+        self.assertEqual([package["is_upgradable"] for package in expected], [False, True])
+        self.assertEqual(self.catalog.upgradable(), {"mmpm": True, "MagicMirror": False, "packages": [self.packages[1].serialize()]})
+
+    def test_serialized_filters(self):
+        self.catalog.write(self.packages, self.source)
+        self.catalog.set_installed(self.packages[1:])
+
+        titles = lambda **filters: [package["title"] for package in self.catalog.serialized(fields=["title"], **filters)]
+
+        self.assertEqual(titles(), ["MMM-Forecast", "MMM-Calendar"])
+        self.assertEqual(titles(category="Weather"), ["MMM-Forecast"])
+        self.assertEqual(titles(installed=True), ["MMM-Calendar"])
+        self.assertEqual(titles(installed=False, upgradable=False), ["MMM-Forecast"])
+        self.assertEqual(titles(query="jane WEATHER"), ["MMM-Forecast"])
+        self.assertEqual(titles(query="jane calendar"), [])
+        self.assertEqual(titles(query="100%"), [])
+        self.assertEqual(titles(offset=1), ["MMM-Calendar"])
+        self.assertEqual(titles(offset=0, limit=1), ["MMM-Forecast"])
+        self.assertEqual(self.catalog.count(installed=True), 1)
+        self.assertEqual(self.catalog.count(), 2)
+
+    def test_serialized_fields(self):
+        self.catalog.write(self.packages, self.source)
+
+        self.assertEqual(self.catalog.serialized(fields=["title", "is_installed"], limit=1), [{"title": "MMM-Forecast", "is_installed": False}])
+
+        with self.assertRaises(ValueError):
+            self.catalog.serialized(fields=["title", "password"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,65 +1,335 @@
 #!/usr/bin/env python3
+import datetime
+import json
+import tempfile
 import unittest
-from unittest.mock import MagicMock, mock_open, patch
+from importlib.util import find_spec
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+from mmpm.constants import color
 from mmpm.env import MMPMEnv
-from mmpm.magicmirror.database import MagicMirrorDatabase
+from mmpm.magicmirror.database import REFRESH_INTERVAL, MagicMirrorDatabase
 from mmpm.magicmirror.package import MagicMirrorPackage
 
+WIKI_FIXTURE = Path(__file__).parent.parent / "fixtures" / "3rd-party-modules.html"
+
 
 class TestMagicMirrorDatabase(unittest.TestCase):
     def setUp(self):
         self.database = MagicMirrorDatabase()
 
+        # the package catalog is kept in a temporary directory, rather than the user's configuration directory
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tmp_path = Path(self.tmp_dir.name)
+
+        for name, path in {
+            "MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE": tmp_path / "catalog.sqlite3",
+            "MMPM_CUSTOM_PACKAGES_FILE": tmp_path / "custom-packages.json",
+            "MMPM_AVAILABLE_UPGRADES_FILE": tmp_path / "available-upgrades.json",
+        }.items():
+            patcher = patch(f"mmpm.constants.paths.{name}", path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.addCleanup(self.tmp_dir.cleanup)
+
     def test_download_packages(self):
         result = self.database.__download_packages__()
         self.assertIsInstance(result, list)
 
+    @patch("mmpm.magicmirror.database.BeautifulSoup")
+    @patch("mmpm.magicmirror.database.requests.get")
+    def test_download_packages_not_modified(self, mock_get, mock_soup):
+        mock_get.return_value = MagicMock(status_code=304)
+        self.database.etag = '"abc123"'
+        self.database.last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+        result = self.database.__download_packages__()
+
+        self.assertIsNone(result)
+        mock_soup.assert_not_called()
+        headers = mock_get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"abc123"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 21 Oct 2015 07:28:00 GMT")
+
+    @patch("mmpm.magicmirror.database.requests.get")
+    def test_download_packages_stores_validators(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200,
+            text='<div class="markdown-body"></div>',
+            headers={"ETag": '"def456"', "Last-Modified": "Thu, 22 Oct 2015 07:28:00 GMT"},
+        )
+        self.database.etag = ""
+        self.database.last_modified = ""
+
+        result = self.database.__download_packages__()
+
+        self.assertEqual(result, [])
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {})
+        self.assertEqual(self.database.etag, '"def456"')
+        self.assertEqual(self.database.last_modified, "Thu, 22 Oct 2015 07:28:00 GMT")
+
+    def test_is_stale(self):
+        self.database.expiration_date = datetime.datetime.now() - datetime.timedelta(minutes=1)
+        self.assertTrue(self.database.is_stale())
+
+        self.database.expiration_date = datetime.datetime.now() + datetime.timedelta(hours=1)
+        self.assertFalse(self.database.is_stale())
+
+        # expiration is disabled
+        self.database.expiration_date = None
+        self.assertFalse(self.database.is_stale())
+
+    def test_parse_last_update(self):
+        self.assertEqual(self.database.__parse_last_update__("2024-01-02 03:04:05"), datetime.datetime(2024, 1, 2, 3, 4, 5))
+        self.assertEqual(self.database.__parse_last_update__("not a date"), datetime.datetime.min)
+
+    @patch("mmpm.magicmirror.database.time.monotonic")
     @patch("mmpm.magicmirror.database.run_cmd")
-    @patch("mmpm.magicmirror.database.Path.iterdir")
-    def test_discover_installed_packages(self, mock_iterdir, mock_run_cmd):
-        mock_iterdir.return_value = []
-        mock_run_cmd.return_value = (0, "", "")
+    def test_refresh_in_background(self, mock_run_cmd, mock_monotonic):
+        database = MagicMirrorDatabase.__new__(MagicMirrorDatabase)
+        database.__init__()
 
-        # Test the __discover_installed_packages__ method
-        result = self.database.__discover_installed_packages__()
-        self.assertIsInstance(result, list)
+        mock_monotonic.return_value = 1000.0
+        database.__refresh_in_background__()
+        database.__refresh_in_background__()
+
+        # only a single detached refresh should be spawned per interval
+        mock_run_cmd.assert_called_once()
+        command = mock_run_cmd.call_args.args[0]
+        self.assertEqual(command[-3:], ["mmpm.entrypoint", "db", "--refresh"])
+        self.assertTrue(mock_run_cmd.call_args.kwargs["background"])
+
+        # a long-lived process (ie. the API) refreshes the database again once the interval has passed
+        mock_monotonic.return_value += REFRESH_INTERVAL
+        database.__refresh_in_background__()
+        self.assertEqual(mock_run_cmd.call_count, 2)
+
+    def test_parse_packages(self):
+        html = WIKI_FIXTURE.read_text(encoding="utf-8")
+        packages = self.database.__parse_packages__(html, parser="html.parser")
+
+        # the sidebar also has a 'markdown-body', but its headings must not be treated as categories
+        self.assertEqual(len(self.database.categories), 6)
+        self.assertNotIn("Sidebar", self.database.categories)
+
+        # the 'mmpm' row is skipped
+        self.assertEqual(len(packages), 48)
+        self.assertNotIn("mmpm", [package.title for package in packages])
+        self.assertEqual(packages[0].category, "Development / Core MagicMirror")
+        self.assertEqual(packages[-1].category, "Utility / IoT / 3rd Party / Integration")
+
+    @unittest.skipIf(find_spec("lxml") is None, "lxml is not installed")
+    def test_parse_packages_lxml(self):
+        html = WIKI_FIXTURE.read_text(encoding="utf-8")
+        expected = [package.serialize() for package in self.database.__parse_packages__(html, parser="html.parser")]
+        actual = [package.serialize() for package in self.database.__parse_packages__(html, parser="lxml")]
+        self.assertEqual(expected, actual)
+
+    def test_search(self):
+        self.database.packages = [
+            MagicMirrorPackage(title="MMM-Forecast", author="Jane", description="Shows the weather forecast", category="Weather"),
+            MagicMirrorPackage(title="MMM-Weather", author="John", description="Current conditions", category="Weather"),
+            MagicMirrorPackage(title="MMM-Calendar", author="John", description="A calendar", category="Time"),
+        ]
+        self.database.categories = ["Weather", "Time"]
+        self.database.index = None
+
+        self.assertEqual([package.title for package in self.database.search("weather")], ["MMM-Weather", "MMM-Forecast"])
+        self.assertEqual([package.title for package in self.database.search("Time")], ["MMM-Calendar"])
+        self.assertEqual([package.title for package in self.database.search("Shows", case_sensitive=True)], ["MMM-Forecast"])
+        self.assertEqual(self.database.search("shows", case_sensitive=True), [])
+        self.assertEqual([package.title for package in self.database.search("mmm-calendar", title_only=True)], ["MMM-Calendar"])
+        self.assertEqual(self.database.search("mmm-calendar", title_only=True, case_sensitive=True), [])
+
+        # substrings within a word are matched, but ranked below whole words
+        self.assertEqual([package.title for package in self.database.search("ecas")], ["MMM-Forecast"])
+        self.assertEqual([package.title for package in self.database.search("ather")], ["MMM-Weather", "MMM-Forecast"])
+
+        # queries without any letters or digits are only found by scanning the packages
+        self.assertEqual(len(self.database.search("-")), 3)
+
+        # a query the index doesn't match isn't matched by scanning the packages either
+        for package in self.database.packages:
+            package.description = MagicMock()
+
+        self.assertEqual(self.database.search("snow storm"), [])
+
+        for package in self.database.packages:
+            package.description.lower.assert_not_called()
+
+    def test_lookup(self):
+        package = MagicMirrorPackage(title="MMM-Forecast", repository="https://github.com/jane/MMM-Forecast", directory="MMM-Forecast", category="Weather")
+        self.database.packages = [package, MagicMirrorPackage(title="MMM-Weather")]
+        self.database.index = None
+
+        self.assertEqual(self.database.lookup(title="mmm-forecast"), [package])
+        self.assertEqual(self.database.lookup(repository="https://github.com/jane/mmm-forecast.git"), [package])
+        self.assertEqual(self.database.lookup(directory="MMM-Forecast"), [package])
+        self.assertEqual(self.database.lookup(category="Weather"), [package])
+        self.assertEqual(self.database.lookup(), [])
+
+        # the index follows the packages when they're replaced
+        self.database.packages = [MagicMirrorPackage(title="MMM-Weather")]
+        self.assertEqual(self.database.lookup(title="MMM-Forecast"), [])
+
+    def test_titles_catalog_only(self):
+        db_file = Path(self.tmp_dir.name) / "packages.json"
+        db_file.write_text(json.dumps([MagicMirrorPackage(title="MMM-Forecast").serialize()]))
+
+        self.addCleanup(setattr, self.database, "packages", self.database.packages)
+        self.database.packages = []
+
+        # the catalog was never written, so it isn't current, and a refresh must never be started
+        with patch("mmpm.constants.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE", db_file), patch.object(self.database, "load") as mock_load:
+            self.assertEqual(self.database.titles(catalog_only=True), [])
+            mock_load.assert_not_called()
+
+            self.database.titles()
+            mock_load.assert_called_once()
+
+    def test_load_cached(self):
+        tmp_path = Path(self.tmp_dir.name)
+        modules_dir = tmp_path / "MagicMirror" / "modules"
+        modules_dir.mkdir(parents=True)
+
+        db_file = tmp_path / "packages.json"
+        db_file.write_text(json.dumps([MagicMirrorPackage(title="MMM-Forecast", repository="https://github.com/jane/MMM-Forecast").serialize()]))
+        db_last_update = tmp_path / "last-update.json"
+        db_last_update.write_text(json.dumps({"last_update": str(datetime.datetime.now())}))
+
+        env = MagicMock()
+        env.MMPM_MAGICMIRROR_ROOT.get.return_value = tmp_path / "MagicMirror"
+        env.MMPM_DATABASE_MAX_AGE.get.return_value = 0
+
+        original_env = self.database.env
+        self.database.env = env
+        self.addCleanup(setattr, self.database, "env", original_env)
+        self.addCleanup(setattr, self.database, "_MagicMirrorDatabase__stamp", None)
+
+        with patch("mmpm.constants.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE", db_file), patch(
+            "mmpm.constants.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE", db_last_update
+        ), patch.object(self.database, "__discover_installed_packages__", return_value=[]) as mock_discover:
+            self.assertTrue(self.database.load())
+            self.assertTrue(self.database.load())
+            self.assertEqual(mock_discover.call_count, 1)
+
+            # installing a package changes the modules directory
+            (modules_dir / "MMM-Forecast").mkdir()
+            self.assertTrue(self.database.load())
+            self.assertEqual(mock_discover.call_count, 2)
+
+            # adding a custom package writes to the catalog
+            self.database.add_mm_pkg(title="MMM-Custom", author="me", repository="https://github.com/me/MMM-Custom")
+            self.assertTrue(self.database.load())
+            self.assertEqual(mock_discover.call_count, 3)
+            self.assertEqual([package.title for package in self.database.packages], ["MMM-Forecast", "MMM-Custom"])
+
+    def test_parse_packages_invalid_layout(self):
+        self.assertEqual(self.database.__parse_packages__("<html><body><table></table></body></html>"), [])
+
+    @patch("mmpm.magicmirror.database.run_cmd")
+    def test_discover_installed_packages(self, mock_run_cmd):
+        magicmirror_root = Path(self.tmp_dir.name) / "MagicMirror"
+        modules_dir = magicmirror_root / "modules"
+
+        for index in range(100):
+            git_dir = modules_dir / f"MMM-Module-{index}" / ".git"
+            git_dir.mkdir(parents=True)
+            (git_dir / "config").write_text(f'[remote "origin"]\n\turl = https://github.com/test/MMM-Module-{index}.git\n')
+
+        (modules_dir / "not-a-repo").mkdir()
+        (modules_dir / "default.js").write_text("")
+        (modules_dir / "MMM-No-Origin" / ".git").mkdir(parents=True)
+
+        env = MagicMock()
+        env.MMPM_MAGICMIRROR_ROOT.get.return_value = magicmirror_root
+
+        with patch.object(self.database, "env", env):
+            result = self.database.__discover_installed_packages__()
+
+        self.assertEqual(len(result), 100)
+        self.assertIn(MagicMirrorPackage(repository="https://github.com/test/MMM-Module-42.git", directory="MMM-Module-42"), result)
+
+        # no processes are spawned to inspect the packages
+        mock_run_cmd.assert_not_called()
 
     @patch("mmpm.magicmirror.database.MagicMirrorPackage.update")
-    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
-    def test_update(self, mock_file, mock_update):
+    def test_update(self, mock_update):
         self.database.packages = [MagicMirrorPackage(title="Test Package")]
 
         result = self.database.update()
         self.assertFalse(result)
 
-    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
-    def test_add_mm_pkg(self, mock_file):
-        mock_file.return_value.read.return_value = "[]"
+    @patch("mmpm.magicmirror.database.print")
+    def test_update_concurrent(self, mock_print):
+        packages = [
+            MagicMirrorPackage(title=f"Package {index}", repository=f"https://github.com/test/package-{index}", is_installed=True)
+            for index in range(10)
+        ]
 
-        result = self.database.add_mm_pkg(
-            title="Test Package",
-            author="Test Author",
-            repository="https://github.com/repo/test-package",
-            description="Test Description",
-        )
+        def fake_update(package, timeout=None):
+            package.is_upgradable = int(package.title.split()[-1]) % 2 == 0
 
-        self.assertTrue(result)
+        self.database.packages = packages
 
-    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
-    def test_remove_mm_pkg_success(self, mock_file):
-        mock_file.return_value.read.return_value = '[{"title": "Test Package"}]'
+        with patch.object(MagicMirrorPackage, "update", autospec=True, side_effect=fake_update) as mock_update:
+            result = self.database.update()
 
-        result = self.database.remove_mm_pkg(title="Test Package")
-        self.assertTrue(result)
+        self.assertEqual(result, 5)
+        self.assertEqual(mock_update.call_count, len(packages))
 
-    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
-    def test_remove_mm_pkg_failure(self, mock_file):
-        mock_file.return_value.read.return_value = '[{"title": "Test Package"}]'
+        # output must remain in the same order as the packages, regardless of which check finished first
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertTrue(printed[-1].startswith(f"Checked {len(packages)} package(s) for updates in"))
+        self.assertEqual(printed[:-1], [f"Retrieved: {pkg.repository} [{color.n_cyan(pkg.title)}]" for pkg in packages])
 
-        result = self.database.remove_mm_pkg(title="Not found")
-        self.assertFalse(result)
+    @patch("mmpm.magicmirror.database.print")
+    def test_add_mm_pkg(self, mock_print):
+        package = {
+            "title": "Test Package",
+            "author": "Test Author",
+            "repository": "https://github.com/repo/test-package",
+            "description": "Test Description",
+        }
+
+        self.assertTrue(self.database.add_mm_pkg(**package))
+
+        # titles of custom packages must be unique, regardless of case
+        self.assertFalse(self.database.add_mm_pkg(**{**package, "title": "test package"}))
+
+        custom_packages = self.database.custom_packages()
+        self.assertEqual(len(custom_packages), 1)
+        self.assertEqual(custom_packages[0].title, "Test Package")
+        self.assertEqual(custom_packages[0].category, "Custom Packages")
+        self.assertEqual(custom_packages[0].directory.name, "test-package")
+
+    @patch("mmpm.magicmirror.database.print")
+    def test_remove_mm_pkg_success(self, mock_print):
+        self.database.add_mm_pkg(title="Test Package", author="Test Author", repository="https://github.com/repo/test-package")
+
+        self.assertTrue(self.database.remove_mm_pkg(title="Test Package"))
+        self.assertEqual(self.database.custom_packages(), [])
+
+    @patch("mmpm.magicmirror.database.print")
+    def test_remove_mm_pkg_failure(self, mock_print):
+        self.database.add_mm_pkg(title="Test Package", author="Test Author", repository="https://github.com/repo/test-package")
+
+        self.assertFalse(self.database.remove_mm_pkg(title="Not found"))
+        self.assertEqual(len(self.database.custom_packages()), 1)
+
+    def test_write_upgradable(self):
+        self.assertEqual(self.database.upgradable(), {"mmpm": False, "MagicMirror": False, "packages": []})
+
+        self.database.write_upgradable({"mmpm": True, "MagicMirror": False, "packages": [{"title": "Test Package"}]})
+        upgradable = self.database.upgradable()
+
+        self.assertTrue(upgradable["mmpm"])
+        self.assertFalse(upgradable["MagicMirror"])
 
+        # only packages within the catalog are reported as upgradable
+        self.assertEqual(upgradable["packages"], [])
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import unittest
+
+from mmpm.magicmirror.index import PackageIndex, normalize_repository, tokenize
+from mmpm.magicmirror.package import MagicMirrorPackage
+
+
+class TestPackageIndex(unittest.TestCase):
+    def setUp(self):
+        self.packages = [
+            MagicMirrorPackage(
+                title="MMM-Forecast",
+                author="Jane",
+                description="Shows the weather forecast",
+                repository="https://github.com/jane/MMM-Forecast.git",
+                directory="MMM-Forecast",
+                category="Weather",
+            ),
+            MagicMirrorPackage(title="MMM-Weather", author="John", description="Current conditions"),
+            MagicMirrorPackage(title="MMM-Calendar", author="Weatherby", description="A calendar"),
+            MagicMirrorPackage(title="MMM-News", author="Jane", description="Headlines from the weather channel"),
+        ]
+        self.index = PackageIndex(self.packages)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("MMM-Weather: it's_sunny 2day"), ["mmm", "weather", "it", "s", "sunny", "2day"])
+
+    def test_search_ranks_title_above_author_and_description(self):
+        results = self.index.search("weather")
+        self.assertEqual([package.title for package in results], ["MMM-Weather", "MMM-Forecast", "MMM-Calendar", "MMM-News"])
+
+    def test_search_prefix(self):
+        results = self.index.search("cal")
+        self.assertEqual([package.title for package in results], ["MMM-Calendar"])
+
+    def test_search_infix(self):
+        packages = [MagicMirrorPackage(title="MMM-OpenWeatherMap"), MagicMirrorPackage(title="currentweather"), MagicMirrorPackage(title="MMM-Weather")]
+        results = PackageIndex(packages).search("weather")
+        self.assertEqual([package.title for package in results], ["MMM-Weather", "MMM-OpenWeatherMap", "currentweather"])
+
+    def test_search_all_terms_must_match(self):
+        self.assertEqual([package.title for package in self.index.search("jane weather")], ["MMM-Forecast", "MMM-News"])
+        self.assertEqual(self.index.search("jane calendar"), [])
+
+    def test_search_no_terms(self):
+        self.assertEqual(self.index.search(" -- "), [])
+
+    def test_title(self):
+        self.assertEqual(self.index.title("mmm-news"), [self.packages[3]])
+        self.assertEqual(self.index.title("mmm-news", case_sensitive=True), [])
+        self.assertEqual(self.index.title("MMM-News", case_sensitive=True), [self.packages[3]])
+        self.assertEqual(self.index.title("MMM-Nothing"), [])
+
+    def test_normalize_repository(self):
+        expected = "github.com/owner/name"
+
+        for repository in [
+            "https://github.com/owner/name",
+            "https://github.com/Owner/Name.git",
+            "http://github.com/owner/name/",
+            "git@github.com:owner/name.git",
+            "ssh://git@github.com/owner/name.git",
+        ]:
+            self.assertEqual(normalize_repository(repository), expected)
+
+    def test_repository(self):
+        self.assertEqual(self.index.repository("git@github.com:jane/mmm-forecast.git"), [self.packages[0]])
+        self.assertEqual(self.index.repository("https://github.com/jane/MMM-Nothing"), [])
+
+    def test_directory(self):
+        self.assertEqual(self.index.directory("mmm-forecast"), [self.packages[0]])
+        self.assertEqual(self.index.directory("MMM-Nothing"), [])
+
+    def test_category(self):
+        self.assertEqual(self.index.category("Weather"), [self.packages[0]])
+        self.assertEqual(self.index.category("weather"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
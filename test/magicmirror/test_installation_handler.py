@@ -1,20 +1,30 @@
 #!/usr/bin/env python3
 
+import os
+import subprocess
+import tempfile
 import unittest
 from multiprocessing import cpu_count
 from pathlib import Path
+from test.helpers import commit, create_repository
 from unittest.mock import MagicMock, patch
 
-from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage
+from mmpm.constants import paths
+from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage, toolchain_version
 
 
 class TestInstallationHandler(unittest.TestCase):
     def setUp(self):
         self.mock_package = MagicMock(spec=MagicMirrorPackage)
+        self.mock_package.directory = Path("/tmp/MagicMirror/modules/test_dir")
+        self.mock_package.env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        self.mock_package.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        self.mock_package.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
         self.handler = InstallationHandler(self.mock_package)
 
     def test_constructor(self):
         self.assertEqual(self.handler.package, self.mock_package)
+        self.assertTrue(self.handler.progress)
 
     @patch("os.chdir")
     @patch("os.system")
@@ -50,7 +60,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["bundle", "install"], message="Installing Ruby dependencies")
+        mock_run_cmd.assert_called_with(["bundle", "install"], progress=True, message="Installing Ruby dependencies", cwd=self.mock_package.directory)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_npm_install(self, mock_run_cmd):
@@ -60,7 +70,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["npm", "install"], message="Installing Node dependencies")
+        mock_run_cmd.assert_called_with(["npm", "install"], progress=True, message="Installing Node dependencies", cwd=self.mock_package.directory)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     @patch("os.cpu_count", return_value=4)
@@ -71,7 +81,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["make", "-j", f"{cpu_count()}"], message="Building with 'make'")
+        mock_run_cmd.assert_called_with(["make", "-j", f"{cpu_count()}"], progress=True, message="Building with 'make'", cwd=self.mock_package.directory)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_pip_install(self, mock_run_cmd):
@@ -83,7 +93,9 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(stderr, "stderr")
         mock_run_cmd.assert_called_with(
             ["pip", "install", "-r", "requirements.txt"],
+            progress=True,
             message="Installing Python dependencies",
+            cwd=self.mock_package.directory,
         )
 
     @patch("mmpm.magicmirror.package.run_cmd")
@@ -94,7 +106,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["mvn", "install"], message="Building with Maven")
+        mock_run_cmd.assert_called_with(["mvn", "install"], progress=True, message="Building with Maven", cwd=self.mock_package.directory)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_go_build(self, mock_run_cmd):
@@ -104,25 +116,270 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["go", "build"], message="Building Go project")
+        mock_run_cmd.assert_called_with(["go", "build"], progress=True, message="Building Go project", cwd=self.mock_package.directory)
 
     @patch("mmpm.magicmirror.package.run_cmd")
-    @patch("os.chdir")
-    @patch("os.system")
+    @patch("mmpm.magicmirror.package.shutil.rmtree")
     @patch("pathlib.Path.mkdir")
-    def test_cmake(self, mock_mkdir, mock_system, mock_chdir, mock_run_cmd):
+    def test_cmake(self, mock_mkdir, mock_rmtree, mock_run_cmd):
         mock_run_cmd.return_value = (0, "stdout", "stderr")
         build_dir = Path("fake/dir/build")
         self.mock_package.directory = Path("fake/dir")
 
-        mock_mkdir.return_value = build_dir
         error_code, stdout, stderr = self.handler.cmake()
 
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
 
+        mock_rmtree.assert_called_with(build_dir, ignore_errors=True)
         mock_mkdir.assert_called_with(exist_ok=True)
-        mock_system.assert_called_with(f"rm -rf {build_dir}/*")
-        mock_chdir.assert_called_with(build_dir)
-        mock_run_cmd.assert_called_with(["cmake", ".."], message="Building with CMake")
+        mock_run_cmd.assert_called_with(["cmake", ".."], progress=True, message="Building with CMake", cwd=build_dir)
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_quiet_handler(self, mock_run_cmd):
+        mock_run_cmd.return_value = (0, "", "")
+        InstallationHandler(self.mock_package, progress=False).npm_install()
+        mock_run_cmd.assert_called_with(["npm", "install"], progress=False, message="Installing Node dependencies", cwd=self.mock_package.directory)
+
+    def test_install_never_changes_directory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir) / "MagicMirror"
+            (root / "modules" / "test_dir" / ".git").mkdir(parents=True)
+            (root / "modules" / "test_dir" / "package.json").touch()
+
+            self.mock_package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = root
+            self.mock_package.directory = Path("test_dir")
+            cwd = os.getcwd()
+
+            with patch("mmpm.magicmirror.package.run_cmd", return_value=(0, "", "")) as mock_run_cmd, patch(
+                "mmpm.magicmirror.package.toolchain_version", return_value="v20.0.0 | 10.0.0"
+            ):
+                self.assertTrue(self.handler.install())
+
+            self.assertEqual(os.getcwd(), cwd)
+            self.mock_package.clone.assert_not_called()
+            mock_run_cmd.assert_called_once_with(["npm", "install"], progress=True, message="Installing Node dependencies", cwd=root / "modules" / "test_dir")
+
+    def test_build_without_dependencies(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.mock_package.directory = Path(tmp_dir)
+
+            with patch("mmpm.magicmirror.package.run_cmd") as mock_run_cmd:
+                self.assertTrue(self.handler.build())
+
+            mock_run_cmd.assert_not_called()
+
+
+class TestBuildStamp(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        self.directory = Path(self.tmp_dir.name) / "MMM-Module"
+        (self.directory / ".git").mkdir(parents=True)
+        (self.directory / "package.json").write_text('{"dependencies": {"left-pad": "1.3.0"}}', encoding="utf-8")
+        (self.directory / "package-lock.json").write_text('{"lockfileVersion": 3}', encoding="utf-8")
+
+        self.package = MagicMock(spec=MagicMirrorPackage)
+        self.package.title = "MMM-Module"
+        self.package.directory = self.directory
+        self.package.env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        self.package.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        self.handler = InstallationHandler(self.package, progress=False)
+
+        patcher = patch("mmpm.magicmirror.package.toolchain_version", return_value="v20.0.0 | 10.0.0")
+        self.mock_toolchain_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def npm(self, *_, **__):
+        (self.directory / "node_modules").mkdir(exist_ok=True)
+        return 0, "", ""
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_skips_unchanged_dependencies(self, mock_run_cmd):
+        mock_run_cmd.side_effect = self.npm
+
+        self.assertTrue(self.handler.build())
+        mock_run_cmd.assert_called_once_with(["npm", "ci"], progress=False, message="Installing Node dependencies", cwd=self.directory)
+        self.assertTrue((self.directory / ".git" / "mmpm-build-stamp.json").exists())
+
+        # only the source of the module changed
+        (self.directory / "MMM-Module.js").write_text("Module.register('MMM-Module', {});", encoding="utf-8")
+        self.assertTrue(self.handler.build())
+        self.assertEqual(mock_run_cmd.call_count, 1)
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_reinstalls_changed_dependencies(self, mock_run_cmd):
+        mock_run_cmd.side_effect = self.npm
+        self.assertTrue(self.handler.build())
+
+        (self.directory / "package-lock.json").write_text('{"lockfileVersion": 3, "packages": {}}', encoding="utf-8")
+        self.assertTrue(self.handler.build())
+        self.assertEqual(mock_run_cmd.call_count, 2)
+
+        self.mock_toolchain_version.return_value = "v22.0.0 | 10.0.0"
+        self.assertTrue(self.handler.build())
+        self.assertEqual(mock_run_cmd.call_count, 3)
+
+        # the dependencies were removed by hand
+        (self.directory / "node_modules").rmdir()
+        self.assertTrue(self.handler.build())
+        self.assertEqual(mock_run_cmd.call_count, 4)
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_failed_install_removes_stamp(self, mock_run_cmd):
+        mock_run_cmd.side_effect = self.npm
+        self.assertTrue(self.handler.build())
+
+        (self.directory / "package.json").write_text('{"dependencies": {}}', encoding="utf-8")
+        mock_run_cmd.side_effect = None
+        mock_run_cmd.return_value = (1, "", "npm ERR!")
+
+        self.assertFalse(self.handler.build())
+        self.assertFalse((self.directory / ".git" / "mmpm-build-stamp.json").exists())
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_npm_install_without_lockfile(self, mock_run_cmd):
+        (self.directory / "package-lock.json").unlink()
+        mock_run_cmd.side_effect = self.npm
+
+        self.assertTrue(self.handler.build())
+        mock_run_cmd.assert_called_once_with(["npm", "install"], progress=False, message="Installing Node dependencies", cwd=self.directory)
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_npm_ci_falls_back_to_install(self, mock_run_cmd):
+        # the lockfile wasn't updated along with package.json, so 'npm ci' refuses to install
+        (self.directory / "package.json").write_text('{"dependencies": {"left-pad": "1.3.0", "moment": "2.30.1"}}', encoding="utf-8")
+        error = "npm ERR! `npm ci` can only install packages when your package.json and package-lock.json are in sync"
+        mock_run_cmd.side_effect = lambda command, **kwargs: (1, "", error) if command[1] == "ci" else self.npm()
+
+        self.assertTrue(self.handler.build())
+        self.assertEqual([call.args[0] for call in mock_run_cmd.call_args_list], [["npm", "ci"], ["npm", "install"]])
+        self.assertTrue((self.directory / ".git" / "mmpm-build-stamp.json").exists())
+
+    @patch("mmpm.magicmirror.package.DependencyStore")
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_npm_ci_falls_back_to_install_shared(self, mock_run_cmd, mock_store):
+        self.package.env.MMPM_DEPENDENCY_STORE.get.return_value = True
+        mock_store.return_value.link.return_value = {"files": 1, "size": 1024, "shared": 0, "added": 1024, "seconds": 0.1, "error": ""}
+
+        def npm(command, **_):
+            node_modules = self.directory / "node_modules"
+
+            if command[1] == "ci":
+                # 'npm ci' failed part way through, leaving some of the dependencies behind
+                node_modules.mkdir()
+                (node_modules / "left-pad.js").write_text("", encoding="utf-8")
+                return 1, "", "npm ERR!"
+
+            # 'npm install' would overwrite the files shared with other packages in place
+            self.assertFalse(node_modules.exists())
+            return 0, "", ""
+
+        mock_run_cmd.side_effect = npm
+
+        self.assertEqual(self.handler.npm_install(), (0, "", ""))
+        self.assertEqual(mock_run_cmd.call_count, 2)
+        mock_store.return_value.link.assert_called_once_with(self.directory / "node_modules")
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_toolchain_version(self, mock_run_cmd):
+        mock_run_cmd.side_effect = [(0, "v20.0.0\n", ""), (0, "10.0.0\n", "")]
+
+        with patch.dict("mmpm.magicmirror.package.__toolchain_versions", clear=True):
+            self.assertEqual(toolchain_version("npm"), "v20.0.0 | 10.0.0")
+            self.assertEqual(toolchain_version("npm"), "v20.0.0 | 10.0.0")
+
+        self.assertEqual(mock_run_cmd.call_count, 2)
+
+    @patch("mmpm.magicmirror.package.DependencyStore")
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_shared_dependency_store(self, mock_run_cmd, mock_store):
+        self.package.env.MMPM_DEPENDENCY_STORE.get.return_value = True
+        mock_store.return_value.link.return_value = {"files": 2, "size": 2048, "shared": 1024, "added": 1024, "seconds": 0.1, "error": ""}
+        (self.directory / "package-lock.json").unlink()
+        (self.directory / "node_modules").mkdir()
+        (self.directory / "node_modules" / "left-pad.js").write_text("", encoding="utf-8")
+        mock_run_cmd.return_value = (0, "", "")
+
+        self.assertEqual(self.handler.npm_install(), (0, "", ""))
+
+        # 'npm install' would overwrite the files shared with other packages in place
+        self.assertFalse((self.directory / "node_modules").exists())
+        mock_store.return_value.link.assert_called_once_with(self.directory / "node_modules")
+
+        mock_run_cmd.return_value = (1, "", "npm ERR!")
+        self.handler.npm_install()
+        mock_store.return_value.link.assert_called_once()
+
+
+class TestCachedInstall(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+        root = Path(self.tmp_dir.name)
+
+        # the Makefile counts how many times the module is built
+        self.remote = create_repository(root / "MMM-Module", {"Makefile": f"all:\n\techo built >> {root / 'builds.txt'}\n", "MMM-Module.js": "initial"})
+
+        self.modules_dir = root / "MagicMirror" / "modules"
+        self.modules_dir.mkdir(parents=True)
+        self.builds_file = root / "builds.txt"
+
+        self.env = MagicMock()
+        self.env.MMPM_MAGICMIRROR_ROOT.get.return_value = self.modules_dir.parent
+        self.env.MMPM_CLONE_STRATEGY.get.return_value = "full"
+        self.env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        self.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 10
+        self.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+        for patcher in (
+            patch.object(paths, "MMPM_BUILD_CACHE_DIR", root / "cache"),
+            patch("mmpm.magicmirror.package.toolchain_version", return_value="v20.0.0 | 10.0.0"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def commit(self, message: str):
+        commit(self.remote, message, {"MMM-Module.js": message})
+
+    def install(self) -> InstallationHandler:
+        package = MagicMirrorPackage(title="MMM-Module", repository=f"file://{self.remote}", directory="MMM-Module")
+        package.env = self.env
+        handler = InstallationHandler(package, progress=False)
+        self.assertTrue(handler.install())
+        return handler
+
+    def reinstall(self) -> InstallationHandler:
+        subprocess.run(["rm", "-rf", str(self.modules_dir / "MMM-Module")], check=True)
+        return self.install()
+
+    def builds(self) -> int:
+        return self.builds_file.read_text(encoding="utf-8").count("built")
+
+    def test_restores_built_package(self):
+        self.assertFalse(self.install().restored)
+        self.assertEqual(self.builds(), 1)
+
+        with patch.object(MagicMirrorPackage, "clone") as mock_clone:
+            self.assertTrue(self.reinstall().restored)
+            mock_clone.assert_not_called()
+
+        self.assertEqual(self.builds(), 1)
+        self.assertEqual((self.modules_dir / "MMM-Module" / "MMM-Module.js").read_text(encoding="utf-8"), "initial")
+
+        # a new commit isn't within the cache yet
+        self.commit("feature")
+        self.assertFalse(self.reinstall().restored)
+        self.assertEqual(self.builds(), 2)
+        self.assertEqual((self.modules_dir / "MMM-Module" / "MMM-Module.js").read_text(encoding="utf-8"), "feature")
+        self.assertTrue(self.reinstall().restored)
+
+    def test_disabled(self):
+        self.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        self.install()
+
+        self.assertFalse(self.reinstall().restored)
+        self.assertEqual(self.builds(), 2)
+        self.assertFalse((Path(self.tmp_dir.name) / "cache").exists())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from test.helpers import commit, create_repository, git
+from unittest.mock import MagicMock, patch
+
+from mmpm.constants import paths
+from mmpm.magicmirror.mirror import FETCH_STAMP_FILE, RepositoryMirror
+from mmpm.magicmirror.package import MagicMirrorPackage
+
+
+class TestRepositoryMirror(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+        self.remote = create_repository(self.root / "remotes" / "MMM-Module", {"MMM-Module.js": "initial"})
+
+        self.modules_dir = self.root / "MagicMirror" / "modules"
+        self.modules_dir.mkdir(parents=True)
+
+        self.env = MagicMock()
+        self.env.MMPM_MAGICMIRROR_ROOT.get.return_value = self.modules_dir.parent
+        self.env.MMPM_CLONE_STRATEGY.get.return_value = "full"
+        self.env.MMPM_REPOSITORY_MIRRORS.get.return_value = True
+
+        patcher = patch.object(paths, "MMPM_MIRRORS_DIR", self.root / "mirrors")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.package = MagicMirrorPackage(title="MMM-Module", repository=self.remote.as_uri(), directory="MMM-Module")
+        self.package.env = self.env
+        self.mirror = RepositoryMirror(self.package.repository)
+
+    def commit(self, message: str):
+        commit(self.remote, message, {"MMM-Module.js": message})
+
+    def git(self, *args: str) -> str:
+        return git(self.modules_dir / "MMM-Module", *args)
+
+    def disconnect(self):
+        """Makes the remote unreachable, as if the network was down."""
+        self.remote.rename(self.remote.with_name("offline"))
+
+    def test_clone(self):
+        error_code, _, stderr = self.package.clone(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+
+        self.assertTrue(self.mirror.exists())
+        self.assertEqual(self.git("remote", "get-url", "origin"), self.package.repository)
+        self.assertEqual((self.modules_dir / "MMM-Module" / "MMM-Module.js").read_text(encoding="utf-8"), "initial")
+
+        # the package doesn't borrow objects from the mirror
+        self.assertFalse((self.modules_dir / "MMM-Module" / ".git" / "objects" / "info" / "alternates").exists())
+
+    def test_reinstall_without_network(self):
+        self.package.clone(progress=False)
+        self.assertTrue(self.package.remove())
+
+        self.disconnect()
+        error_code, _, stderr = self.package.clone(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+        self.assertEqual((self.modules_dir / "MMM-Module" / "MMM-Module.js").read_text(encoding="utf-8"), "initial")
+
+        # an outdated mirror is still used when the remote can't be reached
+        os.utime(self.mirror.path / FETCH_STAMP_FILE, (0, 0))
+        self.assertTrue(self.package.remove())
+        error_code, _, stderr = self.package.clone(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+
+    def test_seeded_by_remove(self):
+        self.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+        self.package.clone(progress=False)
+        self.assertFalse(self.mirror.exists())
+
+        self.env.MMPM_REPOSITORY_MIRRORS.get.return_value = True
+        self.assertTrue(self.package.remove())
+        self.assertTrue(self.mirror.exists())
+
+        self.disconnect()
+        error_code, _, stderr = self.package.clone(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+        self.assertEqual(self.git("remote", "get-url", "origin"), self.package.repository)
+
+    def test_fetch(self):
+        self.package.clone(progress=False)
+        self.commit("feature")
+
+        # fetching always updates the mirror, no matter how recently it was updated
+        error_code, _, stderr = self.package.fetch(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+        self.assertEqual(self.git("rev-parse", "@{upstream}"), git(self.remote, "rev-parse", "HEAD"))
+
+        # an outdated mirror would hide new changes of the remote, so it's never used for fetching
+        self.disconnect()
+        self.assertNotEqual(self.package.fetch(progress=False)[0], 0)
+
+    def test_shallow_clone(self):
+        self.commit("feature")
+        self.env.MMPM_CLONE_STRATEGY.get.return_value = "shallow"
+
+        error_code, _, stderr = self.package.clone(progress=False)
+        self.assertEqual(error_code, 0, stderr)
+        self.assertEqual(len(self.git("log", "--oneline").splitlines()), 1)
+        self.assertEqual(len(git(self.mirror.path, "log", "--oneline").splitlines()), 2)
+
+        # the rest of the history is retrieved from the mirror
+        self.disconnect()
+        self.assertTrue(self.package.deepen())
+        self.assertEqual(len(self.git("log", "--oneline").splitlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
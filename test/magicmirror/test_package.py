@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
+import tempfile
 import unittest
 from pathlib import Path
+from test.helpers import commit, create_repository, git
 from unittest.mock import MagicMock, patch
 
 from faker import Faker
 
 from mmpm.env import MMPM_DEFAULT_ENV, MMPMEnv
-from mmpm.magicmirror.package import MagicMirrorPackage, __sanitize__
+from mmpm.magicmirror.package import CLONE_STRATEGIES, MagicMirrorPackage, __sanitize__
 
 fake = Faker()
 
@@ -99,12 +101,83 @@ class TestMagicMirrorPackage(unittest.TestCase):
             [
                 "git",
                 "clone",
+                "--config",
+                "mmpm.cloneStrategy=full",
                 self.package.repository,
                 str(modules / self.package.directory),
             ],
+            progress=True,
             message="Downloading",
+            cwd=modules,
         )
 
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_clone_strategies(self, mock_run_cmd):
+        self.package.env = MagicMock()
+        self.package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path("/tmp/MagicMirror")
+        self.package.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+        for strategy, arguments in CLONE_STRATEGIES.items():
+            self.package.env.MMPM_CLONE_STRATEGY.get.return_value = strategy
+            self.package.clone()
+            command = mock_run_cmd.call_args[0][0]
+            self.assertEqual(command[2:-2], arguments + ["--config", f"mmpm.cloneStrategy={strategy}"])
+
+        self.package.env.MMPM_CLONE_STRATEGY.get.return_value = "garbage"
+        self.package.clone()
+        self.assertEqual(mock_run_cmd.call_args[0][0][2:-2], ["--config", "mmpm.cloneStrategy=full"])
+
+    def test_shallow_clone(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            remote = create_repository(Path(tmp_dir) / "remote", {"README.md": "0"})
+
+            for index in range(1, 3):
+                commit(remote, str(index), {"README.md": str(index)})
+
+            self.package.env = MagicMock()
+            self.package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(tmp_dir) / "MagicMirror"
+            self.package.env.MMPM_CLONE_STRATEGY.get.return_value = "shallow"
+            self.package.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+            self.package.repository = f"file://{remote}"
+            (Path(tmp_dir) / "MagicMirror" / "modules").mkdir(parents=True)
+
+            error_code, _, stderr = self.package.clone(progress=False)
+            self.assertEqual(error_code, 0, stderr)
+            self.assertEqual(self.package.clone_strategy(), "shallow")
+
+            self.assertTrue(self.package.deepen())
+            self.assertEqual(self.package.clone_strategy(), "full")
+            self.assertFalse(self.package.deepen())
+
+            directory = Path(tmp_dir) / "MagicMirror" / "modules" / self.package.directory
+            self.assertEqual(len(git(directory, "log", "--oneline").splitlines()), 3)
+
+    @patch("mmpm.magicmirror.package.InstallationHandler.install", return_value=True)
+    @patch("mmpm.magicmirror.package.MagicMirrorPackage.clone_strategy", return_value="shallow")
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_upgrade_deepens_shallow_clone(self, mock_run_cmd, mock_clone_strategy, mock_install):
+        self.package.env = MMPMEnv()
+        mock_run_cmd.side_effect = [(0, "", "From file:///remote"), (128, "", "fatal: Not possible to fast-forward, aborting."), (0, "", ""), (0, "", ""), (0, "Updating", "")]
+
+        self.assertTrue(self.package.upgrade())
+
+        commands = [call[0][0] for call in mock_run_cmd.call_args_list]
+        merge = ["git", "merge", "--ff-only", "@{upstream}"]
+        self.assertEqual(commands, [["git", "fetch"], merge, ["git", "fetch", "--unshallow"], ["git", "config", "mmpm.cloneStrategy", "full"], merge])
+        mock_install.assert_called_once()
+
+    @patch("mmpm.magicmirror.package.InstallationHandler.install", return_value=True)
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_upgrade_up_to_date(self, mock_run_cmd, mock_install):
+        self.package.env = MMPMEnv()
+        mock_run_cmd.return_value = (0, "Already up to date.", "")
+
+        self.assertTrue(self.package.upgrade())
+        mock_install.assert_not_called()
+
+        self.assertTrue(self.package.upgrade(force=True))
+        mock_install.assert_called_once()
+
     @patch("os.chdir")
     @patch("mmpm.magicmirror.package.repo_up_to_date")
     @patch("pathlib.PosixPath.exists")
@@ -113,8 +186,9 @@ class TestMagicMirrorPackage(unittest.TestCase):
         mock_repo_up_to_date.return_value = True
         self.package.env = MMPMEnv()
         expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
-        self.package.update()
-        mock_chdir.assert_called_with(expected_dir)
+        self.package.update(timeout=30)
+        mock_repo_up_to_date.assert_called_with(expected_dir, timeout=30)
+        mock_chdir.assert_not_called()
         self.assertTrue(self.package.is_upgradable)
 
     @patch("os.chdir")
@@ -125,7 +199,8 @@ class TestMagicMirrorPackage(unittest.TestCase):
         self.package.env = MMPMEnv()
         expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
         self.package.update()
-        mock_chdir.assert_called_with(expected_dir)
+        mock_repo_up_to_date.assert_called_with(expected_dir, timeout=None)
+        mock_chdir.assert_not_called()
         self.assertFalse(self.package.is_upgradable)
 
     @patch("os.chdir")
@@ -137,7 +212,9 @@ class TestMagicMirrorPackage(unittest.TestCase):
         expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
         self.package.is_upgradable = True
         self.package.upgrade()
-        mock_chdir.assert_called_with(expected_dir)
+        mock_chdir.assert_not_called()
+        mock_run_cmd.assert_any_call(["git", "fetch"], progress=True, message="Retrieving changes", cwd=expected_dir)
+        mock_run_cmd.assert_called_with(["git", "merge", "--ff-only", "@{upstream}"], progress=True, message="Applying changes", cwd=expected_dir)
 
     @patch("os.chdir")
     @patch("mmpm.magicmirror.package.run_cmd")
@@ -146,5 +223,6 @@ class TestMagicMirrorPackage(unittest.TestCase):
         expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
         self.package.env = MMPMEnv()
         result = self.package.upgrade()
-        mock_chdir.assert_called_with(expected_dir)
+        mock_chdir.assert_not_called()
+        mock_run_cmd.assert_called_once_with(["git", "fetch"], progress=True, message="Retrieving changes", cwd=expected_dir)
         self.assertFalse(result)
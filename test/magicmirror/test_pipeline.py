@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from test.helpers import commit, create_repository
+from unittest.mock import MagicMock, patch
+
+from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage
+from mmpm.magicmirror.pipeline import FAILED, UP_TO_DATE, UPGRADED, InstallationPipeline, UpgradePipeline
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.root = Path(self.tmp_dir.name) / "MagicMirror"
+        (self.root / "modules").mkdir(parents=True)
+
+        self.env = MagicMock()
+        self.env.MMPM_MAGICMIRROR_ROOT.get.return_value = self.root
+        self.env.MMPM_MAX_WORKERS.get.return_value = 4
+        self.env.MMPM_MAX_BUILD_WORKERS.get.return_value = 2
+        self.env.MMPM_DEPENDENCY_STORE.get.return_value = False
+        self.env.MMPM_BUILD_CACHE_SIZE.get.return_value = 0
+        self.env.MMPM_REPOSITORY_MIRRORS.get.return_value = False
+
+        patcher = patch("mmpm.magicmirror.pipeline.MMPMEnv", return_value=self.env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def create_repository(self, name: str, makefile: bool = False) -> str:
+        files = {"Makefile": "all:\n\ttouch built\n"} if makefile else {"README.md": name}
+        return str(create_repository(Path(self.tmp_dir.name) / "remotes" / name, files))
+
+    def package(self, name: str, repository: str) -> MagicMirrorPackage:
+        package = MagicMirrorPackage(title=name, repository=repository, directory=name)
+        package.env = self.env
+        return package
+
+
+class TestInstallationPipeline(PipelineTestCase):
+    def test_install(self):
+        packages = [self.package(f"MMM-Module-{index}", self.create_repository(f"MMM-Module-{index}", makefile=index % 2 == 0)) for index in range(4)]
+        cwd = str(self.root)
+
+        os.chdir(cwd)
+        self.addCleanup(os.chdir, Path(__file__).parent)
+
+        results = list(InstallationPipeline(packages).run())
+
+        self.assertEqual(results, [(package, True) for package in packages])
+        self.assertEqual(os.getcwd(), cwd)
+
+        for index in range(4):
+            module = self.root / "modules" / f"MMM-Module-{index}"
+            self.assertTrue((module / ".git").exists())
+            self.assertEqual((module / "built").exists(), index % 2 == 0)
+
+    def test_clone_failure(self):
+        packages = [
+            self.package("MMM-Missing", str(Path(self.tmp_dir.name) / "remotes" / "MMM-Missing")),
+            self.package("MMM-Module", self.create_repository("MMM-Module")),
+        ]
+
+        with patch.object(InstallationHandler, "build", return_value=True) as mock_build:
+            results = list(InstallationPipeline(packages).run())
+
+        self.assertEqual([success for _, success in results], [False, True])
+        mock_build.assert_called_once()
+
+    def test_builds_are_bounded(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def build(*_):
+            with lock:
+                running.append(None)
+                peak.append(len(running))
+
+            time.sleep(0.05)
+
+            with lock:
+                running.pop()
+
+            return True
+
+        packages = [self.package(f"MMM-Module-{index}", f"https://github.com/test/MMM-Module-{index}") for index in range(6)]
+
+        with patch.object(InstallationHandler, "clone", return_value=True), patch.object(InstallationHandler, "build", build):
+            results = list(InstallationPipeline(packages).run())
+
+        self.assertEqual([package for package, _ in results], packages)
+        self.assertTrue(all(success for _, success in results))
+        self.assertEqual(max(peak), 2)
+
+    def test_duplicate_directories(self):
+        packages = [self.package("MMM-Module", "https://github.com/a/MMM-Module"), self.package("MMM-Module", "https://github.com/b/MMM-Module")]
+
+        with patch.object(InstallationHandler, "clone", return_value=True) as mock_clone, patch.object(InstallationHandler, "build", return_value=False):
+            results = list(InstallationPipeline(packages).run())
+
+        mock_clone.assert_called_once()
+        self.assertEqual(results, [(packages[0], False), (packages[1], False)])
+
+
+
+class TestUpgradePipeline(PipelineTestCase):
+    def install(self, names):
+        packages = [self.package(name, self.create_repository(name)) for name in names]
+        self.assertTrue(all(success for _, success in InstallationPipeline(packages).run()))
+
+        # the remote copies of the packages, rather than the installed ones, which have resolved directories
+        return [self.package(name, str(Path(self.tmp_dir.name) / "remotes" / name)) for name in names]
+
+    def test_upgrade(self):
+        packages = self.install(["MMM-Upgraded", "MMM-Current", "MMM-Diverged"])
+        remotes = Path(self.tmp_dir.name) / "remotes"
+
+        commit(remotes / "MMM-Upgraded", "feature", {"feature.js": "feature"})
+        commit(remotes / "MMM-Diverged", "upstream", {"upstream.js": "upstream"})
+        commit(self.root / "modules" / "MMM-Diverged", "local", {"local.js": "local"})
+
+        with patch.object(InstallationHandler, "build", return_value=True) as mock_build:
+            results = list(UpgradePipeline(packages).run())
+
+        self.assertEqual(results, [(packages[0], UPGRADED), (packages[1], UP_TO_DATE), (packages[2], FAILED)])
+        self.assertTrue((self.root / "modules" / "MMM-Upgraded" / "feature.js").exists())
+        self.assertFalse((self.root / "modules" / "MMM-Diverged" / "upstream.js").exists())
+        mock_build.assert_called_once()
+
+    def test_force(self):
+        packages = self.install(["MMM-Current"])
+
+        with patch.object(InstallationHandler, "build", return_value=False) as mock_build:
+            self.assertEqual(list(UpgradePipeline(packages).run()), [(packages[0], UP_TO_DATE)])
+            mock_build.assert_not_called()
+
+            # the dependencies of up to date packages are only checked when forced
+            self.assertEqual(list(UpgradePipeline(packages, force=True).run()), [(packages[0], FAILED)])
+            mock_build.assert_called_once()
+
+    def test_fetch_failure(self):
+        packages = self.install(["MMM-Module"])
+        shutil.rmtree(Path(self.tmp_dir.name) / "remotes" / "MMM-Module")
+
+        self.assertEqual(list(UpgradePipeline(packages).run()), [(packages[0], FAILED)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from shutil import rmtree
+
+from mmpm.magicmirror.store import DependencyStore
+
+
+class TestDependencyStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        self.root = Path(self.tmp_dir.name)
+        self.store = DependencyStore(self.root / "store")
+
+    def create_node_modules(self, name: str) -> Path:
+        node_modules = self.root / name / "node_modules"
+        (node_modules / "axios" / "dist").mkdir(parents=True)
+        (node_modules / ".bin").mkdir()
+        (node_modules / ".cache").mkdir()
+
+        (node_modules / "axios" / "package.json").write_text('{"name": "axios", "version": "1.6.0"}', encoding="utf-8")
+        (node_modules / "axios" / "dist" / "axios.js").write_text("module.exports = {};" * 100, encoding="utf-8")
+        (node_modules / "axios" / "cli.js").write_text("module.exports = {};" * 100, encoding="utf-8")
+        (node_modules / "axios" / "cli.js").chmod(0o755)
+        (node_modules / ".bin" / "axios").symlink_to("../axios/cli.js")
+        (node_modules / ".cache" / "state.json").write_text("{}", encoding="utf-8")
+        (node_modules / f"{name}.js").write_text(name, encoding="utf-8")
+
+        return node_modules
+
+    def test_link(self):
+        first = self.create_node_modules("MMM-First")
+        second = self.create_node_modules("MMM-Second")
+
+        report = self.store.link(first)
+        self.assertEqual(report["error"], "")
+        self.assertEqual(report["files"], 4)
+        self.assertEqual(report["shared"], 0)
+        self.assertEqual(report["added"], report["size"])
+
+        report = self.store.link(second)
+        self.assertEqual(report["files"], 4)
+        self.assertEqual(report["added"], len("MMM-Second"))
+        self.assertEqual(report["shared"], report["size"] - len("MMM-Second"))
+
+        for file in ("axios/package.json", "axios/dist/axios.js", "axios/cli.js"):
+            self.assertEqual(os.stat(first / file).st_ino, os.stat(second / file).st_ino)
+
+        # identical contents with different permissions aren't shared
+        self.assertNotEqual(os.stat(second / "axios" / "dist" / "axios.js").st_ino, os.stat(second / "axios" / "cli.js").st_ino)
+        self.assertTrue(os.access(second / "axios" / "cli.js", os.X_OK))
+
+        self.assertTrue((second / ".bin" / "axios").is_symlink())
+        self.assertEqual(os.stat(second / ".cache" / "state.json").st_nlink, 1)
+        self.assertEqual((second / "axios" / "package.json").read_text(encoding="utf-8"), '{"name": "axios", "version": "1.6.0"}')
+
+        # linking again finds everything is shared already
+        self.assertEqual(self.store.link(second)["added"], 0)
+
+    def test_prune(self):
+        first = self.create_node_modules("MMM-First")
+        second = self.create_node_modules("MMM-Second")
+        self.store.link(first)
+        self.store.link(second)
+
+        rmtree(first.parent)
+        self.assertEqual(self.store.prune(), len("MMM-First"))
+
+        rmtree(second.parent)
+        self.assertGreater(self.store.prune(), 0)
+        self.assertEqual([file for file in (self.root / "store").rglob("*") if file.is_file()], [])
+
+    def test_missing_directory(self):
+        report = self.store.link(self.root / "missing")
+        self.assertEqual(report["files"], 0)
+        self.assertEqual(report["error"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import unittest
+from argparse import ArgumentParser
+from importlib import import_module
 from unittest.mock import MagicMock, patch
 
-from mmpm.subcommands.loader import Loader
+from mmpm.subcommands.loader import LazyLoader, Loader
+from mmpm.subcommands.manifest import SUBCOMMANDS
 
 
 class TestLoader(unittest.TestCase):
@@ -26,3 +29,36 @@ class TestLoader(unittest.TestCase):
     def test_loader_fail(self):
         loader = Loader([], "non_existent_python_module", "app_name", "test_prefix_")
         self.assertEqual(len(loader.objects.keys()), 0)
+
+
+class TestLazyLoader(unittest.TestCase):
+    def test_selected(self):
+        self.assertEqual(LazyLoader.selected(["install", "MMM-Foo"]), "install")
+        self.assertEqual(LazyLoader.selected(["-h", "list", "--all"]), "list")
+        self.assertIsNone(LazyLoader.selected(["--help"]))
+        self.assertIsNone(LazyLoader.selected([]))
+
+    @patch("mmpm.subcommands.loader.import_module", wraps=import_module)
+    def test_register_selected_only(self, mock_import_module):
+        parser = ArgumentParser(prog="mmpm")
+        subparser = parser.add_subparsers(dest="subcmd")
+        loader = LazyLoader(SUBCOMMANDS, "mmpm.subcommands", "mmpm", "_sub_cmd")
+
+        loader.register(subparser, selected="version")
+
+        mock_import_module.assert_called_once_with("mmpm.subcommands._sub_cmd_version")
+        self.assertEqual(list(loader.objects), ["version"])
+        self.assertEqual(sorted(subparser.choices), sorted(SUBCOMMANDS))
+        self.assertEqual(parser.parse_args(["version"]).subcmd, "version")
+
+    def test_register_everything(self):
+        subparser = ArgumentParser(prog="mmpm").add_subparsers(dest="subcmd")
+        loader = LazyLoader(SUBCOMMANDS, "mmpm.subcommands", "mmpm", "_sub_cmd")
+
+        loader.register(subparser, everything=True)
+
+        self.assertEqual(sorted(loader.objects), sorted(SUBCOMMANDS))
+
+    def test_load_unknown(self):
+        loader = LazyLoader(SUBCOMMANDS, "mmpm.subcommands", "mmpm", "_sub_cmd")
+        self.assertIsNone(loader.load("not-a-subcommand"))
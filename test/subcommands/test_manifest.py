@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import unittest
+
+import mmpm.subcommands
+from mmpm.subcommands.loader import Loader
+from mmpm.subcommands.manifest import SUBCOMMANDS
+
+
+class TestManifest(unittest.TestCase):
+    def test_manifest_matches_subcommands(self):
+        loader = Loader(mmpm.subcommands.__path__, "mmpm.subcommands", "mmpm", "_sub_cmd")
+
+        self.assertEqual(sorted(SUBCOMMANDS), sorted(loader.objects))
+
+        for name, subcommand in loader.objects.items():
+            module, help_message = SUBCOMMANDS[name]
+            self.assertEqual(subcommand.__module__, f"mmpm.subcommands.{module}")
+            self.assertEqual(help_message.format(app_name="mmpm"), subcommand.help)
+
+
+if __name__ == "__main__":
+    unittest.main()
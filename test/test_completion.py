@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import json
+import os
+import unittest
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from mmpm.completion import CompletionTable, complete
+
+
+def make_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="mmpm")
+    subparser = parser.add_subparsers(dest="subcmd")
+
+    install = subparser.add_parser("install", help="Install MagicMirror packages")
+    install.add_argument("-y", "--yes", action="store_true", dest="assume_yes")
+
+    subparser.add_parser("remove", help="Remove installed MagicMirror packages")
+    subparser.add_parser("show", help="Show details about one or more packages")
+
+    mm_pkg = subparser.add_parser("mm-pkg", help="Manually add/remove custom MagicMirror packages")
+    mm_pkg_subparsers = mm_pkg.add_subparsers(dest="command")
+    add = mm_pkg_subparsers.add_parser("add", help="Add a custom package")
+    add.add_argument("-t", "--title", type=str, dest="title")
+
+    completion = subparser.add_parser("completion", help="Generate commands to enable autocompletion")
+    completion.add_argument("-s", "--shell", choices=["bash", "zsh"], dest="shell")
+
+    return parser
+
+
+class TestCompletion(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        tmp = Path(self.tmp_dir.name)
+
+        self.db_file = tmp / "db.json"
+        self.db_file.write_text("{}")
+
+        self.patches = [
+            patch("mmpm.constants.paths.MMPM_COMPLETION_TABLE_FILE", tmp / "completion.json"),
+            patch("mmpm.constants.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE", self.db_file),
+            patch("mmpm.constants.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_CATALOG_FILE", tmp / "catalog.sqlite3"),
+            patch("mmpm.magicmirror.database.MagicMirrorDatabase.titles", return_value=[("MMM-Clock", True), ("MMM-Weather", False)]),
+        ]
+
+        # the last patch is of MagicMirrorDatabase.titles
+        self.titles = [patcher.start() for patcher in self.patches][-1]
+        self.output = tmp / "completions"
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+
+        self.tmp_dir.cleanup()
+
+    def complete(self, line: str, table: CompletionTable = None) -> list:
+        env = {"_ARGCOMPLETE": "1", "COMP_LINE": line, "COMP_POINT": str(len(line)), "_ARGCOMPLETE_IFS": "\n", "_ARGCOMPLETE_STDOUT_FILENAME": str(self.output)}
+
+        # argcomplete writes debug output to file descriptor 9, which pytest uses
+        with patch.dict(os.environ, env), patch("argcomplete.finders.CompletionFinder._init_debug_stream"):
+            with self.assertRaises(SystemExit):
+                complete("mmpm", table)
+
+        return self.output.read_text().split("\n")
+
+    def test_not_completing(self):
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(complete("mmpm"))
+
+    def test_missing_table(self):
+        with patch.dict(os.environ, {"_ARGCOMPLETE": "1"}):
+            self.assertFalse(complete("mmpm"))
+
+    def test_outdated_table(self):
+        table = CompletionTable()
+        table.update(make_parser())
+        table.table["version"] = "0.0.0"
+
+        with patch.dict(os.environ, {"_ARGCOMPLETE": "1"}):
+            self.assertFalse(complete("mmpm", table))
+
+    def test_complete(self):
+        CompletionTable().update(make_parser())
+
+        self.assertEqual(self.complete("mmpm in"), ["install "])
+        self.assertEqual(sorted(self.complete("mmpm install --")), ["--help", "--yes"])
+        self.assertEqual(self.complete("mmpm mm-pkg add --t"), ["--title "])
+        self.assertEqual(sorted(self.complete("mmpm completion --shell ")), ["bash", "zsh"])
+
+    def test_complete_packages(self):
+        CompletionTable().update(make_parser())
+
+        self.assertEqual(self.complete("mmpm install MMM-"), ["MMM-Weather "])
+        self.assertEqual(self.complete("mmpm remove MMM-"), ["MMM-Clock "])
+        self.assertEqual(sorted(self.complete("mmpm show MMM-")), ["MMM-Clock", "MMM-Weather"])
+
+        # the titles are cached until the database changes, and are only read from the catalog
+        self.assertEqual(self.titles.call_count, 1)
+        self.titles.assert_called_with(catalog_only=True)
+
+        os.utime(self.db_file, ns=(0, 0))
+        self.complete("mmpm show MMM-")
+        self.assertEqual(self.titles.call_count, 2)
+
+    def test_empty_database(self):
+        self.db_file.write_text("")
+        CompletionTable().update(make_parser())
+
+        self.assertEqual(self.complete("mmpm install MMM-"), [""])
+        self.titles.assert_not_called()
+
+    def test_table_file(self):
+        CompletionTable().update(make_parser())
+        table = json.loads(Path(self.tmp_dir.name, "completion.json").read_text())
+
+        self.assertIn("install", table["parser"]["subcommands"])
+        self.assertTrue(CompletionTable().is_current())
+
+
+if __name__ == "__main__":
+    unittest.main()
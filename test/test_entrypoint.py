@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import json
+import os
+import subprocess
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+
+from mmpm.__version__ import version
+
+# imports the CLI entrypoint, printing every address a socket connected to while doing so
+PROBE = """
+import json, sys
+connections = []
+sys.addaudithook(lambda event, args: connections.append(repr(args[1])) if event == "socket.connect" else None)
+import mmpm.entrypoint
+print(json.dumps(connections))
+"""
+
+# runs 'mmpm version', printing the modules that were imported to do so
+VERSION = """
+import json, sys
+sys.argv = ["mmpm", "version"]
+from mmpm.entrypoint import main
+main()
+print(json.dumps(sorted(sys.modules)))
+"""
+
+# completes 'mmpm li', printing the subcommand modules that were imported to do so when exiting
+COMPLETE = """
+import atexit, json, sys
+atexit.register(lambda: print(json.dumps([module for module in sys.modules if module.startswith("mmpm.subcommands._sub_cmd")])))
+from mmpm.entrypoint import main
+main()
+"""
+
+# the heavy dependencies only some of the subcommands need
+HEAVY_MODULES = ["bs4", "git", "mmpm.magicmirror.database", "prompt_toolkit", "pygments", "requests", "socketio", "yaspin"]
+
+
+class TestEntrypoint(unittest.TestCase):
+    def test_import_makes_no_connections(self):
+        with TemporaryDirectory() as home:
+            output = subprocess.run([sys.executable, "-c", PROBE], env={**os.environ, "HOME": home}, capture_output=True, text=True, check=True)
+
+        connections = json.loads(output.stdout.splitlines()[-1])
+        self.assertEqual(connections, [])
+
+    def test_version_imports_only_what_it_needs(self):
+        with TemporaryDirectory() as home:
+            output = subprocess.run([sys.executable, "-c", VERSION], env={**os.environ, "HOME": home}, capture_output=True, text=True, check=True)
+
+        lines = output.stdout.splitlines()
+        modules = json.loads(lines[-1])
+
+        self.assertEqual(lines[0], version)
+        self.assertEqual([module for module in HEAVY_MODULES if module in modules], [])
+        self.assertNotIn("mmpm.subcommands._sub_cmd_install", modules)
+
+    def test_completion_fast_path(self):
+        with TemporaryDirectory() as home:
+            line = "mmpm li"
+            completions = os.path.join(home, "completions")
+            env = {**os.environ, "HOME": home, "_ARGCOMPLETE": "1", "COMP_LINE": line, "COMP_POINT": str(len(line)), "_ARGCOMPLETE_STDOUT_FILENAME": completions}
+
+            # the first completion builds the completion table from every subcommand, and the next is answered from the table
+            for expected in [True, False]:
+                output = subprocess.run([sys.executable, "-c", COMPLETE], env=env, capture_output=True, text=True, check=True)
+
+                with open(completions, encoding="utf-8") as completions_file:
+                    self.assertEqual(completions_file.read(), "list ")
+
+                self.assertEqual(bool(json.loads(output.stdout.splitlines()[-1])), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
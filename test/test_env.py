@@ -25,6 +25,8 @@ class TestEnvVar(unittest.TestCase):
             return fake.pystr()
         elif isinstance(value_type, bool):
             return fake.pybool()
+        elif isinstance(value_type, int):
+            return fake.pyint()
 
     @patch("mmpm.env.open", new_callable=mock_open)
     def test_get_existing_variable(self, mock_file):
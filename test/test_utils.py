@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import json
 import os
+import time
 import unittest
 from pathlib import Path, PosixPath
 from shutil import rmtree
 from subprocess import DEVNULL
+from tempfile import TemporaryDirectory
+from test.helpers import commit, create_repository, git
 from unittest.mock import MagicMock, mock_open, patch
 from uuid import uuid4
 
@@ -12,7 +15,7 @@ import requests
 from faker import Faker
 
 from mmpm.__version__ import major, version
-from mmpm.utils import get_host_ip, get_pids, kill_pids_of_process, run_cmd, safe_get_request, update_available
+from mmpm.utils import cached_host_ip, get_host_ip, get_pids, git_config, git_remote_url, human_readable_size, kill_pids_of_process, repo_up_to_date, run_cmd, safe_get_request, update_available
 
 fake = Faker()
 
@@ -25,6 +28,38 @@ class TestUtils(unittest.TestCase):
         host_ip = get_host_ip()
         self.assertEqual(host_ip, ip)
 
+    @patch("mmpm.utils.get_host_ip")
+    def test_cached_host_ip(self, mock_get_host_ip):
+        ip = fake.ipv4()
+        mock_get_host_ip.return_value = ip
+
+        with TemporaryDirectory() as tmp_dir, patch("mmpm.constants.paths.MMPM_HOST_IP_FILE", Path(tmp_dir) / "host-ip.json") as cache_file:
+            # detected once per process
+            with patch.dict("mmpm.utils.__host_ip", clear=True):
+                self.assertEqual(cached_host_ip(), ip)
+                self.assertEqual(cached_host_ip(), ip)
+                self.assertEqual(mock_get_host_ip.call_count, 1)
+
+            # another process reuses the persisted address until it expires
+            with patch.dict("mmpm.utils.__host_ip", clear=True):
+                self.assertEqual(cached_host_ip(), ip)
+                self.assertEqual(mock_get_host_ip.call_count, 1)
+
+            cache_file.write_text(json.dumps({"address": fake.ipv4(), "expires": time.time() - 1}))
+
+            with patch.dict("mmpm.utils.__host_ip", clear=True):
+                self.assertEqual(cached_host_ip(), ip)
+                self.assertEqual(mock_get_host_ip.call_count, 2)
+                self.assertGreater(json.loads(cache_file.read_text())["expires"], time.time())
+
+            # the fallback address isn't persisted, so it's retried by the next process
+            mock_get_host_ip.return_value = "localhost"
+            cache_file.unlink()
+
+            with patch.dict("mmpm.utils.__host_ip", clear=True):
+                self.assertEqual(cached_host_ip(), "localhost")
+                self.assertFalse(cache_file.exists())
+
     @patch("mmpm.utils.subprocess.Popen")
     @patch("mmpm.utils.yaspin")
     def test_run_cmd_progress(self, mock_yaspin, mock_popen):
@@ -50,6 +85,13 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(stdout, "output")
         self.assertEqual(stderr, "error")
 
+    def test_human_readable_size(self):
+        self.assertEqual(human_readable_size(0), "0 B")
+        self.assertEqual(human_readable_size(1023), "1023 B")
+        self.assertEqual(human_readable_size(1536), "1.5 KiB")
+        self.assertEqual(human_readable_size(5 * 1024**2), "5.0 MiB")
+        self.assertEqual(human_readable_size(3 * 1024**3), "3.0 GiB")
+
     @patch("mmpm.utils.subprocess.Popen")
     def test_get_pids(self, mock_popen):
         random_proccess_ids = [str(fake.pyint()), str(fake.pyint())]
@@ -94,5 +136,95 @@ class TestUtils(unittest.TestCase):
         self.assertTrue(update_available())
 
 
+class TestRepoUpToDate(unittest.TestCase):
+    def setUp(self):
+        self.root = Path("/tmp") / f"mmpm-test-{uuid4()}"
+        self.remote = create_repository(self.root / "remote", {"README.md": "initial"})
+        self.local = self.root / "local"
+        git(self.root, "clone", "-q", str(self.remote), str(self.local))
+
+    def tearDown(self):
+        rmtree(self.root, ignore_errors=True)
+
+    def test_up_to_date(self):
+        self.assertFalse(repo_up_to_date(self.local))
+
+    def test_out_of_date_without_fetching(self):
+        commit(self.remote, "second", {"README.md": "second"})
+        self.assertTrue(repo_up_to_date(self.local, timeout=10))
+
+        # the lightweight check must not download the new objects
+        self.assertNotIn("second", git(self.local, "log", "--all", "--format=%s"))
+
+    def test_out_of_date_with_fetch(self):
+        commit(self.remote, "second", {"README.md": "second"})
+        self.assertTrue(repo_up_to_date(self.local, fetch=True))
+
+    def test_not_a_repo(self):
+        self.assertFalse(repo_up_to_date(self.root))
+
+
+
+class TestGitRemoteUrl(unittest.TestCase):
+    def setUp(self):
+        self.root = Path("/tmp") / f"mmpm-test-{uuid4()}"
+        self.repo = self.root / "MMM-Repo"
+        (self.repo / ".git").mkdir(parents=True)
+
+    def tearDown(self):
+        rmtree(self.root, ignore_errors=True)
+
+    def write_config(self, git_dir: Path, config: str) -> None:
+        git_dir.mkdir(parents=True, exist_ok=True)
+        (git_dir / "config").write_text(config, encoding="utf-8")
+
+    def test_origin(self):
+        self.write_config(
+            self.repo / ".git",
+            '[core]\n\tbare = false\n# [remote "origin"]\n[remote "upstream"]\n\turl = https://github.com/upstream/MMM-Repo\n'
+            '[REMOTE "origin"]\n\tfetch = +refs/heads/*:refs/remotes/origin/*\n\tURL = https://github.com/me/MMM-Repo.git\n',
+        )
+
+        self.assertEqual(git_remote_url(self.repo), "https://github.com/me/MMM-Repo.git")
+        self.assertEqual(git_remote_url(self.repo, remote="upstream"), "https://github.com/upstream/MMM-Repo")
+        self.assertIsNone(git_remote_url(self.repo, remote="Origin"))
+
+    def test_other_sections(self):
+        self.write_config(self.repo / ".git", '[remote "origin"]\n\turl = https://github.com/me/MMM-Repo\n[mmpm]\n\tcloneStrategy = shallow\n')
+
+        self.assertEqual(git_config(self.repo, "mmpm", "clonestrategy"), "shallow")
+        self.assertEqual(git_config(self.repo, "MMPM", "cloneStrategy"), "shallow")
+        self.assertIsNone(git_config(self.repo, "mmpm", "url"))
+        self.assertIsNone(git_config(self.repo, "remote", "url"))
+
+    def test_quoted_and_legacy_syntax(self):
+        self.write_config(self.repo / ".git", '[remote.origin]\n\turl = "git@github.com:me/MMM-Repo.git"\n')
+        self.assertEqual(git_remote_url(self.repo), "git@github.com:me/MMM-Repo.git")
+
+    def test_gitfile(self):
+        # submodules have a '.git' file pointing to their Git directory
+        (self.repo / ".git").rmdir()
+        (self.repo / ".git").write_text("gitdir: ../.git/modules/MMM-Repo\n", encoding="utf-8")
+        self.write_config(self.root / ".git" / "modules" / "MMM-Repo", '[remote "origin"]\n\turl = https://github.com/me/MMM-Repo\n')
+
+        self.assertEqual(git_remote_url(self.repo), "https://github.com/me/MMM-Repo")
+
+    def test_worktree(self):
+        # worktrees share the configuration of the main repository
+        main = create_repository(self.root / "main")
+        git(main, "remote", "add", "origin", "https://github.com/me/MMM-Repo")
+        git(main, "worktree", "add", "-q", str(self.root / "worktree"))
+
+        self.assertTrue((self.root / "worktree" / ".git").is_file())
+        self.assertEqual(git_remote_url(self.root / "worktree"), "https://github.com/me/MMM-Repo")
+
+    def test_missing_remote(self):
+        self.write_config(self.repo / ".git", "[core]\n\tbare = false\n")
+        self.assertIsNone(git_remote_url(self.repo))
+
+    def test_not_a_repo(self):
+        self.assertIsNone(git_remote_url(self.root))
+
+
 if __name__ == "__main__":
     unittest.main()
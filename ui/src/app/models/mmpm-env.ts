@@ -5,4 +5,12 @@ export interface MMPMEnv {
   MMPM_MAGICMIRROR_PM2_PROCESS_NAME: string;
   MMPM_MAGICMIRROR_ROOT: string;
   MMPM_MAGICMIRROR_URI: string;
+  MMPM_MAX_WORKERS: number;
+  MMPM_MAX_BUILD_WORKERS: number;
+  MMPM_GIT_TIMEOUT: number;
+  MMPM_CLONE_STRATEGY: string;
+  MMPM_DEPENDENCY_STORE: boolean;
+  MMPM_BUILD_CACHE_SIZE: number;
+  MMPM_REPOSITORY_MIRRORS: boolean;
+  MMPM_DATABASE_MAX_AGE: number;
 }
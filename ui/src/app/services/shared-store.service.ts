@@ -29,6 +29,14 @@ export class SharedStoreService {
     MMPM_MAGICMIRROR_PM2_PROCESS_NAME: "",
     MMPM_MAGICMIRROR_ROOT: "",
     MMPM_MAGICMIRROR_URI: "",
+    MMPM_MAX_WORKERS: 8,
+    MMPM_MAX_BUILD_WORKERS: 2,
+    MMPM_GIT_TIMEOUT: 60,
+    MMPM_CLONE_STRATEGY: "full",
+    MMPM_DEPENDENCY_STORE: false,
+    MMPM_BUILD_CACHE_SIZE: 0,
+    MMPM_REPOSITORY_MIRRORS: false,
+    MMPM_DATABASE_MAX_AGE: 24,
   });
 
   public readonly env: Observable<MMPMEnv> = this.envSubj.asObservable();